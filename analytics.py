@@ -0,0 +1,247 @@
+"""
+Batch review analytics over columns.
+
+These are the notebook's analysis helpers (get_most_reviewed_items,
+categorize_reviews_by_genre, categorize_reviews_by_rating, calc_avg)
+recast as grouped aggregations over a ReviewColumns batch: one integer
+item-code column and one rating column. Each function makes a single pass
+over the batch, using NumPy when installed and a pure-Python loop otherwise,
+and returns row numbers or per-item numbers instead of copies of the review
+dicts.
+
+Example:
+    >>> cols = ReviewColumns.from_dicts([
+    ...     {"title": "Gone Girl", "rating": 4.6},
+    ...     {"title": "The Conjuring", "rating": 4.7},
+    ...     {"title": "The Conjuring", "rating": 4.8},
+    ... ])
+    >>> top_k_by_count(cols, 1)
+    [('The Conjuring', 2)]
+    >>> item_stats(cols)["The Conjuring"]["mean"]
+    4.75
+"""
+
+import heapq
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from review_store import STARS_SCALE, _numpy
+
+
+class ReviewColumns:
+    """A batch of reviews as two parallel columns.
+
+    Args:
+        codes (Sequence[int]): item code of each review (index into labels)
+        ratings (Sequence[number]): rating of each review, multiplied by scale
+        labels (List[str]): item id or title for each code
+        scale (int): divisor that turns a stored rating back into stars
+    """
+
+    def __init__(self, codes: Sequence[int], ratings: Sequence[Any], labels: List[str], scale: int = 1):
+        if len(codes) != len(ratings):
+            raise ValueError("codes and ratings must be the same length")
+        self.codes = codes
+        self.ratings = ratings
+        self.labels = labels
+        self.scale = scale
+        self._code_of: Optional[Dict[str, int]] = None   # label -> code, built on first lookup
+
+    def __len__(self):
+        return len(self.codes)
+
+    def code_of(self, label: str) -> Optional[int]:
+        """Return the item code of a label, or None if it is not in the batch."""
+        if self._code_of is None:
+            self._code_of = {label: code for code, label in enumerate(self.labels)}
+        return self._code_of.get(label)
+
+    @classmethod
+    def from_store(cls, store) -> "ReviewColumns":
+        """Take a review_store.ReviewStore's columns as they are now.
+
+        The columns are copies, so the store keeps accepting writes; they
+        do not show up in this batch.
+        """
+        columns = store.columns()
+        return cls(columns["item"], columns["stars"], store.item_ids(), STARS_SCALE)
+
+    @classmethod
+    def from_dicts(cls, reviews: Iterable[Mapping[str, Any]], key: str = "title",
+                   rating: str = "rating") -> "ReviewColumns":
+        """Build columns from notebook-style review dicts in one pass."""
+        codes = array("I")
+        ratings = array("d")
+        labels: List[str] = []
+        index: Dict[str, int] = {}
+        for review in reviews:
+            label = review[key]
+            code = index.get(label)
+            if code is None:
+                code = index[label] = len(labels)
+                labels.append(label)
+            codes.append(code)
+            ratings.append(review[rating])
+        batch = cls(codes, ratings, labels)
+        batch._code_of = index
+        return batch
+
+    def _np(self):
+        np = _numpy()
+        return np.asarray(self.codes, dtype=np.int64), np.asarray(self.ratings, dtype=np.float64)
+
+
+def counts(cols: ReviewColumns) -> List[int]:
+    """Return the number of reviews per item code."""
+    np = _numpy()
+    if np is not None and len(cols):
+        return np.bincount(cols._np()[0], minlength=len(cols.labels)).tolist()
+    result = [0] * len(cols.labels)
+    for code in cols.codes:
+        result[code] += 1
+    return result
+
+
+def top_k_by_count(cols: ReviewColumns, k: int) -> List[Tuple[str, int]]:
+    """Return the k most-reviewed items as (label, count), most reviews first."""
+    per_item = counts(cols)
+    best = heapq.nlargest(k, range(len(per_item)), key=per_item.__getitem__)
+    return [(cols.labels[code], per_item[code]) for code in best if per_item[code]]
+
+
+def most_reviewed(cols: ReviewColumns) -> List[str]:
+    """Return every item tied for the highest review count (notebook semantics)."""
+    per_item = counts(cols)
+    if not per_item:
+        return []
+    top = max(per_item)
+    return [cols.labels[code] for code, count in enumerate(per_item) if count == top and count]
+
+
+def rows_of_most_reviewed(cols: ReviewColumns) -> List[int]:
+    """Return the row numbers of the reviews of the most-reviewed items.
+
+    This is get_most_reviewed_items without copying any review.
+    """
+    per_item = counts(cols)
+    if not per_item:
+        return []
+    top = max(per_item)
+    np = _numpy()
+    if np is not None and len(cols):
+        codes = cols._np()[0]
+        winners = np.flatnonzero(np.asarray(per_item) == top)
+        return np.flatnonzero(np.isin(codes, winners)).tolist()
+    winners = {code for code, count in enumerate(per_item) if count == top}
+    return [row for row, code in enumerate(cols.codes) if code in winners]
+
+
+def group_rows_by(cols: ReviewColumns, key_of: Mapping[str, Any]) -> Dict[Any, List[int]]:
+    """Group row numbers by a per-item key, e.g. genre.
+
+    Args:
+        key_of: label -> group key; string keys are lower-cased like the
+            notebook's categorize_reviews_by_genre. Items without a key are
+            left out.
+    """
+    by_code = []
+    for label in cols.labels:
+        key = key_of.get(label)
+        by_code.append(key.lower() if isinstance(key, str) else key)
+    groups: Dict[Any, List[int]] = {}
+    np = _numpy()
+    if np is not None and len(cols):
+        codes = cols._np()[0]
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(by_code) + 1))
+        for code, key in enumerate(by_code):
+            if key is not None and bounds[code] < bounds[code + 1]:
+                groups.setdefault(key, []).extend(order[bounds[code]:bounds[code + 1]].tolist())
+        for rows in groups.values():
+            rows.sort()
+        return groups
+    for row, code in enumerate(cols.codes):
+        key = by_code[code]
+        if key is not None:
+            groups.setdefault(key, []).append(row)
+    return groups
+
+
+def rating_buckets(cols: ReviewColumns, negative_max: float = 2.5) -> Dict[str, List[int]]:
+    """Split row numbers into 'positive' and 'negative' like categorize_reviews_by_rating."""
+    cutoff = negative_max * cols.scale
+    np = _numpy()
+    if np is not None and len(cols):
+        ratings = cols._np()[1]
+        negative = (ratings >= 0) & (ratings <= cutoff)
+        return {"positive": np.flatnonzero(~negative).tolist(),
+                "negative": np.flatnonzero(negative).tolist()}
+    buckets: Dict[str, List[int]] = {"positive": [], "negative": []}
+    for row, value in enumerate(cols.ratings):
+        buckets["negative" if 0 <= value <= cutoff else "positive"].append(row)
+    return buckets
+
+
+def _percentile(sorted_values: Sequence[float], pct: float) -> float:
+    # linear interpolation between closest ranks (NumPy's default method)
+    pos = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+
+def item_stats(cols: ReviewColumns, percentiles: Sequence[float] = (25, 50, 75)) -> Dict[str, Dict[str, float]]:
+    """Return count, mean, median and the requested percentiles per item.
+
+    Ratings are sorted once (grouped by item) and every statistic is read
+    off the sorted runs, so the cost is one sort of the batch.
+    """
+    result: Dict[str, Dict[str, float]] = {}
+    scale = cols.scale
+    np = _numpy()
+    if np is not None and len(cols):
+        codes, ratings = cols._np()
+        order = np.lexsort((ratings, codes))
+        codes, ratings = codes[order], ratings[order] / scale
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.concatenate(([0], bounds)).tolist()
+        stops = np.concatenate((bounds, [len(codes)])).tolist()
+        sums = np.add.reduceat(ratings, starts).tolist()
+        ratings = ratings.tolist()
+        for start, stop, total in zip(starts, stops, sums):
+            result[cols.labels[codes[start]]] = _stats(ratings[start:stop], total, percentiles)
+        return result
+    grouped: Dict[int, List[float]] = {}
+    for code, value in zip(cols.codes, cols.ratings):
+        grouped.setdefault(code, []).append(value / scale)
+    for code, values in grouped.items():
+        values.sort()
+        result[cols.labels[code]] = _stats(values, sum(values), percentiles)
+    return result
+
+
+def _stats(values: List[float], total: float, percentiles: Sequence[float]) -> Dict[str, float]:
+    stats = {"count": len(values), "mean": round(total / len(values), 10),
+             "median": _percentile(values, 50)}
+    for pct in percentiles:
+        stats[f"p{pct:g}"] = _percentile(values, pct)
+    return stats
+
+
+def average_for(cols: ReviewColumns, label: str) -> Optional[float]:
+    """Return one item's mean rating (calc_avg's number), or None if unrated."""
+    code = cols.code_of(label)
+    if code is None:
+        return None
+    np = _numpy()
+    if np is not None and len(cols):
+        codes, ratings = cols._np()
+        selected = ratings[codes == code]
+        return float(selected.mean()) / cols.scale if len(selected) else None
+    total = count = 0
+    for c, value in zip(cols.codes, cols.ratings):
+        if c == code:
+            total += value
+            count += 1
+    return total / count / cols.scale if count else None
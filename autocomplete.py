@@ -0,0 +1,386 @@
+"""
+Type-ahead completion for titles, creators and tags.
+
+PrefixIndex keeps every normalized term in a sorted array (parallel
+lists of terms and keys). All terms starting with a prefix sit next to
+each other, so they are found with two bisects. A string is filed under
+each of its word starts, so "conj" completes "The Conjuring".
+Completions are ranked by score, best first, with ties broken by text.
+
+A short prefix such as "t" can match a large share of a big catalog.
+When a prefix matches more than scan_limit entries, its top cache_size
+completions are kept in a cache. The cache is built on the first
+request, or up front with warm(). It is then kept current as scores
+rise and entries are added, so popular prefixes are a dict lookup and
+rare ones scan only a short run of the array.
+
+Autocomplete maintains one PrefixIndex per field:
+    title     one entry per item, scored by the item's rank
+    creator   one entry per creator (AbstractMediaItem.creator, or the
+              "creator" metadata key), scored by the sum over its items
+    tag       one entry per tag, scored the same way
+Items are ranked by review count by default. Pass score=engagement_score,
+or any item -> number function, to rank by something else.
+
+It follows a catalog.Catalog when subscribed (new items, tags, reviews,
+and refresh() after a title change). Otherwise call add_item,
+update_item and update_score yourself.
+
+Example:
+    >>> from media_system import MediaItem, Review
+    >>> complete = Autocomplete()
+    >>> conjuring = MediaItem("m1", "The Conjuring", "movie", tags=["horror"])
+    >>> complete.add_items([conjuring, MediaItem("m2", "Contact", "movie", tags=["sci-fi"])])
+    >>> [c.text for c in complete.complete("con")]
+    ['Contact', 'The Conjuring']
+    >>> conjuring.add_review(Review("m1", "ali", 5))
+    >>> complete.update_score(conjuring)
+    >>> [c.text for c in complete.complete("con")]
+    ['The Conjuring', 'Contact']
+    >>> complete.complete("ho", field="tag")
+    [Completion(text='horror', key='horror', score=1)]
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from title_index import normalize_title
+
+FIELDS = ("title", "creator", "tag")
+MAX_WORD_STARTS = 8     # a string is completable from its first 8 words
+_END = "\U0010ffff"     # sorts after every character a term can continue with
+
+
+class Completion(NamedTuple):
+    text: str           # as originally written
+    key: Hashable       # item_id for titles, the normalized name for creators and tags
+    score: float
+
+
+def review_count(item) -> float:
+    """Default item rank: number of reviews."""
+    count = getattr(item, "review_count", None)
+    return count() if callable(count) else len(getattr(item, "reviews", ()))
+
+
+def engagement_score(item) -> float:
+    """Item rank by engagement: calculate_engagement_score() where defined, else total stars."""
+    compute = getattr(item, "calculate_engagement_score", None)
+    if compute is not None:
+        return compute()
+    from leaderboards import total_stars
+    return total_stars(item)
+
+
+def word_starts(text: str) -> Tuple[str, ...]:
+    """The normalized text from each of its first MAX_WORD_STARTS word starts."""
+    norm = normalize_title(text)
+    if not norm:
+        return ()
+    starts = [0] + [i + 1 for i, ch in enumerate(norm) if ch == " "][:MAX_WORD_STARTS - 1]
+    return tuple(dict.fromkeys(norm[i:] for i in starts))
+
+
+class PrefixIndex:
+    """Ranked prefix completion over keyed strings.
+
+    Args:
+        cache_size (int): completions cached per popular prefix; requests for
+            more than this are answered by scanning
+        scan_limit (int): prefixes matching more entries than this are cached
+    """
+
+    def __init__(self, cache_size: int = 32, scan_limit: int = 64):
+        self.cache_size = cache_size
+        self.scan_limit = scan_limit
+        self._terms: List[str] = []
+        self._keys: List[Hashable] = []          # parallel to _terms
+        self._filed: Dict[Hashable, Tuple[str, ...]] = {}
+        self._texts: Dict[Hashable, str] = {}
+        self._scores: Dict[Hashable, float] = {}
+        self._top: Dict[str, List[Hashable]] = {}  # prefix -> best keys, best first
+
+    def __len__(self):
+        return len(self._filed)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._filed
+
+    def add(self, key: Hashable, text: str, score: float = 0.0):
+        """File text under key (replacing what key had before)."""
+        if key in self._filed:
+            self.remove(key)
+        terms = word_starts(text)
+        self._filed[key] = terms
+        self._texts[key] = text
+        self._scores[key] = score
+        for term in terms:
+            position = bisect_right(self._terms, term)
+            self._terms.insert(position, term)
+            self._keys.insert(position, key)
+        for prefix in self._cached_prefixes(terms):
+            self._offer(prefix, key)
+
+    def add_many(self, entries: Iterable[Tuple[Hashable, str, float]]):
+        """add() for many (key, text, score) entries with a single re-sort.
+
+        Inserting one by one shifts the arrays on every insert. That is
+        fine for a live update but quadratic for a bulk load.
+        """
+        batch = {key: (text, score) for key, text, score in entries}
+        for key in batch:
+            if key in self._filed:
+                self.remove(key)
+        pairs = list(zip(self._terms, self._keys))
+        for key, (text, score) in batch.items():
+            terms = word_starts(text)
+            self._filed[key] = terms
+            self._texts[key] = text
+            self._scores[key] = score
+            pairs.extend((term, key) for term in terms)
+        pairs.sort(key=lambda pair: pair[0])
+        self._terms = [term for term, _ in pairs]
+        self._keys = [key for _, key in pairs]
+        self._top.clear()
+
+    def remove(self, key: Hashable):
+        """Drop key; raises KeyError if it is not filed."""
+        terms = self._filed.pop(key)
+        for term in terms:
+            position = bisect_left(self._terms, term)
+            while self._keys[position] != key:
+                position += 1
+            del self._terms[position]
+            del self._keys[position]
+        for prefix in self._cached_prefixes(terms):
+            if key in self._top[prefix]:
+                # whatever ranked next is not known here; rebuild on the next request
+                del self._top[prefix]
+        del self._texts[key]
+        del self._scores[key]
+
+    def set_score(self, key: Hashable, score: float):
+        old = self._scores[key]
+        if score == old:
+            return
+        self._scores[key] = score
+        for prefix in self._cached_prefixes(self._filed[key]):
+            if score > old:
+                self._offer(prefix, key)
+            elif key in self._top[prefix]:
+                del self._top[prefix]
+
+    def score(self, key: Hashable) -> float:
+        return self._scores[key]
+
+    def complete(self, prefix: str, k: int = 10) -> List[Completion]:
+        """Top k entries with a word starting with prefix, best first."""
+        p = normalize_title(prefix)
+        if not p or k < 1:
+            return []
+        lo = bisect_left(self._terms, p)
+        hi = bisect_left(self._terms, p + _END, lo)
+        if hi - lo > self.scan_limit and k <= self.cache_size:
+            best = self._top.get(p)
+            if best is None:
+                best = self._top[p] = self._rank(set(self._keys[lo:hi]), self.cache_size)
+            best = best[:k]
+        else:
+            best = self._rank(set(self._keys[lo:hi]), k)
+        texts, scores = self._texts, self._scores
+        return [Completion(texts[key], key, scores[key]) for key in best]
+
+    def warm(self, depth: int = 2):
+        """Build the caches of every popular prefix up to depth characters now."""
+        prefixes = {term[:length] for term in self._terms for length in range(1, depth + 1)
+                    if len(term) >= length}
+        for prefix in sorted(prefixes):
+            self.complete(prefix, self.cache_size)
+
+    def _rank(self, keys: Iterable[Hashable], k: int) -> List[Hashable]:
+        texts, scores = self._texts, self._scores
+        return heapq.nsmallest(k, keys, key=lambda key: (-scores[key], texts[key]))
+
+    def _cached_prefixes(self, terms: Iterable[str]) -> List[str]:
+        top = self._top
+        if not top:
+            return []
+        return list(dict.fromkeys(term[:length] for term in terms for length in range(1, len(term) + 1)
+                                  if term[:length] in top))
+
+    def _offer(self, prefix: str, key: Hashable):
+        """Move key up the cached top of prefix after its score rose (or it was added)."""
+        best = self._top[prefix]
+        texts, scores = self._texts, self._scores
+        rank = (-scores[key], texts[key])
+        if key in best:
+            position = best.index(key)
+        elif len(best) < self.cache_size:
+            position = len(best)
+            best.append(key)
+        else:
+            last = best[-1]
+            if rank >= (-scores[last], texts[last]):
+                return  # does not make the cached top
+            position = len(best) - 1
+        # scores only rise here, so the key can only move towards the front
+        while position and rank < (-scores[best[position - 1]], texts[best[position - 1]]):
+            best[position] = best[position - 1]
+            position -= 1
+        best[position] = key
+
+
+class Autocomplete:
+    """Completion over the titles, creators and tags of a set of items.
+
+    Args:
+        score (callable): item -> rank; review_count by default
+        cache_size, scan_limit: see PrefixIndex
+    """
+
+    def __init__(self, score: Optional[Callable[[Any], float]] = None, cache_size: int = 32,
+                 scan_limit: int = 64):
+        self.score = score or review_count
+        self.indexes = {field: PrefixIndex(cache_size, scan_limit) for field in FIELDS}
+        self._items: Dict[Hashable, Any] = {}
+        # item_id -> (score, (creator key, text) or None, ((tag key, text), ...)) as last filed
+        self._filed: Dict[Hashable, Tuple[float, Any, Tuple[Tuple[str, str], ...]]] = {}
+        # creator/tag key -> number of items filed under it
+        self._members = {"creator": defaultdict(int), "tag": defaultdict(int)}
+
+    def __len__(self):
+        return len(self._items)
+
+    def complete(self, prefix: str, field: str = "title", k: int = 10) -> List[Completion]:
+        """Top k completions of prefix in one field ("title", "creator" or "tag")."""
+        try:
+            index = self.indexes[field]
+        except KeyError:
+            raise ValueError(f"field must be one of {FIELDS}") from None
+        return index.complete(prefix, k)
+
+    def complete_all(self, prefix: str, k: int = 5) -> Dict[str, List[Completion]]:
+        """Top k completions of prefix in every field, e.g. for a grouped search box."""
+        return {field: index.complete(prefix, k) for field, index in self.indexes.items()}
+
+    def add_item(self, item):
+        item_id = item.item_id
+        if item_id in self._items:
+            raise ValueError(f"item_id {item_id!r} is already indexed")
+        self._items[item_id] = item
+        score = self.score(item)
+        self.indexes["title"].add(item_id, item.title, score)
+        creator, tags = _creator_key(item), _tag_keys(item)
+        self._filed[item_id] = (score, creator, tags)
+        for field, keys in (("creator", (creator,) if creator else ()), ("tag", tags)):
+            for key, text in keys:
+                self._join(field, key, text, score)
+
+    def add_items(self, items: Iterable[Any]):
+        """add_item() for many items, with one re-sort per field."""
+        titles = []
+        groups = {"creator": {}, "tag": {}}
+        for item in items:
+            item_id = item.item_id
+            if item_id in self._items:
+                raise ValueError(f"item_id {item_id!r} is already indexed")
+            self._items[item_id] = item
+            score = self.score(item)
+            titles.append((item_id, item.title, score))
+            creator, tags = _creator_key(item), _tag_keys(item)
+            self._filed[item_id] = (score, creator, tags)
+            for field, keys in (("creator", (creator,) if creator else ()), ("tag", tags)):
+                members, group = self._members[field], groups[field]
+                for key, text in keys:
+                    members[key] += 1
+                    if key in self.indexes[field]:
+                        self.indexes[field].set_score(key, self.indexes[field].score(key) + score)
+                    else:
+                        entry = group.get(key)
+                        group[key] = (text, score + (entry[1] if entry else 0))
+        self.indexes["title"].add_many(titles)
+        for field, group in groups.items():
+            self.indexes[field].add_many((key, text, score) for key, (text, score) in group.items())
+
+    def update_item(self, item):
+        """Re-read an item's title, creator, tags and score after it changed."""
+        self.remove_item(item.item_id)
+        self.add_item(item)
+
+    def update_score(self, item):
+        """Re-rank an item (and its creator and tags) after its reviews changed."""
+        score = self.score(item)
+        old, creator, tags = self._filed[item.item_id]
+        if score == old:
+            return
+        self._filed[item.item_id] = (score, creator, tags)
+        self.indexes["title"].set_score(item.item_id, score)
+        for field, keys in (("creator", (creator,) if creator else ()), ("tag", tags)):
+            index = self.indexes[field]
+            for key, _ in keys:
+                index.set_score(key, index.score(key) + score - old)
+
+    def remove_item(self, item_id: Hashable):
+        del self._items[item_id]
+        score, creator, tags = self._filed.pop(item_id)
+        self.indexes["title"].remove(item_id)
+        for field, keys in (("creator", (creator,) if creator else ()), ("tag", tags)):
+            index, members = self.indexes[field], self._members[field]
+            for key, _ in keys:
+                members[key] -= 1
+                if members[key]:
+                    index.set_score(key, index.score(key) - score)
+                else:
+                    del members[key]
+                    index.remove(key)
+
+    def _join(self, field: str, key: str, text: str, score: float):
+        index, members = self.indexes[field], self._members[field]
+        members[key] += 1
+        if key in index:
+            index.set_score(key, index.score(key) + score)
+        else:
+            index.add(key, text, score)
+
+    # ------------------------------------------------------------------
+    # catalog listener hooks (see Catalog.subscribe)
+
+    def on_add_item(self, item):
+        self.add_item(item)
+
+    def on_add_items(self, items):
+        self.add_items(items)
+
+    def on_remove_item(self, item):
+        self.remove_item(item.item_id)
+
+    def on_add_tag(self, item, tag):
+        self.update_item(item)
+
+    def on_add_review(self, item, review):
+        self.update_score(item)
+
+    def on_refresh_item(self, item):
+        self.update_item(item)
+
+
+def _creator_key(item) -> Optional[Tuple[str, str]]:
+    creator = getattr(item, "creator", None)
+    if creator is None:
+        metadata = getattr(item, "metadata", None) or {}
+        creator = metadata.get("creator")
+    if not creator:
+        return None
+    key = normalize_title(str(creator))
+    return (key, str(creator)) if key else None
+
+
+def _tag_keys(item) -> Tuple[Tuple[str, str], ...]:
+    keyed = {}
+    for tag in getattr(item, "tags", ()) or ():
+        key = normalize_title(str(tag))
+        if key:
+            keyed.setdefault(key, str(tag))
+    return tuple(keyed.items())
@@ -4,10 +4,105 @@ Abstract base classes for the Media Review Library
 This module defines the abstract interfaces that all concrete media item
 and review classes must implement.
 """
+import functools
+import heapq
+import threading
 from abc import ABC, abstractmethod
+from collections import deque
 
+from views import ItemsView, OrderIndex, SortedIndex
 
-class AbstractMediaItem(ABC):
+
+def memoized_engagement(compute):
+    """Cache an engagement score method until the item's reviews change.
+
+    The cache is keyed on the item's review version, which
+    invalidate_engagement() bumps (add_review, edit_review and remove_review
+    call it), so replacing or editing a review always forces a recompute.
+    The number of reviews is part of the key as well, to catch reviews
+    appended to the list behind the item's back.
+
+    Args:
+        compute (callable): Method computing the score from scratch
+
+    Returns:
+        callable: Memoizing replacement for the method
+    """
+    @functools.wraps(compute)
+    def score(self):
+        key = (getattr(self, "_review_version", 0), len(self.reviews))
+        cached = getattr(self, "_engagement_cache", None)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        value = compute(self)
+        self._engagement_cache = (key, value)
+        return value
+    score.memoized = True
+    return score
+
+
+def rank_by_engagement(items, k):
+    """Return the k items with the highest engagement score, best first.
+
+    Uses a heap of size k over the cached scores, so ranking n items costs
+    O(n log k) and only items whose reviews changed are rescored.
+
+    Args:
+        items (iterable): Media items
+        k (int): Number of items to return
+
+    Returns:
+        list: (item, score) pairs, highest score first
+    """
+    scored = ((item.calculate_engagement_score(), position, item) for position, item in enumerate(items))
+    # position breaks ties so items themselves are never compared
+    return [(item, score) for score, _, item in heapq.nlargest(k, scored, key=lambda entry: (entry[0], -entry[1]))]
+
+
+class EngagementMixin:
+    """Review editing and engagement-score memoization for media items.
+
+    Shared by the AbstractMediaItem classes in this module and in
+    media_items. Expects a ``reviews`` list on the instance.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        """Memoize calculate_engagement_score in every concrete subclass."""
+        super().__init_subclass__(**kwargs)
+        compute = cls.__dict__.get("calculate_engagement_score")
+        if compute is not None and not getattr(compute, "__isabstractmethod__", False) \
+                and not getattr(compute, "memoized", False):
+            cls.calculate_engagement_score = memoized_engagement(compute)
+
+    def edit_review(self, review, **changes):
+        """Update attributes of one of this item's reviews.
+
+        Args:
+            review: Review object previously added to this item
+            **changes: Attribute names and their new values (e.g. rating=4)
+        """
+        if not any(r is review for r in self.reviews):
+            raise ValueError("review does not belong to this item")
+        for name, value in changes.items():
+            setattr(review, name, value)
+        self.invalidate_engagement()
+
+    def remove_review(self, review):
+        """Remove a review from this media item.
+
+        Args:
+            review: Review object to remove
+        """
+        self.reviews.remove(review)
+        self.invalidate_engagement()
+
+    def invalidate_engagement(self):
+        """Mark the cached engagement score as stale."""
+        self._review_version = getattr(self, "_review_version", 0) + 1
+        self._engagement_cache = None
+
+
+class AbstractMediaItem(EngagementMixin, ABC):
     """Abstract base class for all media items.
     
     This class defines the interface that all media item types must implement,
@@ -30,6 +125,8 @@ class AbstractMediaItem(ABC):
         self.genre = genre
         self.release_year = release_year
         self.reviews = []
+        self._review_version = 0
+        self._engagement_cache = None
         
     @abstractmethod
     def get_media_type(self):
@@ -61,6 +158,9 @@ class AbstractMediaItem(ABC):
     @abstractmethod
     def calculate_engagement_score(self):
         """Calculate a media-specific engagement score.
+
+        Subclass implementations are memoized automatically; the cached
+        score is reused until the item's reviews change.
         
         Returns:
             float: Engagement score based on format-specific criteria
@@ -74,6 +174,7 @@ class AbstractMediaItem(ABC):
             review: Review object to associate with this media item
         """
         self.reviews.append(review)
+        self.invalidate_engagement()
     
     def __str__(self):
         """String representation of the media item."""
@@ -86,7 +187,21 @@ class AbstractReviewContainer(ABC):
     Defines the interface that any class holding collections of media items
     and their reviews must implement to ensure polymorphic behavior across
     different container types.
+
+    Entries are kept in insertion order with a hash index from each item's
+    key (its item_id) to its entries, so membership, add and remove are O(1).
+    Sorted orders named in SORT_KEYS (or added with register_sort_key) are
+    maintained on every add/remove once first requested, so a sorted page
+    costs O(page size).
     """
+
+    # name -> key function for view(sort_by=...)
+    SORT_KEYS = {
+        "title": lambda item: str(getattr(item, "title", "")).casefold(),
+        "creator": lambda item: str(getattr(item, "creator", "")).casefold(),
+        "genre": lambda item: str(getattr(item, "genre", "")).casefold(),
+        "release_year": lambda item: getattr(item, "release_year", None),
+    }
     
     def __init__(self, container_id, name, description=None):
         """Initialize a review container.
@@ -99,7 +214,11 @@ class AbstractReviewContainer(ABC):
         self.container_id = container_id
         self.name = name
         self.description = description
-        self.media_items = []
+        self._entries = OrderIndex()   # entry sequence number -> item, in insertion order
+        self._slots = {}               # item key -> deque of its entries' sequence numbers
+        self._sort_keys = dict(self.SORT_KEYS)
+        self._sorted = {}              # sort name -> SortedIndex of (key, sequence number)
+        self._lock = threading.RLock() # held by every mutation; subclasses may hold it around a check-then-add
         
     @abstractmethod
     def add_item(self, media_item):
@@ -124,7 +243,7 @@ class AbstractReviewContainer(ABC):
         """Return all media items in this container.
         
         Returns:
-            list: List of media item objects
+            Sequence: Media item objects in insertion order
         """
         pass
     
@@ -136,6 +255,127 @@ class AbstractReviewContainer(ABC):
             str: Description of the container type
         """
         pass
+
+    @property
+    def media_items(self):
+        """list: Items in insertion order (a fresh list, duplicates included)."""
+        return list(self._entries)
+
+    def view(self, sort_by=None, descending=False):
+        """Return a lazy view of the entries.
+
+        Args:
+            sort_by (str, optional): Name of a sort key; insertion order if omitted
+            descending (bool): Reverse the sort order
+
+        Returns:
+            ItemsView: Sliceable sequence with page(cursor, size) for keyset paging
+        """
+        if sort_by is None:
+            if descending:
+                raise ValueError("descending needs a sort_by key")
+            return ItemsView.over_order(self._entries)
+        return ItemsView.over_sorted(self._sort_index(sort_by), self._entries.get, reverse=descending)
+
+    def register_sort_key(self, name, key):
+        """Add a named sort order for view(sort_by=name).
+
+        Args:
+            name (str): Name used with view()
+            key (callable): Function from a media item to a comparable key
+        """
+        self._sort_keys[name] = key
+        self._sorted.pop(name, None)
+
+    def resort(self, media_item):
+        """Re-file an item in the sorted orders after its key values changed.
+
+        Args:
+            media_item: Media item object already in the container
+        """
+        for seq in self._slots.get(self._item_key(media_item), ()):
+            for name, index in self._sorted.items():
+                index.add(seq, self._sort_value(name, self._entries.get(seq)))
+
+    def __len__(self):
+        """Number of entries, counting duplicates."""
+        return len(self._entries)
+
+    def __contains__(self, media_item):
+        """Whether an item with the same key is in the container (O(1))."""
+        return self._item_key(media_item) in self._slots
+
+    def __iter__(self):
+        """Iterate over the entries in insertion order."""
+        return iter(self._entries)
+
+    def count(self, media_item):
+        """Return how many times an item appears in the container.
+
+        Args:
+            media_item: Media item object to count
+
+        Returns:
+            int: Number of entries with the item's key
+        """
+        return len(self._slots.get(self._item_key(media_item), ()))
+
+    def item_at(self, index):
+        """Return the entry at a position in insertion order.
+
+        Args:
+            index (int): Position, negative values count from the end
+
+        Returns:
+            The media item at that position
+        """
+        return self._entries.get(self._entries.seq_at(index))
+
+    @staticmethod
+    def _item_key(media_item):
+        """Hash key of an item: its item_id, or its identity if it has none."""
+        item_id = getattr(media_item, "item_id", None)
+        return ("id", item_id) if item_id is not None else ("obj", id(media_item))
+
+    def _append_entry(self, media_item):
+        with self._lock:
+            seq = self._entries.append(media_item)
+            self._slots.setdefault(self._item_key(media_item), deque()).append(seq)
+            for name, index in self._sorted.items():
+                index.add(seq, self._sort_value(name, media_item))
+
+    def _remove_first_entry(self, media_item):
+        """Remove the earliest entry with the item's key; return whether one existed."""
+        key = self._item_key(media_item)
+        with self._lock:
+            slots = self._slots.get(key)
+            if not slots:
+                return False
+            seq = slots.popleft()
+            if not slots:
+                del self._slots[key]
+            self._entries.remove(seq)
+            for index in self._sorted.values():
+                index.remove(seq)
+            return True
+
+    def _sort_index(self, name):
+        with self._lock:
+            index = self._sorted.get(name)
+            if index is None:
+                if name not in self._sort_keys:
+                    raise KeyError(f"unknown sort key {name!r}; choose from {sorted(self._sort_keys)}")
+                # built once on first use, then maintained by add/remove
+                index = SortedIndex()
+                for seq, media_item in self._entries.items():
+                    index.add(seq, self._sort_value(name, media_item))
+                self._sorted[name] = index
+            return index
+
+    def _sort_value(self, name, media_item):
+        value = self._sort_keys[name](media_item)
+        # missing values sort last instead of failing to compare
+        return (value is None, value)
     
     def __str__(self):
         """String representation of the container."""
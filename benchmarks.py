@@ -0,0 +1,456 @@
+"""
+Benchmark harness for the review system's hot paths.
+
+Generates a synthetic catalog and review set at a chosen scale, times each
+hot path and writes the results as JSON. Each result has latency
+percentiles, throughput and peak traced memory. Given a baseline file from
+an earlier run, it flags every benchmark whose median latency regressed by
+more than the tolerance and exits with status 1.
+
+Usage:
+    python benchmarks.py --scale 100000 --out bench.json
+    python benchmarks.py --scale 100000 --baseline bench.json --tolerance 0.25
+    python benchmarks.py --list
+    python benchmarks.py --only add_review,search
+    python benchmarks.py --only startup
+
+--scale is the number of reviews. Items are scale // 20, with at least 10.
+Container benchmarks cap their size with --container-cap, because the
+baseline list-backed containers are quadratic.
+
+The notebook's functions take a list of review dicts and are not
+importable from this package, so "analytics" times their replacements in
+analytics.py, and "search" times the ReviewIndex that replaces
+search_review_keyword. The analytics stand-ins are:
+
+    top_k_by_count, rows_of_most_reviewed   get_most_reviewed_items
+    group_rows_by (by genre)                categorize_reviews_by_genre
+    rating_buckets                          categorize_reviews_by_rating
+    item_stats (mean of every item)         calc_avg
+
+The "startup" benchmark times `import review_system` in fresh interpreters
+with -X importtime. Its median must stay under STARTUP_BUDGET_MS or the run
+exits with status 1, with or without a baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from analytics import (ReviewColumns, group_rows_by, item_stats, rating_buckets,
+                       rows_of_most_reviewed, top_k_by_count)
+from autocomplete import Autocomplete
+from binary_snapshot import Snapshot, write_snapshot
+from concurrent_store import ConcurrentReviewStore
+from containers import FavoritesContainer, WatchlistContainer
+from data_import import StreamingImporter
+from leaderboards import Leaderboards
+from media_items import Book
+from media_system import MediaItem, Review
+from persistence import item_to_record
+from review_search import ReviewIndex
+from review_store import ReviewStore
+from title_index import TitleIndex
+
+GENRES = ["Horror", "Action", "Thriller", "Drama", "Comedy", "Sci-Fi", "Family", "Romance"]
+WORDS = ("terrifying well directed high energy intense action dark clever suspenseful creepy "
+         "atmosphere great scares chills amazing plot twist heartwarming funny slow boring "
+         "masterpiece long acting soundtrack visuals story ending characters").split()
+
+_BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark.
+
+    The function receives a Workload. It returns a list of per-operation
+    latencies in seconds, or a (latencies, ops_per_latency) tuple when
+    each timed sample covers several operations.
+    """
+    def register(func):
+        _BENCHMARKS[name] = func
+        return func
+    return register
+
+
+class Workload:
+    """Synthetic data shared by the benchmarks of one run."""
+
+    def __init__(self, scale: int, seed: int = 326, container_cap: int = 20_000, repeats: int = 5,
+                 threads: int = 16):
+        self.scale = scale
+        self.threads = threads
+        self.n_items = max(10, scale // 20)
+        self.container_cap = container_cap
+        self.repeats = repeats
+        self.rng = random.Random(seed)
+        rng = self.rng
+        self.items = [MediaItem(f"m{i}", f"Title {i}", "movie",
+                                tags=rng.sample(WORDS, 3),
+                                metadata={"genre": rng.choice(GENRES), "year": rng.randint(1950, 2025)})
+                      for i in range(self.n_items)]
+        self.reviews = [Review(f"m{rng.randrange(self.n_items)}", f"user{rng.randrange(max(1, scale // 5))}",
+                               rng.randint(1, 5), " ".join(rng.choices(WORDS, k=rng.randint(4, 16))))
+                        for _ in range(scale)]
+
+    def fresh_items(self) -> List[MediaItem]:
+        return [MediaItem(m.item_id, m.title, "movie", tags=m.tags, metadata=m.metadata) for m in self.items]
+
+
+def _timed(op, *args) -> float:
+    start = time.perf_counter()
+    op(*args)
+    return time.perf_counter() - start
+
+
+# ----------------------------------------------------------------------
+# benchmarks
+
+@benchmark("add_review")
+def bench_add_review(w: Workload):
+    items = {m.item_id: m for m in w.fresh_items()}
+    timings = []
+    clock = time.perf_counter
+    for review in w.reviews:
+        item = items[review.media_item_id]
+        start = clock()
+        item.add_review(review)
+        timings.append(clock() - start)
+    w.loaded_items = list(items.values())
+    return timings
+
+
+@benchmark("average_rating")
+def bench_average_rating(w: Workload):
+    items = getattr(w, "loaded_items", None)
+    if items is None:
+        bench_add_review(w)
+        items = w.loaded_items
+    clock = time.perf_counter
+    timings = []
+    for item in items:
+        start = clock()
+        item.average_rating()
+        timings.append(clock() - start)
+    return timings
+
+
+@benchmark("container_add_remove")
+def bench_containers(w: Workload):
+    books = [Book(f"b{i}", f"Book {i}", "Author", "Genre", 2000) for i in range(min(w.scale, w.container_cap))]
+    timings = []
+    for container in (FavoritesContainer("c1", "Favorites"), WatchlistContainer("c2", "Watchlist")):
+        for book in books:
+            timings.append(_timed(container.add_item, book))
+        for book in books:
+            timings.append(_timed(container.remove_item, book))
+    return timings
+
+
+@benchmark("search")
+def bench_search(w: Workload):
+    index = ReviewIndex()
+    for row, review in enumerate(w.reviews):
+        index.add(row, "", review.comment, review.stars)
+    rng = random.Random(1)
+    queries = [rng.choice(WORDS) for _ in range(100)]
+    queries += [rng.choice(WORDS)[:3] + "*" for _ in range(50)]
+    queries += ['"%s %s"' % tuple(rng.sample(WORDS, 2)) for _ in range(50)]
+    return [_timed(index.search, q) for q in queries]
+
+
+@benchmark("title_lookup")
+def bench_title_lookup(w: Workload):
+    index = TitleIndex()
+    for m in w.items:
+        index.add(m.item_id, f"{m.tags[0]} {m.title} {m.tags[1]}")
+    rng = random.Random(2)
+    queries = []
+    for m in rng.sample(w.items, min(200, len(w.items))):
+        title = f"{m.tags[0]} {m.title} {m.tags[1]}"
+        queries.append(title.upper() + " ")
+        typo = rng.randrange(len(title))
+        queries.append(title[:typo] + title[typo + 1:])
+    timings = [_timed(index.lookup, q) for q in queries[::2]]
+    timings += [_timed(index.search, q, 5) for q in queries[1::2]]
+    return timings
+
+
+@benchmark("autocomplete")
+def bench_autocomplete(w: Workload):
+    complete = Autocomplete()
+    complete.add_items(w.items)
+    rng = random.Random(3)
+    sample = rng.sample(w.items, min(200, len(w.items)))
+    titles = [m.title[:rng.randint(1, 8)] for m in sample]
+    tags = [m.tags[0][:rng.randint(1, 3)] for m in sample]
+    complete.indexes["title"].warm()
+    timings = [_timed(complete.complete, prefix) for prefix in titles]
+    timings += [_timed(complete.complete, prefix, "tag") for prefix in tags]
+    return timings
+
+
+@benchmark("export_import")
+def bench_export_import(w: Workload):
+    items = getattr(w, "loaded_items", None) or w.fresh_items()
+    directory = tempfile.mkdtemp(prefix="bench-")
+    path = os.path.join(directory, "items.jsonl")
+    timings = []
+    try:
+        for _ in range(w.repeats):
+            def export():
+                with open(path, "w", encoding="utf-8") as f:
+                    for item in items:
+                        record = item_to_record(item)
+                        del record["reviews"]
+                        f.write(json.dumps(record) + "\n")
+            timings.append(_timed(export))
+
+            def load():
+                for _ in StreamingImporter().import_file(path):
+                    pass
+            timings.append(_timed(load))
+    finally:
+        shutil.rmtree(directory)
+    return timings, len(items)
+
+
+@benchmark("snapshot_open")
+def bench_snapshot_open(w: Workload):
+    items = getattr(w, "loaded_items", None) or w.fresh_items()
+    directory = tempfile.mkdtemp(prefix="bench-")
+    path = os.path.join(directory, "library.snap")
+    rng = random.Random(4)
+    timings = []
+    try:
+        write_snapshot(path, items)
+        for _ in range(w.repeats):
+            # opening only maps the file; each first get() decodes one item and its reviews
+            start = time.perf_counter()
+            snapshot = Snapshot(path)
+            timings.append(time.perf_counter() - start)
+            for item in rng.sample(items, min(100, len(items))):
+                timings.append(_timed(snapshot.get, item.item_id))
+            snapshot.close()
+    finally:
+        shutil.rmtree(directory)
+    return timings
+
+
+@benchmark("analytics")
+def bench_analytics(w: Workload):
+    store = ReviewStore()
+    store.extend(w.reviews)
+    cols = ReviewColumns.from_store(store)
+    genres = {m.item_id: m.metadata["genre"] for m in w.items}
+    timings = []
+    for _ in range(w.repeats):
+        # get_most_reviewed_items
+        timings.append(_timed(top_k_by_count, cols, 10))
+        timings.append(_timed(rows_of_most_reviewed, cols))
+        # categorize_reviews_by_genre, categorize_reviews_by_rating, calc_avg
+        timings.append(_timed(group_rows_by, cols, genres))
+        timings.append(_timed(rating_buckets, cols))
+        timings.append(_timed(item_stats, cols))
+    return timings
+
+
+@benchmark("concurrent_add_review")
+def bench_concurrent_add_review(w: Workload):
+    store = ConcurrentReviewStore()
+    for item in w.fresh_items():
+        store.add_item(item)
+    shards = [w.reviews[n::w.threads] for n in range(w.threads)]
+    timings: List[List[float]] = [[] for _ in shards]
+    start = threading.Barrier(len(shards))
+
+    def write(n):
+        clock = time.perf_counter
+        out = timings[n]
+        add = store.add_review
+        start.wait()
+        for review in shards[n]:
+            begin = clock()
+            add(review)
+            out.append(clock() - begin)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(len(shards))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [t for per_thread in timings for t in per_thread]
+
+
+@benchmark("leaderboard")
+def bench_leaderboard(w: Workload):
+    items = {m.item_id: m for m in w.fresh_items()}
+    boards = Leaderboards()
+    for item in items.values():
+        boards.add_item(item)
+    timings = []
+    for review in w.reviews:
+        item = items[review.media_item_id]
+        item.add_review(review)
+        timings.append(_timed(boards.update, item))
+    for genre in GENRES:
+        timings.append(_timed(boards.top, "top_rated", 10, genre))
+    return timings
+
+
+STARTUP_BUDGET_MS = 15.0  # cumulative -X importtime of `import review_system`
+
+
+def import_profile(statement: str = "import review_system") -> Dict[str, Tuple[int, int]]:
+    """Run statement in a fresh interpreter under -X importtime.
+
+    Returns:
+        {module: (self_us, cumulative_us)} for every module it imported
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True,
+                          text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(own), int(cumulative))
+    return profile
+
+
+@benchmark("startup")
+def bench_startup(w: Workload):
+    # the interpreter's own startup is excluded: only the cost of our import counts
+    return [import_profile()["review_system"][1] / 1e6 for _ in range(max(3, w.repeats))]
+
+
+# ----------------------------------------------------------------------
+# running and reporting
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * pct / 100
+    low = int(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+
+def summarize(timings: List[float], ops_per_sample: int = 1) -> Dict[str, float]:
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        "samples": len(ordered),
+        "total_s": total,
+        "mean_s": statistics.fmean(ordered) if ordered else 0.0,
+        "p50_s": _percentile(ordered, 50),
+        "p95_s": _percentile(ordered, 95),
+        "p99_s": _percentile(ordered, 99),
+        "max_s": ordered[-1] if ordered else 0.0,
+        "ops_per_s": (len(ordered) * ops_per_sample / total) if total else None,
+    }
+
+
+def run_one(name: str, workload: Workload, measure_memory: bool = True) -> Dict[str, float]:
+    func = _BENCHMARKS[name]
+    outcome = func(workload)
+    timings, per_sample = outcome if isinstance(outcome, tuple) else (outcome, 1)
+    result = summarize(timings, per_sample)
+    if measure_memory:
+        # a second, untimed pass: tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        try:
+            func(workload)
+            result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Return a message for every benchmark whose p50 regressed beyond tolerance."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("p50_s"):
+            continue
+        ratio = result["p50_s"] / base["p50_s"]
+        result["p50_vs_baseline"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: p50 {result['p50_s'] * 1e6:.2f}us vs baseline "
+                               f"{base['p50_s'] * 1e6:.2f}us ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the media review system's hot paths.")
+    parser.add_argument("--scale", type=int, default=10_000, help="number of synthetic reviews (1k-10M)")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--out", help="write JSON results here")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown (0.25 = 25%%)")
+    parser.add_argument("--container-cap", type=int, default=20_000)
+    parser.add_argument("--repeats", type=int, default=5, help="repetitions of whole-batch benchmarks")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak-memory pass")
+    parser.add_argument("--threads", type=int, default=16, help="writer threads for concurrent benchmarks")
+    parser.add_argument("--seed", type=int, default=326)
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(_BENCHMARKS))
+        return 0
+    names = args.only.split(",") if args.only else list(_BENCHMARKS)
+    unknown = [n for n in names if n not in _BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    workload = Workload(args.scale, args.seed, args.container_cap, args.repeats, args.threads)
+    results = {}
+    for name in names:
+        results[name] = run_one(name, workload, measure_memory=not args.no_memory)
+        r = results[name]
+        print(f"{name:<22} p50 {r['p50_s'] * 1e6:10.2f}us  p99 {r['p99_s'] * 1e6:10.2f}us  "
+              f"total {r['total_s']:8.3f}s  peak {r.get('peak_memory_bytes', 0) / 2**20:8.1f}MiB")
+
+    report = {
+        "scale": args.scale,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    status = 0
+    if "startup" in results and results["startup"]["p50_s"] * 1e3 > STARTUP_BUDGET_MS:
+        print(f"OVER BUDGET startup p50 {results['startup']['p50_s'] * 1e3:.2f}ms > {STARTUP_BUDGET_MS}ms",
+              file=sys.stderr)
+        status = 1
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"warning: baseline scale {baseline.get('scale')} differs from {args.scale}", file=sys.stderr)
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        report["regressions"] = regressions
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        status = 1 if regressions else status
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
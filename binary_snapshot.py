@@ -0,0 +1,371 @@
+"""
+Memory-mapped binary snapshots of the media library.
+
+The JSON snapshot (persistence.py, data_persistence.md) has to be parsed
+in full at startup. Every MediaItem and Review is built before the first
+lookup can run. A binary snapshot is laid out so that it can be used in
+place instead:
+
+    header          magic, format version, counts, a table of section
+                    (offset, length) pairs and a CRC-32 of the body
+    items           one fixed-width record per item: six uint32 fields
+                    (id, title, media_type, metadata JSON, first tag, tag count)
+    tags            uint32 string ids, the tags of each item in a run
+    id_order        uint32 item numbers sorted by item_id (binary search)
+    review_offsets  uint64, item i's reviews are rows [off[i], off[i + 1])
+    review_users    uint32 string id per review
+    review_stars    uint16 rating in hundredths of a star per review
+    review_flags    uint8 per review; bit 0 marks a comment of None
+    comment_ends    uint64 end offset of each review's comment
+    string_ends     uint64 end offset of each interned string
+    strings         UTF-8 string heap (ids, titles, users, tags, ...)
+    comments        UTF-8 comment heap
+
+All integers are little-endian and every section starts on an 8-byte
+boundary. Snapshot() maps the file read-only and only checks the header,
+so opening costs the same for ten reviews as for ten million. An item and
+its reviews are decoded the first time they are asked for. Ratings are
+served as memoryview slices of the mapped stars column, which copies
+nothing. The mapping is a read-only view of the file, so every process
+that opens the same snapshot shares one copy in the OS page cache.
+
+Snapshots are immutable: change the library through a Catalog or
+LibraryStore and write a new snapshot. write_snapshot() replaces the file
+atomically, and readers that already have it open keep the old mapping.
+
+Example:
+    >>> write_snapshot("library.snap", catalog)            # doctest: +SKIP
+    >>> with Snapshot("library.snap") as snap:             # doctest: +SKIP
+    ...     snap.get("m1").title, snap.average_rating("m1")
+    ('Dune', 4.5)
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from catalog import Catalog
+from media_system import MediaItem, Review
+from persistence import StoreError
+from review_store import STARS_SCALE, _numpy, _unscale
+
+
+FORMAT_VERSION = 1
+_MAGIC = b"MRLSNAP\x00"
+_SECTIONS = ("items", "tags", "id_order", "review_offsets", "review_users", "review_stars",
+             "review_flags", "comment_ends", "string_ends", "strings", "comments")
+# magic, version, section count, items, reviews, strings, body crc32
+_HEADER = struct.Struct("<8sIIQQQI")
+_SECTION = struct.Struct("<QQ")
+_BODY_START = _HEADER.size + _SECTION.size * len(_SECTIONS)
+_ITEM_FIELDS = 6
+_NO_COMMENT = 1
+_LITTLE = sys.byteorder == "little"
+
+
+class _StringTable:
+    """Interns strings into one UTF-8 heap with an end-offset index."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.heap = bytearray()
+        self.ends = array("Q")
+
+    def add(self, text: str) -> int:
+        code = self.ids.get(text)
+        if code is None:
+            code = self.ids[text] = len(self.ends)
+            self.heap += text.encode("utf-8")
+            self.ends.append(len(self.heap))
+        return code
+
+
+def _little_endian(column):
+    if _LITTLE or not isinstance(column, array):
+        return column
+    swapped = array(column.typecode, column)
+    swapped.byteswap()
+    return swapped
+
+
+def write_snapshot(path: str, items: Iterable[MediaItem]) -> int:
+    """Write items (a Catalog or any iterable of MediaItems) as a binary snapshot.
+
+    The file is written next to path, fsync'ed and renamed over it, so a
+    reader never sees a partial snapshot. Returns the number of items written.
+    """
+    strings = _StringTable()
+    records, tags, item_ids = array("I"), array("I"), []
+    offsets, users, stars, flags, comment_ends = array("Q", [0]), array("I"), array("H"), array("B"), array("Q")
+    comments = bytearray()
+    for item in items:
+        item_tags = item.tags
+        item_ids.append(item.item_id)
+        records.extend((strings.add(item.item_id), strings.add(item.title), strings.add(item.media_type),
+                        strings.add(json.dumps(item.metadata, separators=(",", ":"), ensure_ascii=False)),
+                        len(tags), len(item_tags)))
+        tags.extend(strings.add(tag) for tag in item_tags)
+        for review in item.reviews:
+            users.append(strings.add(review.user))
+            stars.append(round(review.stars * STARS_SCALE))
+            flags.append(_NO_COMMENT if review.comment is None else 0)
+            if review.comment:
+                comments += review.comment.encode("utf-8")
+            comment_ends.append(len(comments))
+        offsets.append(len(users))
+    order = array("I", sorted(range(len(item_ids)), key=item_ids.__getitem__))
+    for a, b in zip(order, order[1:]):
+        if item_ids[a] == item_ids[b]:
+            raise ValueError(f"duplicate item_id {item_ids[a]!r}")
+
+    columns = (records, tags, order, offsets, users, stars, flags, comment_ends, strings.ends, strings.heap,
+               comments)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(bytes(_BODY_START))        # the header is filled in once the sections are placed
+        position, crc, table = _BODY_START, 0, []
+        for column in columns:
+            padding = bytes(-position % 8)
+            data = memoryview(_little_endian(column)).cast("B")
+            crc = zlib.crc32(data, zlib.crc32(padding, crc))
+            f.write(padding)
+            f.write(data)
+            table.append((position + len(padding), len(data)))
+            position += len(padding) + len(data)
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, len(_SECTIONS), len(item_ids), len(users),
+                             len(strings.ends), crc))
+        for offset, length in table:
+            f.write(_SECTION.pack(offset, length))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(item_ids)
+
+
+class Snapshot:
+    """Read-only, lazily decoded view of a binary snapshot file.
+
+    Args:
+        path (str): file written by write_snapshot()
+
+    Raises:
+        StoreError: if the file is not a snapshot, has an unsupported
+            version or is truncated (see verify() for a full checksum)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _BODY_START:
+                raise StoreError(f"{path} is too short to be a snapshot")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._map)
+        magic, version, sections, items, reviews, strings, self._crc = _HEADER.unpack_from(self._buffer)
+        if magic != _MAGIC:
+            self.close()
+            raise StoreError(f"{path} is not a binary snapshot")
+        if version != FORMAT_VERSION or sections != len(_SECTIONS):
+            self.close()
+            raise StoreError(f"{path} has unsupported snapshot version {version}")
+        self.version = version
+        self.review_count = reviews
+        self._table = [_SECTION.unpack_from(self._buffer, _HEADER.size + i * _SECTION.size)
+                       for i in range(sections)]
+        if any(offset < _BODY_START or offset + length > size for offset, length in self._table):
+            self.close()
+            raise StoreError(f"{path} is truncated")
+        try:
+            self._records = self._column("items", "I", items * _ITEM_FIELDS)
+            self._order = self._column("id_order", "I", items)
+            self._offsets = self._column("review_offsets", "Q", items + 1)
+            self._users = self._column("review_users", "I", reviews)
+            self._stars = self._column("review_stars", "H", reviews)
+            self._flags = self._column("review_flags", "B", reviews)
+            self._comment_ends = self._column("comment_ends", "Q", reviews)
+            self._string_ends = self._column("string_ends", "Q", strings)
+            self._tags = self._column("tags", "I")
+            self._strings = self._column("strings", "B")
+            self._comments = self._column("comments", "B")
+        except StoreError:
+            self.close()
+            raise
+        self._items: Dict[int, MediaItem] = {}   # decoded so far, by position in the file
+
+    # ------------------------------------------------------------------
+    # items
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, item_id: str) -> bool:
+        return self._find(item_id) is not None
+
+    def __iter__(self) -> Iterator[MediaItem]:
+        """Decode and yield every item, in the order they were written."""
+        return (self._item(i) for i in range(len(self._order)))
+
+    def item_ids(self) -> Iterator[str]:
+        """Yield every item_id in the order written, without decoding the items."""
+        records = self._records
+        return (self._string(records[i * _ITEM_FIELDS]) for i in range(len(self._order)))
+
+    def get(self, item_id: str) -> Optional[MediaItem]:
+        """Return the item with its reviews, decoding it on first access; None if absent."""
+        position = self._find(item_id)
+        return None if position is None else self._item(position)
+
+    def load_catalog(self, catalog: Optional[Catalog] = None) -> Catalog:
+        """Decode every item into catalog (a new Catalog by default) and return it."""
+        catalog = catalog if catalog is not None else Catalog()
+        for item in self:
+            catalog.add_item(item)
+        return catalog
+
+    # ------------------------------------------------------------------
+    # ratings, straight from the mapped columns
+
+    def ratings(self, item_id: str) -> memoryview:
+        """One item's ratings in hundredths of a star (4.5 -> 450), as a zero-copy view.
+
+        Raises KeyError if the item is not in the snapshot.
+        """
+        position = self._find(item_id)
+        if position is None:
+            raise KeyError(item_id)
+        return self._stars[self._offsets[position]:self._offsets[position + 1]]
+
+    def average_rating(self, item_id: str) -> Optional[float]:
+        """One item's average rating, without decoding its reviews; None if it has none."""
+        stars = self.ratings(item_id)
+        return sum(stars) / len(stars) / STARS_SCALE if len(stars) else None
+
+    def averages(self) -> Dict[str, float]:
+        """Return {item_id: average rating} for every reviewed item."""
+        np = _numpy()
+        if np is not None and self.review_count:
+            totals = np.concatenate(([0], np.cumsum(np.frombuffer(self._stars, dtype=np.uint16), dtype=np.uint64)))
+            offsets = np.frombuffer(self._offsets, dtype=np.uint64).astype(np.int64)
+            counts = np.diff(offsets)
+            sums = totals[offsets[1:]] - totals[offsets[:-1]]
+            reviewed = np.flatnonzero(counts).tolist()
+            means = (sums[reviewed] / counts[reviewed] / STARS_SCALE).tolist()
+        else:
+            offsets, stars = self._offsets, self._stars
+            reviewed = [i for i in range(len(self._order)) if offsets[i + 1] > offsets[i]]
+            means = [sum(stars[offsets[i]:offsets[i + 1]]) / (offsets[i + 1] - offsets[i]) / STARS_SCALE
+                     for i in reviewed]
+        records = self._records
+        return {self._string(records[i * _ITEM_FIELDS]): mean for i, mean in zip(reviewed, means)}
+
+    def columns(self) -> Dict[str, memoryview]:
+        """Return zero-copy views of the review columns.
+
+        Keys are "review_offsets" (one more than the number of items),
+        "user" (string ids) and "stars" (hundredths), like ReviewStore.columns().
+        Each is a new view of the mapping, so it stays usable after close().
+        """
+        return {"review_offsets": self._offsets[:], "user": self._users[:], "stars": self._stars[:]}
+
+    # ------------------------------------------------------------------
+    # integrity and lifetime
+
+    def verify(self):
+        """Check the body against the header's CRC-32; raises StoreError on a mismatch.
+
+        This reads the whole file, so it is not done on open.
+        """
+        if zlib.crc32(self._buffer[_BODY_START:]) != self._crc:
+            raise StoreError(f"{self.path} fails its checksum")
+
+    def close(self):
+        """Release the mapping.
+
+        Views returned by ratings() or columns() keep the pages mapped
+        until they are themselves released.
+        """
+        for name in ("_records", "_order", "_offsets", "_users", "_stars", "_flags", "_comment_ends",
+                     "_string_ends", "_tags", "_strings", "_comments", "_buffer"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # a caller still holds a view; the pages go when it does
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # internals
+
+    def _column(self, section: str, typecode: str, count: Optional[int] = None) -> memoryview:
+        offset, length = self._table[_SECTIONS.index(section)]
+        view = self._buffer[offset:offset + length]
+        itemsize = array(typecode).itemsize
+        if length % itemsize or (count is not None and length != count * itemsize):
+            raise StoreError(f"{self.path} has a damaged {section} section")
+        if typecode == "B":
+            return view
+        if _LITTLE:
+            return view.cast(typecode)
+        swapped = array(typecode, view.tobytes())
+        swapped.byteswap()
+        return memoryview(swapped)
+
+    def _string(self, code: int) -> str:
+        ends = self._string_ends
+        return str(self._strings[ends[code - 1] if code else 0:ends[code]], "utf-8")
+
+    def _find(self, item_id: str) -> Optional[int]:
+        order, records = self._order, self._records
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._string(records[order[mid] * _ITEM_FIELDS]) < item_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and self._string(records[order[lo] * _ITEM_FIELDS]) == item_id:
+            return order[lo]
+        return None
+
+    def _item(self, position: int) -> MediaItem:
+        item = self._items.get(position)
+        if item is not None:
+            return item
+        string = self._string
+        start = position * _ITEM_FIELDS
+        item_id, title, media_type, metadata, first_tag, tag_count = self._records[start:start + _ITEM_FIELDS]
+        item = MediaItem(string(item_id), string(title), string(media_type),
+                         tags=[string(code) for code in self._tags[first_tag:first_tag + tag_count]],
+                         metadata=json.loads(string(metadata)))
+        for review in self._reviews(position, item.item_id):
+            item.add_review(review)
+        self._items[position] = item
+        return item
+
+    def _reviews(self, position: int, item_id: str) -> List[Review]:
+        first, stop = self._offsets[position], self._offsets[position + 1]
+        users, stars, flags = self._users, self._stars, self._flags
+        ends, comments = self._comment_ends, self._comments
+        string = self._string
+        begin = ends[first - 1] if first else 0
+        reviews = []
+        for row in range(first, stop):
+            end = ends[row]
+            comment = None if flags[row] & _NO_COMMENT else str(comments[begin:end], "utf-8")
+            reviews.append(Review(item_id, string(users[row]), _unscale(stars[row]), comment))
+            begin = end
+        return reviews
+
@@ -0,0 +1,413 @@
+"""
+Indexed catalog of media_system.MediaItem objects.
+
+The Catalog keeps a hash index on item_id, inverted indexes on tags,
+media_type and selected metadata keys, and sorted indexes on release year
+and average rating. Lookups go through small predicate objects (Eq, Range,
+And, Or) so that a query only touches the most selective index instead of
+scanning every item. Titles typed by users are resolved through a
+title_index.TitleIndex (find_title), exactly or with typos.
+
+Example:
+    >>> from media_system import MediaItem
+    >>> cat = Catalog()
+    >>> cat.add_item(MediaItem("m1", "Dune", "book", tags=["sci-fi"], metadata={"year": 1965}))
+    >>> [m.title for m in cat.find(And(Eq("tag", "Sci-Fi"), Range("year", 1960, 1970)))]
+    ['Dune']
+    >>> [m.title for m in cat.view(sort_by="year")[:10]]
+    ['Dune']
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from media_system import MediaItem, Review
+from title_index import TitleIndex
+from views import ItemsView, OrderIndex, SortedIndex
+
+
+def _norm(value: Any) -> Any:
+    """Case-fold strings so index keys and query values compare the same way."""
+    return value.casefold() if isinstance(value, str) else value
+
+
+def _year_of(item: MediaItem) -> Optional[int]:
+    year = item.metadata.get("year")
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+
+class Catalog:
+    """In-memory store of MediaItems with maintained secondary indexes.
+
+    Mutations that affect an index (adding/removing items, tags and reviews)
+    should go through the Catalog so the indexes stay in sync. If an item is
+    changed behind the catalog's back, call refresh(item_id).
+
+    Other structures derived from the catalog (recommendation indexes,
+    leaderboards, ...) can subscribe() to be told about each mutation.
+
+    Args:
+        metadata_keys (Iterable[str]): metadata keys that get an inverted
+            index (e.g. "genre"). Other keys are still queryable, by scan.
+    """
+
+    SORTED_FIELDS = ("year", "rating")
+
+    def __init__(self, metadata_keys: Iterable[str] = ("genre",)):
+        self._items: Dict[str, MediaItem] = {}
+        self._by_tag: Dict[Any, Set[str]] = defaultdict(set)
+        self._by_type: Dict[str, Set[str]] = defaultdict(set)
+        self._by_meta: Dict[str, Dict[Any, Set[str]]] = {key: defaultdict(set) for key in metadata_keys}
+        self._sorted: Dict[str, SortedIndex] = {field: SortedIndex() for field in self.SORTED_FIELDS}
+        # insertion order, for paging through the whole catalog
+        self._order = OrderIndex()
+        self._seqs: Dict[str, int] = {}
+        self._listeners: List[Any] = []
+        # normalized-title hash + trigram index, for titles typed by users
+        self.titles = TitleIndex()
+
+    # ------------------------------------------------------------------
+    # mutation
+
+    def add_item(self, item: MediaItem):
+        """Add a MediaItem to the catalog and index it."""
+        if not isinstance(item, MediaItem):
+            raise TypeError("item must be a MediaItem instance")
+        if item.item_id in self._items:
+            raise ValueError(f"item_id {item.item_id!r} is already in the catalog")
+        self._items[item.item_id] = item
+        self._seqs[item.item_id] = self._order.append(item)
+        self._index(item)
+        self._notify("on_add_item", item)
+
+    def remove_item(self, item_id: str) -> MediaItem:
+        """Remove and return the item with this id."""
+        item = self.get(item_id)
+        if item is None:
+            raise KeyError(item_id)
+        self._unindex(item)
+        del self._items[item_id]
+        self._order.remove(self._seqs.pop(item_id))
+        self._notify("on_remove_item", item)
+        return item
+
+    def add_tag(self, item_id: str, tag: str):
+        """Tag an item and update the tag index."""
+        item = self._require(item_id)
+        item.add_tag(tag)
+        self._by_tag[_norm(tag)].add(item_id)
+        self._notify("on_add_tag", item, tag)
+
+    def add_review(self, review: Review):
+        """Attach a review to its item and re-file the item in the rating index."""
+        item = self._require(review.media_item_id)
+        item.add_review(review)
+        self._resort(item, "rating", item.average_rating())
+        self._notify("on_add_review", item, review)
+
+    def refresh(self, item_id: str):
+        """Re-index an item that was modified outside the catalog (e.g. retitled)."""
+        item = self._require(item_id)
+        self._unindex(item)
+        self._index(item)
+        self._notify("on_refresh_item", item)
+
+    def subscribe(self, listener: Any):
+        """Register a listener for catalog mutations.
+
+        A listener may define any of on_add_item(item), on_remove_item(item),
+        on_add_tag(item, tag), on_add_review(item, review) and
+        on_refresh_item(item); each is called after the catalog has applied
+        the change. Items already in the catalog are replayed to
+        on_add_items(items) if the listener has it (for a bulk load), else
+        to on_add_item, so the listener starts in sync.
+        """
+        self._listeners.append(listener)
+        bulk = getattr(listener, "on_add_items", None)
+        if bulk is not None:
+            bulk(list(self._items.values()))
+            return
+        callback = getattr(listener, "on_add_item", None)
+        if callback is not None:
+            for item in self._items.values():
+                callback(item)
+
+    def unsubscribe(self, listener: Any):
+        self._listeners.remove(listener)
+
+    def _notify(self, event: str, *args):
+        for listener in self._listeners:
+            callback = getattr(listener, event, None)
+            if callback is not None:
+                callback(*args)
+
+    # ------------------------------------------------------------------
+    # lookup
+
+    def get(self, item_id: str) -> Optional[MediaItem]:
+        """Return the item with this id, or None."""
+        return self._items.get(item_id)
+
+    def find(self, predicate: "Predicate") -> List[MediaItem]:
+        """Return the items matching predicate, in no particular order."""
+        ids = predicate.candidates(self)
+        if ids is None:
+            return [item for item in self._items.values() if predicate.matches(item)]
+        return [self._items[item_id] for item_id in ids]
+
+    def find_title(self, title: str, fuzzy: bool = True, limit: int = 10) -> List[MediaItem]:
+        """Items whose title matches user input.
+
+        Exact matches (ignoring case, accents, punctuation and spacing) are
+        returned if there are any. Otherwise, when fuzzy, the closest
+        titles by trigram similarity are returned, best first.
+        """
+        ids = self.titles.lookup(title)
+        if not ids and fuzzy:
+            ids = [match.key for match in self.titles.search(title, limit=limit)]
+        return [self._items[item_id] for item_id in ids[:limit]]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    def __iter__(self) -> Iterator[MediaItem]:
+        return iter(self._items.values())
+
+    def view(self, sort_by: Optional[str] = None, descending: bool = False) -> ItemsView:
+        """Return a lazy, live view of the items.
+
+        With sort_by=None the items are in insertion order; otherwise sort_by
+        is one of SORTED_FIELDS and items without a value for it are left
+        out. Slicing a view or calling view.page(cursor, size) costs O(page)
+        instead of copying and sorting the whole catalog.
+        """
+        if sort_by is None:
+            if descending:
+                raise ValueError("descending needs a sort_by field")
+            return ItemsView.over_order(self._order)
+        if sort_by not in self._sorted:
+            raise ValueError(f"cannot sort by {sort_by!r}; choose from {self.SORTED_FIELDS}")
+        return ItemsView.over_sorted(self._sorted[sort_by], self._items.__getitem__, reverse=descending)
+
+    # ------------------------------------------------------------------
+    # index access used by the predicates
+
+    def _inverted(self, field: str) -> Optional[Dict[Any, Set[str]]]:
+        if field == "tag":
+            return self._by_tag
+        if field == "media_type":
+            return self._by_type
+        return self._by_meta.get(field)
+
+    def _range_ids(self, field: str, low: Any, high: Any) -> List[str]:
+        index = self._sorted[field]
+        return index.idents(*index.bounds(low, high))
+
+    def _range_count(self, field: str, low: Any, high: Any) -> int:
+        start, stop = self._sorted[field].bounds(low, high)
+        return stop - start
+
+    # ------------------------------------------------------------------
+    # internals
+
+    def _require(self, item_id: str) -> MediaItem:
+        item = self.get(item_id)
+        if item is None:
+            raise KeyError(item_id)
+        return item
+
+    def _index(self, item: MediaItem):
+        item_id = item.item_id
+        for tag in item.tags:
+            self._by_tag[_norm(tag)].add(item_id)
+        self._by_type[item.media_type].add(item_id)
+        metadata = item.metadata
+        for key, index in self._by_meta.items():
+            if key in metadata:
+                index[_norm(metadata[key])].add(item_id)
+        self._resort(item, "year", _year_of(item))
+        self._resort(item, "rating", item.average_rating())
+        self.titles.add(item_id, item.title)
+
+    def _unindex(self, item: MediaItem):
+        # tags only ever grow and media_type/metadata are read-only, so the
+        # item's current values cover every key it was filed under
+        item_id = item.item_id
+        keyed = [(self._by_tag, _norm(tag)) for tag in item.tags]
+        keyed.append((self._by_type, item.media_type))
+        metadata = item.metadata
+        keyed.extend((index, _norm(metadata[key])) for key, index in self._by_meta.items() if key in metadata)
+        for index, key in keyed:
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del index[key]
+        for field in self.SORTED_FIELDS:
+            self._resort(item, field, None)
+        if item_id in self.titles:
+            self.titles.remove(item_id)
+
+    def _resort(self, item: MediaItem, field: str, key: Any):
+        """Move item to key in the sorted index for field (None removes it)."""
+        if key is None:
+            self._sorted[field].discard(item.item_id)
+        else:
+            self._sorted[field].add(item.item_id, key)
+
+
+class Predicate:
+    """Base class for catalog queries.
+
+    candidates() returns the set of matching item ids when an index can answer
+    the predicate, or None when it needs a scan. estimate() is an upper bound
+    on the number of matches used to pick the most selective index.
+    """
+
+    def candidates(self, catalog: Catalog) -> Optional[Set[str]]:
+        return None
+
+    def estimate(self, catalog: Catalog) -> int:
+        return len(catalog)
+
+    def matches(self, item: MediaItem) -> bool:
+        raise NotImplementedError
+
+
+def _field_value(item: MediaItem, field: str) -> Any:
+    if field == "item_id":
+        return item.item_id
+    if field == "media_type":
+        return item.media_type
+    if field == "year":
+        return _year_of(item)
+    if field == "rating":
+        return item.average_rating()
+    return item.metadata.get(field)
+
+
+class Eq(Predicate):
+    """field == value. Use field "tag" to test tag membership."""
+
+    def __init__(self, field: str, value: Any):
+        self.field = field
+        self.value = value
+
+    def candidates(self, catalog):
+        if self.field == "item_id":
+            return {self.value} if self.value in catalog else set()
+        index = catalog._inverted(self.field)
+        if index is not None:
+            return set(index.get(_norm(self.value), ()))
+        if self.field in Catalog.SORTED_FIELDS:
+            return set(catalog._range_ids(self.field, self.value, self.value))
+        return None
+
+    def estimate(self, catalog):
+        if self.field == "item_id":
+            return 1
+        index = catalog._inverted(self.field)
+        if index is not None:
+            return len(index.get(_norm(self.value), ()))
+        if self.field in Catalog.SORTED_FIELDS:
+            return catalog._range_count(self.field, self.value, self.value)
+        return len(catalog)
+
+    def matches(self, item):
+        if self.field == "tag":
+            wanted = _norm(self.value)
+            return any(_norm(tag) == wanted for tag in item.tags)
+        return _norm(_field_value(item, self.field)) == _norm(self.value)
+
+    def __repr__(self):
+        return f"Eq({self.field!r}, {self.value!r})"
+
+
+class Range(Predicate):
+    """low <= field <= high on a sorted field ("year" or "rating").
+
+    Either bound may be None for an open-ended range.
+    """
+
+    def __init__(self, field: str, low: Any = None, high: Any = None):
+        self.field = field
+        self.low = low
+        self.high = high
+
+    def candidates(self, catalog):
+        if self.field not in Catalog.SORTED_FIELDS:
+            return None
+        return set(catalog._range_ids(self.field, self.low, self.high))
+
+    def estimate(self, catalog):
+        if self.field not in Catalog.SORTED_FIELDS:
+            return len(catalog)
+        return catalog._range_count(self.field, self.low, self.high)
+
+    def matches(self, item):
+        value = _field_value(item, self.field)
+        if value is None:
+            return False
+        try:
+            return ((self.low is None or value >= self.low)
+                    and (self.high is None or value <= self.high))
+        except TypeError:
+            return False
+
+    def __repr__(self):
+        return f"Range({self.field!r}, {self.low!r}, {self.high!r})"
+
+
+class And(Predicate):
+    """All sub-predicates match. Driven by the most selective indexed one."""
+
+    def __init__(self, *predicates: Predicate):
+        if not predicates:
+            raise ValueError("And needs at least one predicate")
+        self.predicates = predicates
+
+    def candidates(self, catalog):
+        ranked = sorted(self.predicates, key=lambda p: p.estimate(catalog))
+        driver = ranked[0]
+        ids = driver.candidates(catalog)
+        if ids is None:
+            return None
+        rest = ranked[1:]
+        return {item_id for item_id in ids
+                if all(p.matches(catalog._items[item_id]) for p in rest)}
+
+    def estimate(self, catalog):
+        return min(p.estimate(catalog) for p in self.predicates)
+
+    def matches(self, item):
+        return all(p.matches(item) for p in self.predicates)
+
+
+class Or(Predicate):
+    """Any sub-predicate matches. Indexed only if every branch is."""
+
+    def __init__(self, *predicates: Predicate):
+        if not predicates:
+            raise ValueError("Or needs at least one predicate")
+        self.predicates = predicates
+
+    def candidates(self, catalog):
+        result: Set[str] = set()
+        for predicate in self.predicates:
+            ids = predicate.candidates(catalog)
+            if ids is None:
+                return None
+            result |= ids
+        return result
+
+    def estimate(self, catalog):
+        return min(len(catalog), sum(p.estimate(catalog) for p in self.predicates))
+
+    def matches(self, item):
+        return any(p.matches(item) for p in self.predicates)
@@ -1,3 +1,6 @@
+from views import ItemsView, SortedIndex
+
+
 class LibraryItem:
     def __init__(self, title, author, year, copies=1):
         self.title = title
@@ -29,22 +32,55 @@ class LibraryItem:
             copies=data.get("copies", 1)
         )
 class Library:
+    SORT_KEYS = {
+        "title": lambda item: str(item.title or "").casefold(),
+        "author": lambda item: str(item.author or "").casefold(),
+        "year": lambda item: str(item.year or ""),
+    }
+
     def __init__(self, name):
         self.name = name
         self.catalog = []
+        self._sorted = {}   # sort key name -> SortedIndex of (key, catalog position)
 
     def add_item(self, item: LibraryItem):
         self.catalog.append(item)
+        position = len(self.catalog) - 1
+        for name, index in self._sorted.items():
+            index.add(position, self.SORT_KEYS[name](item))
         print(f"\n'{item.title}' has been added to {self.name} Library!")
 
-    def list_items(self):
+    def view(self, sort_by=None, descending=False):
+        """Lazy, sliceable view of the catalog, optionally sorted by title, author or year."""
+        if sort_by is None:
+            if descending:
+                raise ValueError("descending needs a sort_by key")
+            catalog = self.catalog
+            return ItemsView(catalog.__len__, lambda start, stop: catalog[start:stop],
+                             lambda cursor, size: _list_page(catalog, cursor, size))
+        return ItemsView.over_sorted(self._sort_index(sort_by), self.catalog.__getitem__, reverse=descending)
+
+    def list_items(self, start=0, count=None, sort_by=None):
+        """Print count items from position start (all by default) without copying the rest."""
         if not self.catalog:
             print("\nThe library catalog is currently empty.")
         else:
             print(f"\n {self.name} Library Catalog ")
-            for i, item in enumerate(self.catalog, start=1):
+            stop = None if count is None else start + count
+            for i, item in enumerate(self.view(sort_by)[start:stop], start=start + 1):
                 print(f"{i}. {item}")
 
+    def _sort_index(self, name):
+        index = self._sorted.get(name)
+        if index is None:
+            if name not in self.SORT_KEYS:
+                raise KeyError(f"unknown sort key {name!r}; choose from {sorted(self.SORT_KEYS)}")
+            key = self.SORT_KEYS[name]
+            index = self._sorted[name] = SortedIndex()
+            for position, item in enumerate(self.catalog):
+                index.add(position, key(item))
+        return index
+
     @classmethod
     def from_list(cls, name, items_data):
         lib = cls(name)
@@ -52,6 +88,15 @@ class Library:
             item = LibraryItem.from_dict(data)
             lib.add_item(item)
         return lib
+
+
+def _list_page(items, cursor, size):
+    # the catalog is append-only, so a position is a stable cursor
+    start = 0 if cursor is None else cursor + 1
+    page = items[start:start + size]
+    return page, (start + len(page) - 1 if start + size < len(items) else None)
+
+
 def main():
     my_lib = Library("Campus Library")
     print(f" Welcome to the {my_lib.name} Management System!")
@@ -73,15 +118,17 @@ def main():
             break
         else:
             print(" Invalid choice. Please try again.")
-if __name__ == "__main__":
-    main()
-  
-items = [
-    {"title": "Nervous Conditions", "author": "Tsitsi Dangarembga", "year": 1988, "copies": 2},
-    {"title": "Things Fall Apart", "author": "Chinua Achebe", "year": 1958, "copies": 1},
-]
+def demo():
+    items = [
+        {"title": "Nervous Conditions", "author": "Tsitsi Dangarembga", "year": 1988, "copies": 2},
+        {"title": "Things Fall Apart", "author": "Chinua Achebe", "year": 1958, "copies": 1},
+    ]
 
-my_lib_2 = Library.from_list("Campus Library", items)
-print(my_lib_2.list_items())
+    my_lib_2 = Library.from_list("Campus Library", items)
+    print(my_lib_2.list_items())
 
 
+if __name__ == "__main__":
+    # nothing runs on import; the menu and the sample library only run as a script
+    main()
+    demo()
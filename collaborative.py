@@ -0,0 +1,235 @@
+"""
+Item-item collaborative filtering ("users who liked X also liked ...").
+
+RatingMatrix is a sparse user x item matrix in CSR form (three flat arrays:
+indptr, indices, data) built straight from a review_store.ReviewStore.
+build_neighbors() computes item-item cosine similarity a block of items at
+a time. Each item's co-rating sums are accumulated, reduced to its top-k
+neighbours and dropped, so memory stays bounded by the block. With
+workers > 1 the blocks are spread over a ProcessPoolExecutor. The result is
+a NeighborTable that serves top-k lists with a dictionary lookup.
+
+Example:
+    >>> from review_store import ReviewStore
+    >>> store = ReviewStore()
+    >>> for user, item, stars in [("ann", "dune", 5), ("ann", "alien", 4),
+    ...                           ("bob", "dune", 4), ("bob", "alien", 5),
+    ...                           ("cat", "dune", 1), ("cat", "up", 5)]:
+    ...     _ = store.append(item, user, stars)
+    >>> table = build_neighbors(RatingMatrix.from_store(store), k=2)
+    >>> [item for item, _ in table.also_liked("dune")]
+    ['alien', 'up']
+"""
+
+import heapq
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class RatingMatrix:
+    """Sparse ratings matrix in compressed sparse row (CSR) layout.
+
+    Row r's entries are indices[indptr[r]:indptr[r + 1]] (column codes, sorted)
+    with values in the same slice of data.
+    """
+
+    def __init__(self, indptr: array, indices: array, data: array,
+                 row_labels: List[str], col_labels: List[str]):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.row_labels = row_labels
+        self.col_labels = col_labels
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.row_labels), len(self.col_labels)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_store(cls, store) -> "RatingMatrix":
+        """Build the user x item matrix from a ReviewStore.
+
+        If a user reviewed an item more than once, the latest review wins.
+        """
+        from review_store import STARS_SCALE
+        columns = store.columns()
+        ratings = (value / STARS_SCALE for value in columns["stars"])
+        return cls.from_triples(columns["user"], columns["item"], ratings,
+                                store.user_ids(), store.item_ids())
+
+    @classmethod
+    def from_triples(cls, rows: Sequence[int], cols: Sequence[int], values: Iterable[float],
+                     row_labels: List[str], col_labels: List[str]) -> "RatingMatrix":
+        """Build from parallel (row code, column code, value) sequences.
+
+        Uses a counting sort by row, so the cost is linear in the number of
+        ratings plus a sort of each (short) row.
+        """
+        n_rows = len(row_labels)
+        indptr = array("Q", bytes(8 * (n_rows + 1)))
+        for r in rows:
+            indptr[r + 1] += 1
+        for r in range(n_rows):
+            indptr[r + 1] += indptr[r]
+        nnz = indptr[n_rows]
+        indices = array("I", bytes(4 * nnz))
+        data = array("d", bytes(8 * nnz))
+        fill = array("Q", indptr[:n_rows])
+        for r, c, v in zip(rows, cols, values):
+            pos = fill[r]
+            indices[pos] = c
+            data[pos] = v
+            fill[r] = pos + 1
+        return cls._sorted_rows(indptr, indices, data, row_labels, col_labels)
+
+    @classmethod
+    def _sorted_rows(cls, indptr, indices, data, row_labels, col_labels) -> "RatingMatrix":
+        # sort each row by column and keep the last value for repeated columns
+        out_ptr = array("Q", [0])
+        out_idx = array("I")
+        out_val = array("d")
+        for r in range(len(row_labels)):
+            start, stop = indptr[r], indptr[r + 1]
+            merged = dict(zip(indices[start:stop], data[start:stop]))
+            for c in sorted(merged):
+                out_idx.append(c)
+                out_val.append(merged[c])
+            out_ptr.append(len(out_idx))
+        return cls(out_ptr, out_idx, out_val, row_labels, col_labels)
+
+    def transpose(self) -> "RatingMatrix":
+        """Return the column-major view as a new CSR matrix (items x users)."""
+        n_rows, n_cols = self.shape
+        rows = array("I")
+        for r in range(n_rows):
+            rows.extend([r] * (self.indptr[r + 1] - self.indptr[r]))
+        return RatingMatrix.from_triples(self.indices, rows, self.data, self.col_labels, self.row_labels)
+
+    def row(self, r: int) -> Tuple[Sequence[int], Sequence[float]]:
+        start, stop = self.indptr[r], self.indptr[r + 1]
+        return self.indices[start:stop], self.data[start:stop]
+
+
+class NeighborTable:
+    """Precomputed top-k similar items for every item."""
+
+    def __init__(self, labels: List[str], neighbors: Dict[int, List[Tuple[int, float]]]):
+        self._labels = labels
+        self._codes = {label: code for code, label in enumerate(labels)}
+        self._neighbors = neighbors
+
+    def __len__(self):
+        return len(self._neighbors)
+
+    def also_liked(self, item_id: str, k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return (item_id, similarity) pairs, most similar first."""
+        code = self._codes.get(item_id)
+        if code is None:
+            return []
+        pairs = self._neighbors.get(code, [])
+        if k is not None:
+            pairs = pairs[:k]
+        return [(self._labels[other], score) for other, score in pairs]
+
+    def recommend_for(self, ratings: Dict[str, float], k: int = 10) -> List[Tuple[str, float]]:
+        """Recommend unseen items for a user given their {item_id: stars}.
+
+        Each neighbour is scored by the similarity-weighted average of the
+        user's ratings of the items it is a neighbour of.
+        """
+        totals: Dict[int, float] = {}
+        weights: Dict[int, float] = {}
+        seen = {self._codes[i] for i in ratings if i in self._codes}
+        for item_id, stars in ratings.items():
+            code = self._codes.get(item_id)
+            if code is None:
+                continue
+            for other, sim in self._neighbors.get(code, ()):
+                if other in seen:
+                    continue
+                totals[other] = totals.get(other, 0.0) + sim * stars
+                weights[other] = weights.get(other, 0.0) + sim
+        scored = ((other, totals[other] / weights[other]) for other in totals if weights[other])
+        best = heapq.nlargest(k, scored, key=lambda pair: (pair[1], weights[pair[0]]))
+        return [(self._labels[other], score) for other, score in best]
+
+
+# state shared with worker processes, set once per process by _init_worker
+_by_user: Optional[RatingMatrix] = None
+_by_item: Optional[RatingMatrix] = None
+_norms: Optional[array] = None
+
+
+def _init_worker(by_user, by_item, norms):
+    global _by_user, _by_item, _norms
+    _by_user, _by_item, _norms = by_user, by_item, norms
+
+
+def _neighbors_block(start: int, stop: int, k: int, min_support: int):
+    """Top-k cosine neighbours for item codes [start, stop)."""
+    by_user, by_item, norms = _by_user, _by_item, _norms
+    u_ptr, u_idx, u_val = by_user.indptr, by_user.indices, by_user.data
+    result = {}
+    for item in range(start, stop):
+        if not norms[item]:
+            continue
+        dots: Dict[int, float] = {}
+        support: Dict[int, int] = {}
+        users, ratings = by_item.row(item)
+        for user, r_ui in zip(users, ratings):
+            for pos in range(u_ptr[user], u_ptr[user + 1]):
+                other = u_idx[pos]
+                if other != item:
+                    dots[other] = dots.get(other, 0.0) + r_ui * u_val[pos]
+                    if min_support > 1:
+                        support[other] = support.get(other, 0) + 1
+        norm = norms[item]
+        # an item rated 0 stars by everyone has no direction to compare against
+        scored = ((other, dot / (norm * norms[other])) for other, dot in dots.items()
+                  if norms[other] and (min_support <= 1 or support[other] >= min_support))
+        top = heapq.nlargest(k, scored, key=lambda pair: (pair[1], -pair[0]))
+        if top:
+            result[item] = top
+    return result
+
+
+def build_neighbors(matrix: RatingMatrix, k: int = 20, min_support: int = 1,
+                    workers: Optional[int] = None, block_size: int = 1024) -> NeighborTable:
+    """Compute every item's top-k cosine neighbours.
+
+    Args:
+        matrix: user x item RatingMatrix
+        k: neighbours kept per item
+        min_support: ignore item pairs rated by fewer common users than this
+        workers: processes to use; 1 runs in-process, None uses os.cpu_count()
+        block_size: items per unit of work
+    """
+    by_user = matrix
+    by_item = matrix.transpose()
+    norms = array("d", (math.sqrt(sum(v * v for v in by_item.row(i)[1]))
+                        for i in range(len(by_item.row_labels))))
+    n_items = len(norms)
+    blocks = [(start, min(start + block_size, n_items)) for start in range(0, n_items, block_size)]
+    workers = workers or os.cpu_count() or 1
+    neighbors: Dict[int, List[Tuple[int, float]]] = {}
+    if workers == 1 or len(blocks) <= 1:
+        _init_worker(by_user, by_item, norms)
+        try:
+            for start, stop in blocks:
+                neighbors.update(_neighbors_block(start, stop, k, min_support))
+        finally:
+            _init_worker(None, None, None)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(blocks)), initializer=_init_worker,
+                                 initargs=(by_user, by_item, norms)) as pool:
+            futures = [pool.submit(_neighbors_block, start, stop, k, min_support) for start, stop in blocks]
+            for future in futures:
+                neighbors.update(future.result())
+    return NeighborTable(matrix.col_labels, neighbors)
@@ -0,0 +1,156 @@
+"""
+Thread-safe review store for multi-threaded writers.
+
+MediaItem, the containers and the user list are plain objects. When two
+threads update the same one, updates can be lost: two add_review calls can
+interleave inside the running rating aggregates. ConcurrentReviewStore
+puts them behind per-item lock striping:
+
+- Each item maps to one of N stripe locks by hash(item_id) % N. A write
+  holds only that stripe, so writers to different items rarely contend.
+  The number of locks stays fixed however many items there are.
+- After every write the item's aggregates are published as an immutable
+  ItemStats tuple with a single dict assignment. stats() and snapshot()
+  read these without taking any lock, and a reader never sees a half-done
+  update.
+- Adding and removing items takes a separate registry lock. Review writes
+  never take it.
+
+Readers see each item's latest published stats. A snapshot() taken while
+writers are running is consistent per item, not across items.
+
+Example:
+    >>> from media_system import MediaItem, Review
+    >>> store = ConcurrentReviewStore(stripes=8)
+    >>> store.add_item(MediaItem("m1", "Dune", "book"))
+    >>> store.add_review(Review("m1", "ali", 5))
+    >>> store.stats("m1")
+    ItemStats(count=1, average=5.0, minimum=5, maximum=5)
+"""
+
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from media_system import MediaItem, Review
+
+
+class ItemStats(NamedTuple):
+    count: int
+    average: Optional[float]
+    minimum: Optional[float]
+    maximum: Optional[float]
+
+
+_EMPTY = ItemStats(0, None, None, None)
+
+
+def _stats_of(item: MediaItem) -> ItemStats:
+    return ItemStats(item.review_count(), item.average_rating(), item.min_rating(), item.max_rating())
+
+
+class ConcurrentReviewStore:
+    """MediaItems and their reviews, safe to update from many threads.
+
+    Args:
+        stripes (int): number of item locks; more stripes, less contention
+    """
+
+    def __init__(self, stripes: int = 64):
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._registry_lock = threading.Lock()
+        self._items: Dict[str, MediaItem] = {}
+        self._stats: Dict[str, ItemStats] = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    def _lock_for(self, item_id: str) -> threading.Lock:
+        return self._locks[hash(item_id) % len(self._locks)]
+
+    # ------------------------------------------------------------------
+    # writes
+
+    def add_item(self, item: MediaItem):
+        """Register an item; raises ValueError if its id is taken."""
+        with self._registry_lock:
+            if item.item_id in self._items:
+                raise ValueError(f"item_id {item.item_id!r} is already in the store")
+            with self._lock_for(item.item_id):
+                self._stats[item.item_id] = _stats_of(item)
+                self._items[item.item_id] = item
+
+    def remove_item(self, item_id: str) -> MediaItem:
+        with self._registry_lock:
+            with self._lock_for(item_id):
+                item = self._items.pop(item_id)
+                del self._stats[item_id]
+        return item
+
+    def add_review(self, review: Review):
+        """Attach a review to its item; raises KeyError for an unknown item."""
+        item_id = review.media_item_id
+        with self._lock_for(item_id):
+            item = self._items[item_id]
+            item.add_review(review)
+            self._stats[item_id] = _stats_of(item)
+
+    def add_reviews(self, reviews: Iterable[Review]) -> int:
+        """Attach many reviews, taking each stripe lock once for the whole batch."""
+        added = 0
+        by_lock: Dict[int, List[Review]] = {}
+        n = len(self._locks)
+        for review in reviews:
+            by_lock.setdefault(hash(review.media_item_id) % n, []).append(review)
+        for stripe, group in by_lock.items():
+            with self._locks[stripe]:
+                touched = {}
+                try:
+                    for review in group:
+                        item = self._items[review.media_item_id]
+                        item.add_review(review)
+                        touched[item.item_id] = item
+                        added += 1
+                finally:
+                    for item_id, item in touched.items():
+                        self._stats[item_id] = _stats_of(item)
+        return added
+
+    def edit_review(self, review: Review, stars: Optional[float] = None, comment: Optional[str] = None):
+        item_id = review.media_item_id
+        with self._lock_for(item_id):
+            item = self._items[item_id]
+            item.edit_review(review, stars=stars, comment=comment)
+            self._stats[item_id] = _stats_of(item)
+
+    def remove_review(self, review: Review):
+        item_id = review.media_item_id
+        with self._lock_for(item_id):
+            item = self._items[item_id]
+            item.remove_review(review)
+            self._stats[item_id] = _stats_of(item)
+
+    # ------------------------------------------------------------------
+    # reads
+
+    def stats(self, item_id: str) -> ItemStats:
+        """Latest published aggregates of one item (lock-free)."""
+        return self._stats.get(item_id, _EMPTY)
+
+    def snapshot(self) -> Dict[str, ItemStats]:
+        """{item_id: ItemStats} for every item (lock-free, consistent per item)."""
+        # dict(...) copies in one step under the GIL; values are immutable
+        return dict(self._stats)
+
+    def reviews_for(self, item_id: str) -> Tuple[Review, ...]:
+        """A stable copy of one item's reviews."""
+        with self._lock_for(item_id):
+            return tuple(self._items[item_id].reviews)
+
+    def get(self, item_id: str) -> Optional[MediaItem]:
+        """The live item; mutate it only through the store."""
+        return self._items.get(item_id)
@@ -1,17 +1,22 @@
+from base_classes import AbstractReviewContainer
+
+
 class FavoritesContainer(AbstractReviewContainer):
     """Lst of favorite media items from the user."""
 
     def add_item(self, media_item):
-        # makes sure there are no duplicates 
-        if media_item not in self.media_items:
-            self.media_items.append(media_item)
+        # makes sure there are no duplicates (same item_id), checked in O(1);
+        # the check and the append happen under one lock
+        with self._lock:
+            if media_item not in self:
+                self._append_entry(media_item)
 
     def remove_item(self, media_item):
-        if media_item in self.media_items:
-            self.media_items.remove(media_item)
+        self._remove_first_entry(media_item)
 
     def get_items(self):
-        return self.media_items
+        # lazy view: slicing and paging cost O(page), not O(len)
+        return self.view()
 
     def get_container_type(self):
         return "Favorites"
@@ -21,16 +26,16 @@ class WatchlistContainer(AbstractReviewContainer):
     """A container representing items a user plans to watch/read."""
 
     def add_item(self, media_item):
-        # Duplicates allowed because of the different behavior
-        self.media_items.append(media_item)
+        # Duplicates allowed because of the different behavior; count() gives the multiplicity
+        self._append_entry(media_item)
 
     def remove_item(self, media_item):
         # Gets rid of the first occurrence
-        if media_item in self.media_items:
-            self.media_items.remove(media_item)
+        self._remove_first_entry(media_item)
 
     def get_items(self):
-        return self.media_items
+        # lazy view: slicing and paging cost O(page), not O(len)
+        return self.view()
 
     def get_container_type(self):
         return "Watchlist"
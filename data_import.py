@@ -0,0 +1,365 @@
+"""
+Streaming import of media datasets (see data_persistence.md, "Data Import").
+
+StreamingImporter reads CSV, JSON Lines or JSON-array files one record at a
+time and turns each record into a media object with a builder function.
+Records are validated in batches; a bad record is reported to a side
+channel and skipped instead of aborting the import. Only the current batch is
+held in memory, so multi-GB feeds load in bounded memory.
+
+Example:
+    >>> importer = StreamingImporter(build_media_item, batch_size=500)
+    >>> for item in importer.import_file("feed.jsonl"):      # doctest: +SKIP
+    ...     catalog.add_item(item)
+    >>> importer.stats                                        # doctest: +SKIP
+    ImportStats(records_read=120000, imported=119998, rejected=2, batches=240)
+"""
+
+import csv
+import json
+import os
+import re
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from media_items import AudioRecording, Book, Film
+from media_system import MediaItem
+
+
+class RejectedRecord(NamedTuple):
+    """One rejected record: where it came from, what it was and why."""
+    record_number: int
+    record: Any
+    reason: str
+
+
+class ImportStats:
+    """Progress counters for a running or finished import."""
+
+    def __init__(self):
+        self.records_read = 0
+        self.imported = 0
+        self.rejected = 0
+        self.batches = 0
+
+    def __repr__(self):
+        return (f"ImportStats(records_read={self.records_read}, imported={self.imported}, "
+                f"rejected={self.rejected}, batches={self.batches})")
+
+
+# ----------------------------------------------------------------------
+# builders: record dict -> media object (raise ValueError/TypeError/KeyError if invalid)
+
+_MEDIA_ITEM_FIELDS = {"item_id", "id", "title", "media_type", "type", "tags"}
+
+
+def _split_tags(tags: Any) -> List[str]:
+    if tags is None or tags == "":
+        return []
+    if isinstance(tags, str):
+        sep = ";" if ";" in tags else "|" if "|" in tags else ","
+        return [t.strip() for t in tags.split(sep) if t.strip()]
+    if isinstance(tags, list):
+        return [str(t) for t in tags]
+    raise ValueError("tags must be a list or a delimited string")
+
+
+def _year(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError("year must be an integer")
+    year = int(value)
+    if not 0 < year < 10000:
+        raise ValueError(f"year {year} is out of range")
+    return year
+
+
+def _required(record: Dict[str, Any], *names: str) -> Any:
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ""):
+            return value
+    raise KeyError(f"missing field {names[0]!r}")
+
+
+def build_media_item(record: Dict[str, Any]) -> MediaItem:
+    """Build a media_system.MediaItem; unknown fields become metadata."""
+    metadata = {k: v for k, v in record.items() if k not in _MEDIA_ITEM_FIELDS and v not in (None, "")}
+    if "year" in metadata:
+        metadata["year"] = _year(metadata["year"])
+    return MediaItem(str(_required(record, "item_id", "id")),
+                     _required(record, "title"),
+                     str(_required(record, "media_type", "type")).strip().lower(),
+                     tags=_split_tags(record.get("tags")),
+                     metadata=metadata)
+
+
+_TYPED_CLASSES = {
+    "book": Book,
+    "film": Film,
+    "movie": Film,
+    "audio": AudioRecording,
+    "audio recording": AudioRecording,
+    "album": AudioRecording,
+    "podcast": AudioRecording,
+}
+
+
+def build_typed_item(record: Dict[str, Any]):
+    """Build a media_items Book, Film or AudioRecording from its "type" field."""
+    kind = str(_required(record, "type", "media_type")).strip().lower()
+    cls = _TYPED_CLASSES.get(kind)
+    if cls is None:
+        raise ValueError(f"unknown media type {kind!r}")
+    title = _required(record, "title")
+    if not isinstance(title, str):
+        raise ValueError("title must be a string")
+    return cls(str(_required(record, "item_id", "id")),
+               title.strip(),
+               _required(record, "creator", "author", "director", "artist"),
+               record.get("genre") or "",
+               _year(_required(record, "release_year", "year")))
+
+
+# ----------------------------------------------------------------------
+# record readers
+
+def iter_csv(path: str, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """Yield each CSV row as a dict keyed by the header row."""
+    with open(path, newline="", encoding=encoding) as f:
+        yield from csv.DictReader(f)
+
+
+def iter_json_lines(path: str, encoding: str = "utf-8") -> Iterator[Any]:
+    """Yield one decoded value per non-blank line.
+
+    A line that is not valid JSON is yielded as a _BadRecord so the importer
+    can reject it without stopping.
+    """
+    with open(path, encoding=encoding) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield _BadRecord(line, f"invalid JSON: {exc.msg}")
+
+
+def iter_json_array(path: str, encoding: str = "utf-8", chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading the file.
+
+    At most about two chunks are held at a time, so an element may be up to
+    chunk_size characters long. An element that is not valid JSON (or is
+    longer than that) is yielded as a _BadRecord, like a bad line from
+    iter_json_lines, and reading resumes at the next element. Elements must
+    be separated by exactly one ","; anything else, or a file that ends
+    inside the array, raises ValueError.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding=encoding) as f:
+        buf, pos, eof = "", 0, False
+
+        def more() -> bool:
+            # drop what has been consumed and pull in the next chunk; False at end of file
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            return not eof
+
+        def peek() -> str:
+            # the next non-blank character without consuming it; "" at end of file
+            nonlocal pos
+            while True:
+                pos = _skip_ws(buf, pos)
+                if pos < len(buf) or not more():
+                    return buf[pos:pos + 1]
+
+        if peek() != "[":
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos += 1
+        if peek() == "]":
+            return
+        number = 0
+        while True:
+            number += 1
+            if peek() in ("", ",", "]"):
+                raise ValueError(f"{path}: expected a value for element {number} of the array")
+            refilled = False
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as exc:
+                    reason = f"invalid JSON: {exc.msg}"
+                else:
+                    reason = None
+                    # a scalar ending exactly at the buffer edge (e.g. a number) may be cut short
+                    if end < len(buf) or eof or buf[end - 1] in '"]}':
+                        break
+                if refilled or eof:
+                    break
+                # the element may run past the buffer: allow it one more chunk, never more
+                more()
+                refilled = True
+            if reason is None:
+                yield value
+                pos = end
+            else:
+                stop, state = _element_end(buf, pos)
+                if stop is not None:
+                    yield _BadRecord(buf[pos:stop].strip(), reason)
+                else:
+                    raw = buf[pos:pos + 200].strip() + "..."
+                    # skip the rest of the element a chunk at a time without keeping it
+                    while stop is None:
+                        pos = len(buf)
+                        if not more():
+                            raise ValueError(f"{path} ends in the middle of element {number} of the array")
+                        stop, state = _element_end(buf, 0, state)
+                    yield _BadRecord(raw, f"{reason} (or longer than chunk_size, {chunk_size} characters)")
+                pos = stop
+            separator = peek()
+            if separator == "]":
+                return
+            if separator != ",":
+                found = repr(separator) if separator else "end of file"
+                raise ValueError(f"{path}: expected ',' or ']' after element {number} of the array, found {found}")
+            pos += 1
+
+
+def _element_end(text: str, pos: int, state: Tuple[int, bool, bool] = (0, False, False)):
+    """Find where an array element that starts at pos ends, without decoding it.
+
+    Returns the index just past its closing bracket, or for a scalar the
+    index of the "," or "]" that follows it; or None together with the
+    (depth, in_string, escaped) state to resume from in the next chunk.
+    """
+    depth, in_string, escaped = state
+    for i in range(pos, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "[{":
+            depth += 1
+        elif c in "]}":
+            if not depth:
+                return i, state
+            depth -= 1
+            if not depth:
+                return i + 1, state
+        elif c == "," and not depth:
+            return i, state
+    return None, (depth, in_string, escaped)
+
+
+_WS_RE = re.compile(r"\s*")
+
+
+def _skip_ws(buf: str, pos: int) -> int:
+    return _WS_RE.match(buf, pos).end()
+
+
+class _BadRecord(NamedTuple):
+    raw: str
+    reason: str
+
+
+_READERS = {
+    ".csv": iter_csv,
+    ".jsonl": iter_json_lines,
+    ".ndjson": iter_json_lines,
+    ".json": iter_json_array,
+}
+
+
+# ----------------------------------------------------------------------
+
+class StreamingImporter:
+    """Turn a stream of records into media objects in bounded memory.
+
+    Args:
+        builder (Callable): record dict -> media object, e.g. build_media_item
+            or build_typed_item. Raising ValueError, TypeError or KeyError
+            rejects the record.
+        batch_size (int): records validated per batch
+        on_error (Callable, optional): called with a RejectedRecord for each
+            rejected record. When omitted the most recent max_errors_kept
+            rejections are kept in self.errors.
+        on_progress (Callable, optional): called with self.stats after each batch
+        max_errors_kept (int): size of the self.errors ring buffer
+    """
+
+    def __init__(self, builder: Callable[[Dict[str, Any]], Any] = build_media_item,
+                 batch_size: int = 1000,
+                 on_error: Optional[Callable[[RejectedRecord], None]] = None,
+                 on_progress: Optional[Callable[[ImportStats], None]] = None,
+                 max_errors_kept: int = 1000):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.builder = builder
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.errors = deque(maxlen=max_errors_kept)
+        self.stats = ImportStats()
+
+    def import_file(self, path: str, encoding: str = "utf-8") -> Iterator[Any]:
+        """Stream media objects from a .csv, .jsonl/.ndjson or .json file."""
+        ext = os.path.splitext(path)[1].lower()
+        reader = _READERS.get(ext)
+        if reader is None:
+            raise ValueError(f"unsupported import format {ext!r} (expected one of {sorted(_READERS)})")
+        return self.import_records(reader(path, encoding=encoding))
+
+    def import_records(self, records: Iterable[Any]) -> Iterator[Any]:
+        """Stream media objects from any iterable of record dicts."""
+        for batch in self.iter_batches(records):
+            yield from batch
+
+    def iter_batches(self, records: Iterable[Any]) -> Iterator[List[Any]]:
+        """Yield lists of up to batch_size valid media objects."""
+        pending = []
+        for record in records:
+            self.stats.records_read += 1
+            pending.append((self.stats.records_read, record))
+            if len(pending) >= self.batch_size:
+                yield self._validate_batch(pending)
+                pending = []
+        if pending:
+            yield self._validate_batch(pending)
+
+    def _validate_batch(self, pending) -> List[Any]:
+        built = []
+        for number, record in pending:
+            if isinstance(record, _BadRecord):
+                self._reject(number, record.raw, record.reason)
+                continue
+            if not isinstance(record, dict):
+                self._reject(number, record, "record is not an object")
+                continue
+            try:
+                built.append(self.builder(record))
+            except (ValueError, TypeError, KeyError) as exc:
+                reason = exc.args[0] if isinstance(exc, KeyError) and exc.args else str(exc)
+                self._reject(number, record, str(reason))
+        self.stats.imported += len(built)
+        self.stats.batches += 1
+        if self.on_progress is not None:
+            self.on_progress(self.stats)
+        return built
+
+    def _reject(self, number: int, record: Any, reason: str):
+        self.stats.rejected += 1
+        error = RejectedRecord(number, record, reason)
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            self.errors.append(error)
@@ -0,0 +1,232 @@
+"""
+Parallel export of review reports into exports/ (see data_persistence.md).
+
+Formatting and serializing millions of reviews is CPU-bound, so
+export_report() splits the work into shards. Reviews are sharded by row
+range; per-item reports are sharded by item range. A ProcessPoolExecutor
+runs the shards, and each worker streams its rows straight into its own
+part file through csv/json writers over a (compressed) file object. No
+report is ever built as one big string. The parent then concatenates the
+parts in shard order.
+
+The merge never recompresses. gzip, bz2 and xz all allow several
+compressed streams to be concatenated into one valid file, so the merge is
+a plain byte copy. The CSV header and the JSON array brackets are written
+as their own small streams.
+
+Reports:
+    reviews   one row per review: item_id, user, stars, comment, timestamp
+    ratings   one row per item: item_id, title, count, average, min, max
+
+Formats: "csv", "jsonl", "json" (a single array) and "txt" (aligned text).
+Compression: None, "gzip", "bz2" or "xz".
+
+Example:
+    >>> from review_store import ReviewStore
+    >>> store = ReviewStore()
+    >>> store.extend(reviews)                                        # doctest: +SKIP
+    >>> export_report(store, "ratings", fmt="csv", compression="gzip")  # doctest: +SKIP
+    ExportResult(path='exports/ratings.csv.gz', rows=..., shards=...)
+"""
+
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Collection, Dict, List, NamedTuple, Optional, Tuple
+
+from review_store import STARS_SCALE, ReviewStore, _unscale
+
+EXPORT_DIR = "exports"
+REPORTS = ("reviews", "ratings")
+FORMATS = ("csv", "jsonl", "json", "txt")
+_COLUMNS = {
+    "reviews": ("item_id", "user", "stars", "comment", "timestamp"),
+    "ratings": ("item_id", "title", "count", "average", "min", "max"),
+}
+_OPENERS = {
+    None: lambda path: open(path, "wb"),
+    "gzip": lambda path: gzip.open(path, "wb", compresslevel=6),
+    "bz2": lambda path: bz2.open(path, "wb"),
+    "xz": lambda path: lzma.open(path, "wb"),
+}
+_COMPRESSORS = {None: bytes, "gzip": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress}
+_SUFFIXES = {None: "", "gzip": ".gz", "bz2": ".bz2", "xz": ".xz"}
+
+
+class ExportResult(NamedTuple):
+    path: str
+    rows: int
+    shards: int
+
+
+def default_path(report: str, fmt: str, compression: Optional[str] = None) -> str:
+    """exports/<report>.<fmt>[.gz|.bz2|.xz]"""
+    return os.path.join(EXPORT_DIR, f"{report}.{fmt}{_SUFFIXES[compression]}")
+
+
+# state shared with worker processes, set once per process by _init_worker
+_store: Optional[ReviewStore] = None
+_titles: Dict[str, str] = {}
+_only: Optional[frozenset] = None
+
+
+def _init_worker(store, titles, only):
+    global _store, _titles, _only
+    _store, _titles, _only = store, titles, only
+
+
+def _rating_rows(start: int, stop: int):
+    # only this shard's item ids and stars are copied, not the whole store's
+    store, titles, only = _store, _titles, _only
+    for code, item_id in enumerate(store.item_ids(start, stop), start):
+        if only is not None and item_id not in only:
+            continue
+        values = store.item_stars(code)
+        if not values:
+            continue
+        # stars are stored in hundredths; min/max are shown like the reviews report's stars
+        yield (item_id, titles.get(item_id, ""), len(values), round(sum(values) / len(values) / STARS_SCALE, 4),
+               _unscale(min(values)), _unscale(max(values)))
+
+
+def _review_rows(start: int, stop: int):
+    only = _only
+    for row in _store.rows(start, stop):
+        if only is None or row[0] in only:
+            yield row
+
+
+def _export_shard(report: str, fmt: str, compression: Optional[str], part: str,
+                  start: int, stop: int) -> int:
+    """Write rows [start, stop) of a report to one part file; return the row count."""
+    rows = _review_rows(start, stop) if report == "reviews" else _rating_rows(start, stop)
+    columns = _COLUMNS[report]
+    count = 0
+    with _OPENERS[compression](part) as raw, \
+            io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=False) as out:
+        if fmt == "csv":
+            writer = csv.writer(out)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        elif fmt in ("jsonl", "json"):
+            separator = "\n" if fmt == "jsonl" else ",\n"
+            dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+            for row in rows:
+                if count and fmt == "json":
+                    out.write(separator)
+                out.write(dumps(dict(zip(columns, row))))
+                if fmt == "jsonl":
+                    out.write("\n")
+                count += 1
+        else:
+            for row in rows:
+                out.write(_text_line(report, row))
+                count += 1
+    return count
+
+
+def _text_line(report: str, row: Tuple[Any, ...]) -> str:
+    if report == "reviews":
+        item_id, user, stars, comment, _ = row
+        return f"{item_id:<12} {user:<16} {stars:>4}  {' '.join(comment.split())}\n"
+    item_id, title, count, average, low, high = row
+    return f"{item_id:<12} {title[:40]:<40} {count:>8} {average:>7.2f} {low:>5} {high:>5}\n"
+
+
+def _header(report: str, fmt: str) -> str:
+    if fmt == "csv":
+        out = io.StringIO()
+        csv.writer(out).writerow(_COLUMNS[report])
+        return out.getvalue()
+    if fmt == "txt" and report == "ratings":
+        return f"{'item_id':<12} {'title':<40} {'count':>8} {'average':>7} {'min':>5} {'max':>5}\n"
+    return "[\n" if fmt == "json" else ""
+
+
+def export_report(store: ReviewStore, report: str, path: Optional[str] = None, fmt: str = "csv",
+                  compression: Optional[str] = None, workers: Optional[int] = None,
+                  shard_size: int = 250_000, titles: Optional[Dict[str, str]] = None,
+                  only_items: Optional[Collection[str]] = None) -> ExportResult:
+    """Export a report from a ReviewStore, in parallel shards.
+
+    Args:
+        store: the reviews to export
+        report: "reviews" or "ratings"
+        path: output file; default_path(report, fmt, compression) if omitted
+        fmt: "csv", "jsonl", "json" or "txt"
+        compression: None, "gzip", "bz2" or "xz"
+        workers: processes to use; 1 runs in-process, None uses os.cpu_count()
+        shard_size: reviews (or items, for "ratings") per shard
+        titles: optional {item_id: title} for the ratings report
+        only_items: restrict the report to these item ids (e.g. from Catalog.find)
+
+    Returns:
+        ExportResult with the path written, the number of rows and shards
+    """
+    if report not in REPORTS:
+        raise ValueError(f"report must be one of {REPORTS}")
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {FORMATS}")
+    if compression not in _OPENERS:
+        raise ValueError(f"compression must be one of {tuple(_OPENERS)}")
+    if shard_size < 1:
+        raise ValueError("shard_size must be positive")
+    path = path or default_path(report, fmt, compression)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    total = len(store) if report == "reviews" else store.item_count()
+    ranges = [(start, min(start + shard_size, total)) for start in range(0, total, shard_size)]
+    parts = [f"{path}.part-{n:05d}" for n in range(len(ranges))]
+    only = frozenset(only_items) if only_items is not None else None
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers == 1 or len(ranges) <= 1:
+            _init_worker(store, titles or {}, only)
+            try:
+                counts = [_export_shard(report, fmt, compression, part, start, stop)
+                          for part, (start, stop) in zip(parts, ranges)]
+            finally:
+                _init_worker(None, {}, None)
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), initializer=_init_worker,
+                                     initargs=(store, titles or {}, only)) as pool:
+                futures = [pool.submit(_export_shard, report, fmt, compression, part, start, stop)
+                           for part, (start, stop) in zip(parts, ranges)]
+                counts = [future.result() for future in futures]
+        _merge(path, parts, counts, report, fmt, compression)
+    finally:
+        for part in parts:
+            if os.path.exists(part):
+                os.remove(part)
+    return ExportResult(path, sum(counts), len(ranges))
+
+
+def _merge(path: str, parts: List[str], counts: List[int], report: str, fmt: str,
+           compression: Optional[str]):
+    compress = _COMPRESSORS[compression]
+
+    def piece(text: str) -> bytes:
+        return compress(text.encode("utf-8")) if text else b""
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as out:
+        out.write(piece(_header(report, fmt)))
+        wrote_any = False
+        for part, count in zip(parts, counts):
+            if not count:
+                continue
+            if fmt == "json" and wrote_any:
+                out.write(piece(",\n"))
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, 1 << 20)
+            wrote_any = True
+        if fmt == "json":
+            out.write(piece("\n]\n"))
+    os.replace(tmp, path)
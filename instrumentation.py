@@ -0,0 +1,423 @@
+"""
+Opt-in instrumentation of the hot paths.
+
+Nothing is measured until enable() is called, and until then there is no
+overhead at all. The model classes carry no decorators and no "is it on?"
+checks. Instead, enable() replaces each probed method on its class with a
+timing wrapper, and disable() puts the original function back.
+
+While enabled, every probed call records:
+    - a call counter and an error counter
+    - a latency histogram (seconds, Prometheus-style buckets)
+    - every Nth call with sample_allocations=N: the bytes allocated during
+      the call, via tracemalloc. tracemalloc itself slows every allocation
+      while it runs, so leave this off when measuring latency.
+    - a span on the current Trace, if the call runs inside `with trace():`
+
+Metrics can be written as a Prometheus text file (for node_exporter's
+textfile collector) or as a JSON snapshot.
+
+Probes are "module:Class.method" strings (DEFAULT_PROBES covers
+add_review, average_rating, container add_item, search and the Library
+load path). Modules are imported only when enable() runs.
+
+The profile command runs benchmark workloads under cProfile (and
+optionally tracemalloc) with the probes on:
+
+    python -m review_system profile --workload add_review,search --scale 100000
+    python -m review_system profile --metrics metrics.prom --pstats run.pstats
+
+Example:
+    >>> from media_system import MediaItem, Review
+    >>> enable()
+    >>> with trace("req-1") as t:
+    ...     item = MediaItem("m1", "Dune", "book")
+    ...     item.add_review(Review("m1", "ali", 5))
+    >>> disable()
+    >>> METRICS.snapshot()["media_system.MediaItem.add_review"]["calls"]
+    1
+    >>> [span.name for span in t.spans]
+    ['media_system.MediaItem.add_review']
+    >>> METRICS.reset()
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_PROBES = (
+    "media_system:MediaItem.add_review",
+    "media_system:MediaItem.average_rating",
+    "base_classes:AbstractMediaItem.add_review",
+    "containers:FavoritesContainer.add_item",
+    "containers:WatchlistContainer.add_item",
+    "catalog:Catalog.add_item",
+    "catalog:Catalog.add_review",
+    "catalog:Catalog.find",
+    "review_search:ReviewIndex.search",
+    "cattaloglibrary:Library.from_list",
+)
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2,
+                   2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5)
+ALLOCATION_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1 << 20, 4 << 20, 16 << 20)
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] is the number of values <= buckets[i] (last: the rest)."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty or past the last bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return None
+
+
+class Metrics:
+    """Counters and histograms of the probed calls, keyed by probe name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.allocated: Dict[str, Histogram] = {}
+
+    def record(self, name: str, seconds: float, failed: bool, allocated: Optional[int] = None):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if failed:
+                self.errors[name] = self.errors.get(name, 0) + 1
+            histogram = self.latency.get(name)
+            if histogram is None:
+                histogram = self.latency[name] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+            if allocated is not None:
+                histogram = self.allocated.get(name)
+                if histogram is None:
+                    histogram = self.allocated[name] = Histogram(ALLOCATION_BUCKETS)
+                histogram.observe(allocated)
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+            self.latency.clear()
+            self.allocated.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """{probe: {calls, errors, total_s, mean_s, p50_s, p99_s, buckets, [allocations]}}"""
+        with self._lock:
+            result = {}
+            for name, calls in self.calls.items():
+                latency = self.latency[name]
+                entry = {"calls": calls, "errors": self.errors.get(name, 0), "total_s": latency.sum,
+                         "mean_s": latency.sum / latency.count, "p50_s": latency.quantile(0.5),
+                         "p99_s": latency.quantile(0.99),
+                         "buckets": dict(zip(map(str, latency.buckets + ("+Inf",)), latency.counts))}
+                allocated = self.allocated.get(name)
+                if allocated is not None:
+                    entry["allocations"] = {"samples": allocated.count, "total_bytes": allocated.sum,
+                                            "mean_bytes": allocated.sum / allocated.count}
+                result[name] = entry
+            return result
+
+    def to_prometheus(self, prefix: str = "review_system") -> str:
+        """Render in the Prometheus text exposition format."""
+        lines = [f"# HELP {prefix}_calls_total Calls of an instrumented entry point.",
+                 f"# TYPE {prefix}_calls_total counter"]
+        with self._lock:
+            names = sorted(self.calls)
+            lines += [f'{prefix}_calls_total{{probe="{n}"}} {self.calls[n]}' for n in names]
+            lines += [f"# HELP {prefix}_errors_total Calls that raised.", f"# TYPE {prefix}_errors_total counter"]
+            lines += [f'{prefix}_errors_total{{probe="{n}"}} {self.errors.get(n, 0)}' for n in names]
+            for metric, histograms, help_text in (
+                    ("latency_seconds", self.latency, "Wall-clock latency of a call."),
+                    ("allocated_bytes", self.allocated, "Bytes allocated during a sampled call.")):
+                lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} histogram"]
+                for name in sorted(histograms):
+                    histogram = histograms[name]
+                    cumulative = 0
+                    for bound, n in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        cumulative += n
+                        lines.append(f'{prefix}_{metric}_bucket{{probe="{name}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{prefix}_{metric}_sum{{probe="{name}"}} {histogram.sum}')
+                    lines.append(f'{prefix}_{metric}_count{{probe="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write atomically: Prometheus text for *.prom, otherwise a JSON snapshot."""
+        if path.endswith(".prom"):
+            text = self.to_prometheus()
+        else:
+            import json
+            text = json.dumps(self.snapshot(), indent=2)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+METRICS = Metrics()
+
+
+# ----------------------------------------------------------------------
+# trace context
+
+class Span(NamedTuple):
+    name: str
+    start: float      # seconds since the trace started
+    duration: float
+    depth: int        # 0 for calls made directly inside the trace
+
+
+class Trace:
+    """The probed calls made inside one `with trace():` block, e.g. one request."""
+
+    def __init__(self, trace_id: Optional[str] = None, max_spans: int = 10_000):
+        self.trace_id = trace_id or os.urandom(8).hex()
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.started = time.perf_counter()
+        self._depth = 0
+
+    def _add(self, name: str, start: float, duration: float, depth: int):
+        if len(self.spans) < self.max_spans:
+            self.spans.append(Span(name, start - self.started, duration, depth))
+        else:
+            self.dropped += 1
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("review_system_trace", default=None)
+
+
+@contextmanager
+def trace(trace_id: Optional[str] = None, max_spans: int = 10_000) -> Iterator[Trace]:
+    """Collect spans of the probed calls made in this block (per thread / asyncio task)."""
+    current = Trace(trace_id, max_spans)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+# ----------------------------------------------------------------------
+# enabling and disabling probes
+
+_lock = threading.Lock()
+_installed: List[Tuple[type, str, Any]] = []     # (owner, attribute, original) to restore
+_started_tracemalloc = False
+
+
+def is_enabled() -> bool:
+    return bool(_installed)
+
+
+def _wrap(func, name: str, metrics: Metrics, sample_every: int):
+    record = metrics.record
+    clock = time.perf_counter
+    counter = [0]
+    if sample_every:
+        import tracemalloc
+
+    @functools.wraps(func)
+    def probe(*args, **kwargs):
+        current = _current_trace.get()
+        allocated = None
+        sampled = False
+        if sample_every:
+            counter[0] += 1
+            sampled = counter[0] % sample_every == 0
+            if sampled:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+        depth = 0
+        if current is not None:
+            depth = current._depth
+            current._depth += 1
+        failed = True
+        start = clock()
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = clock() - start
+            if sampled:
+                allocated = max(tracemalloc.get_traced_memory()[1] - before, 0)
+            record(name, elapsed, failed, allocated)
+            if current is not None:
+                current._depth = depth
+                current._add(name, start, elapsed, depth)
+
+    return probe
+
+
+def _resolve(spec: str) -> Tuple[type, str, Any, str]:
+    module_name, _, path = spec.partition(":")
+    class_name, _, attr = path.rpartition(".")
+    if not (module_name and class_name and attr):
+        raise ValueError(f"probe {spec!r} is not of the form 'module:Class.method'")
+    owner = __import__(module_name)
+    for part in class_name.split("."):
+        owner = getattr(owner, part)
+    if attr not in vars(owner):
+        raise ValueError(f"{spec}: {class_name} does not define {attr} itself")
+    return owner, attr, vars(owner)[attr], f"{module_name}.{class_name}.{attr}"
+
+
+def enable(probes: Iterable[str] = DEFAULT_PROBES, sample_allocations: int = 0,
+           metrics: Optional[Metrics] = None):
+    """Install the probes; calling it again first removes the previous ones.
+
+    Args:
+        probes: "module:Class.method" strings
+        sample_allocations (int): measure allocations on every Nth call of each probe; 0 = never
+        metrics: where to record; the module-wide METRICS by default
+    """
+    global _started_tracemalloc
+    metrics = METRICS if metrics is None else metrics
+    resolved = [_resolve(spec) for spec in probes]
+    with _lock:
+        _uninstall()
+        if sample_allocations:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracemalloc = True
+        for owner, attr, original, name in resolved:
+            if isinstance(original, (classmethod, staticmethod)):
+                wrapped = type(original)(_wrap(original.__func__, name, metrics, sample_allocations))
+            else:
+                wrapped = _wrap(original, name, metrics, sample_allocations)
+            setattr(owner, attr, wrapped)
+            _installed.append((owner, attr, original))
+
+
+def disable():
+    """Restore the original methods (metrics recorded so far are kept)."""
+    with _lock:
+        _uninstall()
+
+
+def _uninstall():
+    global _started_tracemalloc
+    while _installed:
+        owner, attr, original = _installed.pop()
+        setattr(owner, attr, original)
+    if _started_tracemalloc:
+        import tracemalloc
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+@contextmanager
+def instrumented(probes: Iterable[str] = DEFAULT_PROBES, sample_allocations: int = 0,
+                 metrics: Optional[Metrics] = None) -> Iterator[Metrics]:
+    """enable() for the duration of a block; yields the Metrics being recorded to."""
+    enable(probes, sample_allocations, metrics)
+    try:
+        yield METRICS if metrics is None else metrics
+    finally:
+        disable()
+
+
+# ----------------------------------------------------------------------
+# profile command
+
+def profile(argv: Optional[List[str]] = None) -> int:
+    """Run benchmark workloads under cProfile with the probes enabled and report."""
+    import argparse
+    import cProfile
+    import pstats
+
+    import benchmarks
+
+    parser = argparse.ArgumentParser(prog="python -m review_system profile",
+                                     description="Profile benchmark workloads with instrumentation on.")
+    parser.add_argument("--workload", default="add_review,average_rating,container_add_remove,search",
+                        help="comma-separated benchmark names (see benchmarks.py --list)")
+    parser.add_argument("--scale", type=int, default=10_000, help="number of synthetic reviews")
+    parser.add_argument("--top", type=int, default=25, help="functions to list")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key")
+    parser.add_argument("--pstats", help="also save the raw cProfile stats here")
+    parser.add_argument("--metrics", help="write probe metrics here (*.prom or JSON)")
+    parser.add_argument("--tracemalloc", action="store_true", help="report the top allocation sites")
+    parser.add_argument("--sample-allocations", type=int, default=0, metavar="N",
+                        help="record allocations on every Nth probed call")
+    args = parser.parse_args(argv)
+
+    names = args.workload.split(",")
+    unknown = [n for n in names if n not in benchmarks._BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(unknown)}")
+    workload = benchmarks.Workload(args.scale, repeats=1)
+
+    if args.tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    with instrumented(sample_allocations=args.sample_allocations) as metrics:
+        profiler.enable()
+        try:
+            for name in names:
+                benchmarks._BENCHMARKS[name](workload)
+        finally:
+            profiler.disable()
+    if args.tracemalloc:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+    stats = pstats.Stats(profiler)
+    stats.sort_stats(args.sort).print_stats(args.top)
+    if args.pstats:
+        stats.dump_stats(args.pstats)
+    if args.tracemalloc:
+        print("Top allocation sites:")
+        for stat in snapshot.statistics("lineno")[:args.top]:
+            print(f"  {stat}")
+    print(f"{'probe':<45} {'calls':>9} {'errors':>6} {'mean':>10} {'p50<=':>10} {'p99<=':>10}")
+    for name, entry in sorted(metrics.snapshot().items()):
+        p50 = "-" if entry["p50_s"] is None else f"{entry['p50_s'] * 1e6:.1f}us"
+        p99 = "-" if entry["p99_s"] is None else f"{entry['p99_s'] * 1e6:.1f}us"
+        print(f"{name:<45} {entry['calls']:>9} {entry['errors']:>6} {entry['mean_s'] * 1e6:>8.2f}us "
+              f"{p50:>10} {p99:>10}")
+    if args.metrics:
+        metrics.write(args.metrics)
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] != ["profile"]:
+        sys.exit("usage: python -m instrumentation profile [options]")
+    sys.exit(profile(sys.argv[2:]))
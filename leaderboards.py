@@ -0,0 +1,186 @@
+"""
+Incrementally maintained top-N leaderboards.
+
+Leaderboards keeps three rankings of media_system.MediaItem objects:
+
+    most_reviewed   number of reviews
+    top_rated       Bayesian average rating, (C * m + sum) / (C + n), which
+                    pulls items with few reviews towards the prior mean m
+    most_engaged    an engagement score (total stars given, by default)
+
+Each ranking is kept for the whole catalog and again per genre and per
+media_type, in views.SortedIndex structures. A new review re-files its item
+in each ranking it appears in (up to 3 boards x 3 scopes), each in O(log n)
+time: a bisect plus a shift within one bounded block. Reading the top k
+costs O(log n + k), so there is no per-request Counter or sort over every
+review.
+
+Subscribe it to a catalog.Catalog to follow new items and reviews
+automatically, or feed it with add_item/update.
+
+Example:
+    >>> from media_system import MediaItem, Review
+    >>> boards = Leaderboards()
+    >>> dune = MediaItem("m1", "Dune", "book", metadata={"genre": "Sci-Fi"})
+    >>> boards.add_item(dune)
+    >>> dune.add_review(Review("m1", "ali", 5)); boards.update(dune)
+    >>> [(item.title, score) for item, score in boards.top("most_reviewed", k=3, genre="sci-fi")]
+    [('Dune', 1)]
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from views import ItemsView, SortedIndex
+
+BOARDS = ("most_reviewed", "top_rated", "most_engaged")
+
+
+def _norm(value: Any) -> Any:
+    return value.casefold() if isinstance(value, str) else value
+
+
+def _genre_of(item) -> Any:
+    metadata = getattr(item, "metadata", None)
+    if metadata is not None and "genre" in metadata:
+        return metadata["genre"]
+    return getattr(item, "genre", None)
+
+
+def total_stars(item) -> float:
+    """Default engagement score: the sum of every review's stars."""
+    average = item.average_rating()
+    return average * item.review_count() if average is not None else 0.0
+
+
+class Leaderboards:
+    """Top-N rankings per board, optionally sliced by genre or media_type.
+
+    Args:
+        prior_mean (float): m in the Bayesian average; a fixed prior keeps
+            each update local to one item
+        prior_weight (float): C in the Bayesian average, in reviews
+        engagement (callable): item -> engagement score; defaults to
+            total_stars
+    """
+
+    def __init__(self, prior_mean: float = 3.0, prior_weight: float = 5.0,
+                 engagement: Optional[Callable[[Any], float]] = None):
+        if prior_weight < 0:
+            raise ValueError("prior_weight must not be negative")
+        self.prior_mean = prior_mean
+        self.prior_weight = prior_weight
+        self.engagement = engagement or total_stars
+        self._items: Dict[Hashable, Any] = {}
+        self._scopes: Dict[Hashable, Tuple[Tuple[str, Any], ...]] = {}
+        # (board, scope) -> SortedIndex of (-score, item_id); scope None is the whole catalog
+        self._boards: Dict[Tuple[str, Any], SortedIndex] = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    # ------------------------------------------------------------------
+    # updates (also the catalog listener interface)
+
+    def add_item(self, item):
+        """Start ranking an item (re-ranks it if already present)."""
+        item_id = item.item_id
+        if item_id in self._items:
+            self.remove_item(item_id)
+        self._items[item_id] = item
+        scopes = [None]
+        genre = _genre_of(item)
+        if genre is not None:
+            scopes.append(("genre", _norm(genre)))
+        scopes.append(("media_type", _norm(item.media_type)))
+        self._scopes[item_id] = tuple(scopes)
+        self._file(item)
+
+    def update(self, item):
+        """Re-rank an item after its reviews changed."""
+        if item.item_id not in self._items:
+            raise KeyError(item.item_id)
+        self._file(item)
+
+    def remove_item(self, item_id: Hashable):
+        self._items.pop(item_id)
+        for scope in self._scopes.pop(item_id):
+            for board in BOARDS:
+                index = self._boards[board, scope]
+                index.remove(item_id)
+                if not len(index):
+                    del self._boards[board, scope]
+
+    def on_add_item(self, item):
+        self.add_item(item)
+
+    def on_remove_item(self, item):
+        self.remove_item(item.item_id)
+
+    def on_add_review(self, item, review):
+        self.update(item)
+
+    def on_refresh_item(self, item):
+        # e.g. reviews removed directly on the item: rank it afresh
+        self.add_item(item)
+
+    # ------------------------------------------------------------------
+    # reads
+
+    def top(self, board: str, k: int = 10, genre: Any = None,
+            media_type: Any = None) -> List[Tuple[Any, float]]:
+        """Return up to k (item, score) pairs, best first; ties by item_id."""
+        index = self._index(board, genre, media_type)
+        if index is None:
+            return []
+        items = self._items
+        return [(items[item_id], -index.key_of(item_id)) for item_id in index.idents(0, k)]
+
+    def view(self, board: str, genre: Any = None, media_type: Any = None) -> ItemsView:
+        """Lazy view of a whole ranking (items only), for slicing and paging."""
+        index = self._index(board, genre, media_type)
+        return ItemsView.over_sorted(index if index is not None else SortedIndex(), self._items.__getitem__)
+
+    def score(self, board: str, item_id: Hashable) -> float:
+        """Return an item's current score on a board."""
+        if board not in BOARDS:
+            raise ValueError(f"unknown board {board!r}; choose from {BOARDS}")
+        return -self._boards[board, None].key_of(item_id)
+
+    def bayesian_average(self, item) -> float:
+        count = item.review_count()
+        average = item.average_rating() or 0.0
+        weight = self.prior_weight
+        if not count and not weight:
+            return 0.0
+        return (weight * self.prior_mean + average * count) / (weight + count)
+
+    # ------------------------------------------------------------------
+    # internals
+
+    def _index(self, board: str, genre: Any, media_type: Any) -> Optional[SortedIndex]:
+        if board not in BOARDS:
+            raise ValueError(f"unknown board {board!r}; choose from {BOARDS}")
+        if genre is not None and media_type is not None:
+            raise ValueError("slice by genre or by media_type, not both")
+        scope = None
+        if genre is not None:
+            scope = ("genre", _norm(genre))
+        elif media_type is not None:
+            scope = ("media_type", _norm(media_type))
+        return self._boards.get((board, scope))
+
+    def _file(self, item):
+        item_id = item.item_id
+        scores = {
+            "most_reviewed": item.review_count(),
+            "top_rated": self.bayesian_average(item),
+            "most_engaged": self.engagement(item),
+        }
+        boards = self._boards
+        for scope in self._scopes[item_id]:
+            for board, score in scores.items():
+                index = boards.get((board, scope))
+                if index is None:
+                    index = boards[board, scope] = SortedIndex()
+                # negated so the best entries come first in the index
+                index.add(item_id, -score)
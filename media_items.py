@@ -2,8 +2,10 @@
 
 from abc import ABC, abstractmethod
 
+from base_classes import EngagementMixin, memoized_engagement, rank_by_engagement  # noqa: F401 (re-exported)
 
-class AbstractMediaItem(ABC):
+
+class AbstractMediaItem(EngagementMixin, ABC):
     """Abstract base class for all media items."""
 
     def __init__(self, item_id, title, creator, genre, release_year):
@@ -13,6 +15,8 @@ class AbstractMediaItem(ABC):
         self.genre = genre
         self.release_year = release_year
         self.reviews = []
+        self._review_version = 0
+        self._engagement_cache = None
 
     @abstractmethod
     def get_media_type(self):
@@ -32,6 +36,7 @@ class AbstractMediaItem(ABC):
 
     def add_review(self, review):
         self.reviews.append(review)
+        self.invalidate_engagement()
 
     def __str__(self):
         return f"{self.title} ({self.release_year}) by {self.creator}"
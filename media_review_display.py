@@ -2,7 +2,11 @@
 Class for displaying and managing media reviews, including validation, average rating updates, and formatted output.
 """
 
-feature/media-review-display-class.py
+import sys
+
+from rendering import render_reviews
+
+
 class MediaReviewDisplay:
 
     def __init__(self, title, average_rating, reviews=None):
@@ -13,12 +17,18 @@ class MediaReviewDisplay:
             raise ValueError("Average rating must be a number between 0 and 5")
         if reviews is None:
             reviews = []
-        elif not isinstance(reviews, list):
+        elif not isinstance(reviews, list) or not all(isinstance(r, dict) for r in reviews):
             raise ValueError("Reviews must be a list of dictionaries")
 
         self._title = title
         self._average_rating = float(average_rating)
-        self._reviews = reviews
+        # a private copy, so the running totals cannot drift from the list they describe
+        self._reviews = list(reviews)
+        # running totals so adding a review does not re-sum every rating;
+        # reviews without a rating (shown as "N/A") are left out of the average
+        rated = [r["rating"] for r in self._reviews if "rating" in r]
+        self._rating_total = sum(rated)
+        self._rated_count = len(rated)
 
     @property
     def title(self):
@@ -38,8 +48,8 @@ class MediaReviewDisplay:
 
     @property
     def reviews(self):
-        """list: Get the list of reviews (read-only)."""
-        return self._reviews
+        """list: Get a copy of the list of reviews (read-only)."""
+        return list(self._reviews)
 
     def add_review(self, user, rating, comment=""):
         """Add a new review and update average rating."""
@@ -47,39 +57,31 @@ class MediaReviewDisplay:
             raise ValueError("Rating must be between 0 and 5")
         review = {"user": user, "rating": rating, "comment": comment}
         self._reviews.append(review)
+        self._rating_total += rating
+        self._rated_count += 1
         self._update_average_rating()
 
     def _update_average_rating(self):
-        """Recalculate the average rating based on reviews."""
-        if not self._reviews:
+        """Recalculate the average rating from the running total."""
+        if not self._rated_count:
             self._average_rating = 0
         else:
-            total = sum(r["rating"] for r in self._reviews)
-            self._average_rating = round(total / len(self._reviews), 2)
-
-    def display(self):
-        """Print a nicely formatted review section."""
-        print("=" * 60)
-        print(f"🎬  {self._title.upper()}  🎬".center(60))
-        print("=" * 60)
-        print(f"⭐ Average Rating: {self._average_rating:.2f}/5")
-        print("-" * 60)
-
-        if not self._reviews:
-            print("No reviews available.")
-        else:
-            for i, review in enumerate(self._reviews, start=1):
-                user = review.get("user", "Anonymous")
-                rating = review.get("rating", "N/A")
-                comment = review.get("comment", "(No comment)")
-                print(f"\n🧾 Review #{i}")
-                print(f"👤 User: {user}")
-                print(f"⭐ Rating: {rating}/5")
-                print(f"💬 Comment: {comment}")
-                print("-" * 60)
-
-        print("End of Reviews".center(60, "="))
-        print("\n")
+            self._average_rating = round(self._rating_total / self._rated_count, 2)
+
+    def display(self, out=None, start=0, limit=None, template="plain"):
+        """Write a formatted review section (to stdout by default).
+
+        Args:
+            out: text stream to write to
+            start (int): index of the first review to show
+            limit (int, optional): most reviews to show; all if None
+            template (str): "plain", "markdown" or "json" (see rendering.TEMPLATES)
+
+        Returns:
+            int or None: start of the next page, or None if every review was shown
+        """
+        return render_reviews(out or sys.stdout, self._title, self._reviews, template,
+                              average=self._average_rating, start=start, limit=limit)
 
     def __str__(self):
         return f"{self._title} - Avg Rating: {self._average_rating:.2f}/5"
@@ -98,6 +100,3 @@ if __name__ == "__main__":
     media.add_review("Charlie", 5, "Masterpiece!")
     print(media)
     print(repr(media))
-
-git commit -m "Add MediaReviewDisplay class with validation, encapsulation, and Project 1 integration"
-git push origin feature/media-review-display-class
@@ -8,6 +8,10 @@ Composition is chosen over inheritance because:
 - MediaReviewDisplay is not a type of MediaItem or User.
 - We want flexible relationships
 """
+import sys
+
+from rendering import Template, render_reviews
+
 # demo of classes
 class Review:
     # represents a review for a media item
@@ -25,19 +29,20 @@ class MediaItem:
         self.item_id = item_id
         self.title = title
         self._reviews = []  # composition: MediaItem "has-a" list of Review objects
+        self._rating_sum = 0  # running total, so average_rating() does not re-sum
 
     def add_review(self, review):
         # attach a Review instance to this MediaItem
         if review.media_item_id != self.item_id:
             raise ValueError("Review does not belong to this MediaItem")
         self._reviews.append(review)  # composition: linking MediaItem to Review
+        self._rating_sum += review.stars
 
     def average_rating(self):
         # return the average star rating or None if no reviews
         if not self._reviews:
             return None
-        total = sum(r.stars for r in self._reviews)
-        return total / len(self._reviews)
+        return self._rating_sum / len(self._reviews)
 
     def review_count(self):
         return len(self._reviews)
@@ -61,14 +66,31 @@ class MediaReviewDisplay:
         self.media_item = media_item      # composition: Display "has-a" MediaItem
         self.display_reviews = media_item._reviews  # composition: Display "has-a" list of Review objects
 
-    def show_reviews(self):
-        print(f"\n=== Reviews for {self.media_item.title} ===")
-        if not self.display_reviews:
-            print("No reviews yet.")
-            return
-        for r in self.display_reviews:
-            print(f"User: {r.user}, Stars: {r.stars}, Comment: {r.comment}")
-        print(f"Average Rating: {self.media_item.average_rating():.2f} ({self.media_item.review_count()} reviews)")
+    def show_reviews(self, out=None, start=0, limit=None):
+        # streamed through rendering.render_reviews; returns the start of the next page (or None)
+        out = out or sys.stdout
+        next_start = render_reviews(out, self.media_item.title, self.display_reviews, _REVIEW_LIST,
+                                    start=start, limit=limit)
+        if self.display_reviews and next_start is None:
+            out.write(f"Average Rating: {self.media_item.average_rating():.2f} "
+                      f"({self.media_item.review_count()} reviews)\n")
+        return next_start
+
+
+class _ReviewListTemplate(Template):
+    # the original show_reviews layout
+
+    def header(self, title, average, total):
+        return f"\n=== Reviews for {title} ===\n"
+
+    def review(self, number, position, fields, review):
+        return f"User: {review.user}, Stars: {review.stars}, Comment: {review.comment}\n"
+
+    def empty(self):
+        return "No reviews yet.\n"
+
+
+_REVIEW_LIST = _ReviewListTemplate()
 
 # demo of composition
 def demonstrate_composition():
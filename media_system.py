@@ -1,5 +1,7 @@
 from typing import List, Dict, Any, Optional
 
+from title_index import normalize_title
+
 class MediaItem:
     """Represents a media item (movie, book, album, etc.)
 
@@ -27,10 +29,21 @@ class MediaItem:
 
         self._item_id = item_id.strip()
         self._title = title.strip()
+        self._normalized_title: Optional[str] = None  # computed on first use, reset by the title setter
         self._media_type = media_type
         self._tags = list(tags) if tags else []
         self._metadata = dict(metadata) if metadata else {}
-        self._reviews: List["Review"] = []
+        # id(review) -> review, in the order added; keyed by identity so that
+        # remove_review and edit_review find a review in O(1)
+        self._reviews: Dict[int, "Review"] = {}
+        # running rating aggregates, kept in step with _reviews by
+        # add_review / remove_review / edit_review
+        self._rating_count = 0
+        self._rating_sum = 0.0
+        self._rating_sumsq = 0.0
+        self._rating_min: Optional[float] = None
+        self._rating_max: Optional[float] = None
+        self._rating_hist: Dict[float, int] = {}
 
     @property
     def item_id(self) -> str:
@@ -45,6 +58,11 @@ class MediaItem:
         if not new or not isinstance(new, str):
             raise ValueError("title must be a non-empty string")
         self._title = new.strip()
+        self._normalized_title = None
+
+    @property
+    def media_type(self) -> str:
+        return self._media_type
 
     @property
     def tags(self) -> List[str]:
@@ -54,6 +72,10 @@ class MediaItem:
     def metadata(self) -> Dict[str, Any]:
         return dict(self._metadata)
 
+    @property
+    def reviews(self) -> List["Review"]:
+        return list(self._reviews.values())
+
     def add_tag(self, tag: str):
         if not tag or not isinstance(tag, str):
             raise ValueError("tag must be non-empty string")
@@ -66,21 +88,98 @@ class MediaItem:
             raise TypeError("review must be a Review instance")
         if review.media_item_id != self._item_id:
             raise ValueError("Review.media_item_id does not match this MediaItem.item_id")
-        self._reviews.append(review)
+        if id(review) in self._reviews:
+            raise ValueError("review is already attached to this MediaItem")
+        self._reviews[id(review)] = review
+        self._track_rating(review.stars)
+
+    def remove_review(self, review: "Review"):
+        """Detach a Review from this MediaItem and reverse its rating aggregates."""
+        if self._reviews.pop(id(review), None) is not review:
+            raise ValueError("review is not attached to this MediaItem")
+        self._untrack_rating(review.stars)
+
+    def edit_review(self, review: "Review", stars: Optional[float] = None,
+                    comment: Optional[str] = None):
+        """Change the stars and/or comment of an attached Review.
+
+        Stars must be edited through here (not on the Review directly) so the
+        rating aggregates stay consistent.
+        """
+        if self._reviews.get(id(review)) is not review:
+            raise ValueError("review is not attached to this MediaItem")
+        if stars is not None:
+            Review._validate_stars(stars)
+            self._untrack_rating(review.stars)
+            review._stars = stars
+            self._track_rating(stars)
+        if comment is not None:
+            review.comment = comment
+
+    def _track_rating(self, stars: float):
+        self._rating_count += 1
+        self._rating_sum += stars
+        self._rating_sumsq += stars * stars
+        self._rating_hist[stars] = self._rating_hist.get(stars, 0) + 1
+        if self._rating_min is None or stars < self._rating_min:
+            self._rating_min = stars
+        if self._rating_max is None or stars > self._rating_max:
+            self._rating_max = stars
+
+    def _untrack_rating(self, stars: float):
+        self._rating_count -= 1
+        if not self._rating_count:
+            # reset exactly instead of carrying float residue forward
+            self._rating_sum = 0.0
+            self._rating_sumsq = 0.0
+            self._rating_min = self._rating_max = None
+            self._rating_hist.clear()
+            return
+        self._rating_sum -= stars
+        self._rating_sumsq -= stars * stars
+        left = self._rating_hist[stars] - 1
+        if left:
+            self._rating_hist[stars] = left
+        else:
+            del self._rating_hist[stars]
+            # the histogram only has as many keys as distinct star values
+            if stars == self._rating_min:
+                self._rating_min = min(self._rating_hist)
+            if stars == self._rating_max:
+                self._rating_max = max(self._rating_hist)
 
     def average_rating(self) -> Optional[float]:
         """Return the average star rating or None if no reviews."""
-        if not self._reviews:
+        if not self._rating_count:
             return None
-        s = sum(r.stars for r in self._reviews)
-        return s / len(self._reviews)
+        return self._rating_sum / self._rating_count
+
+    def rating_variance(self) -> Optional[float]:
+        """Return the population variance of star ratings or None if no reviews."""
+        if not self._rating_count:
+            return None
+        mean = self._rating_sum / self._rating_count
+        # clamp tiny negative values caused by float cancellation
+        return max(self._rating_sumsq / self._rating_count - mean * mean, 0.0)
+
+    def min_rating(self) -> Optional[float]:
+        return self._rating_min
+
+    def max_rating(self) -> Optional[float]:
+        return self._rating_max
+
+    def rating_distribution(self) -> Dict[float, int]:
+        """Return a {stars: count} histogram of this item's ratings."""
+        return dict(sorted(self._rating_hist.items()))
 
     def review_count(self) -> int:
-        return len(self._reviews)
+        return self._rating_count
 
     def normalized_title(self) -> str:
-        """Integration point: use Project 1 normalization function."""
-        return project1_normalize_title(self._title)
+        """Title as matched against user input (see title_index.normalize_title); cached."""
+        if self._normalized_title is None:
+            self._normalized_title = normalize_title(self._title)
+        return self._normalized_title
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -101,6 +200,47 @@ class MediaItem:
     def __repr__(self):
         return f"MediaItem({self._item_id!r}, {self._title!r}, {self._media_type!r})"
 
+
+class Review:
+    """A single user review of a MediaItem.
+
+    Attributes:
+        media_item_id (str): item_id of the reviewed MediaItem
+        user (str): reviewer username
+        stars (float): star rating on a 0-5 scale (read-only; change it with
+            MediaItem.edit_review so the item's aggregates stay in sync)
+        comment (str): free-text review body
+
+    Example:
+        >>> r = Review("m1", "ali", 5, "Amazing!")
+        >>> r.stars
+        5
+    """
+
+    # reviews are by far the most numerous objects, so skip the per-instance __dict__
+    __slots__ = ("media_item_id", "user", "_stars", "comment")
+
+    def __init__(self, media_item_id: str, user: str, stars: float, comment: str = ""):
+        if not isinstance(media_item_id, str) or not media_item_id.strip():
+            raise ValueError("media_item_id must be a non-empty string")
+        self._validate_stars(stars)
+        self.media_item_id = media_item_id.strip()
+        self.user = user
+        self._stars = stars
+        self.comment = comment
+
+    @staticmethod
+    def _validate_stars(stars):
+        if isinstance(stars, bool) or not isinstance(stars, (int, float)) or not 0 <= stars <= 5:
+            raise ValueError("stars must be a number between 0 and 5")
+
+    @property
+    def stars(self) -> float:
+        return self._stars
+
+    def __repr__(self):
+        return f"Review({self.media_item_id!r}, {self.user!r}, {self._stars!r})"
+
 """
 ---------------------------------------------------------------------------------------------------------------------------------
 Eli's code below 
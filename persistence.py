@@ -0,0 +1,418 @@
+"""
+Append-only persistence for the media library (see data_persistence.md).
+
+Instead of rewriting media_library.json on every change, LibraryStore appends
+each mutation (add_item, add_tag, add_review) to a write-ahead log and keeps
+the in-memory Catalog as the live state. Pending log records are written
+and fsync'ed together (group commit) by a background flusher. A compaction
+step cuts the log over to a new segment, then, in a background thread,
+rebuilds the state from the previous snapshot and the closed segments,
+writes it as the new snapshot and retires those segments. It never reads
+the live Catalog, so writers only wait for the cutover. On startup the
+snapshot is loaded and the log tail is replayed.
+
+On-disk layout inside the store directory:
+
+    media_library.snapshot         JSON Lines: a header, then one item per line
+    media_library.wal-<seq>.log    log segment whose first record is <seq>
+
+Each log line is "<crc32 hex> <json>\\n" and carries a sequence number.
+Recovery replays records in sequence order and stops at the first record
+that is torn, fails its checksum or skips a sequence number, then truncates
+the segment there. The same files therefore always recover to the same state.
+
+Example:
+    >>> store = LibraryStore("data")                          # doctest: +SKIP
+    >>> store.add_item(MediaItem("m1", "Dune", "book"))       # doctest: +SKIP
+    >>> store.add_review(Review("m1", "ali", 5, "Classic"))   # doctest: +SKIP
+    >>> store.close()                                         # doctest: +SKIP
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from catalog import Catalog
+from media_system import MediaItem, Review
+
+SNAPSHOT_VERSION = 1
+_BASENAME = "media_library"
+
+
+class StoreError(Exception):
+    """Raised when the store's files cannot be read back."""
+
+
+def item_to_record(item: MediaItem) -> Dict[str, Any]:
+    """Serialize a MediaItem and its reviews to plain JSON types."""
+    return {
+        "item_id": item.item_id,
+        "title": item.title,
+        "media_type": item.media_type,
+        "tags": item.tags,
+        "metadata": item.metadata,
+        "reviews": [review_to_record(r) for r in item.reviews],
+    }
+
+
+def review_to_record(review: Review) -> Dict[str, Any]:
+    return {"media_item_id": review.media_item_id, "user": review.user,
+            "stars": review.stars, "comment": review.comment}
+
+
+def item_from_record(data: Dict[str, Any]) -> MediaItem:
+    item = MediaItem(data["item_id"], data["title"], data["media_type"],
+                     tags=data.get("tags"), metadata=data.get("metadata"))
+    for review in data.get("reviews", ()):
+        item.add_review(review_from_record(review))
+    return item
+
+
+def review_from_record(data: Dict[str, Any]) -> Review:
+    return Review(data["media_item_id"], data["user"], data["stars"], data.get("comment", ""))
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    payload = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+    """Return the record on a log line, or None if the line is damaged."""
+    if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def _apply_to_records(records: Dict[str, Dict[str, Any]], record: Dict[str, Any]):
+    """Apply a log record to item records, as LibraryStore._apply does to a Catalog."""
+    op, data = record["op"], record["data"]
+    if op == "add_item":
+        records[data["item_id"]] = data
+    elif op == "add_tag":
+        tags = records[data["item_id"]]["tags"]
+        if data["tag"] not in tags:
+            tags.append(data["tag"])
+    elif op == "add_review":
+        records[data["media_item_id"]]["reviews"].append(data)
+    else:
+        raise StoreError(f"unknown log operation {op!r} at seq {record['seq']}")
+
+
+class LibraryStore:
+    """A Catalog whose mutations are durably logged.
+
+    Args:
+        directory (str): where the snapshot and log segments live (created if missing)
+        catalog (Catalog, optional): empty catalog to load into; a new one by default
+        sync_interval (float): longest time (seconds) a logged change may wait for fsync
+        sync_every (int): fsync as soon as this many records are pending
+        compact_after (int): start a background compaction after this many logged
+            records; 0 disables automatic compaction
+    """
+
+    def __init__(self, directory: str, catalog: Optional[Catalog] = None,
+                 sync_interval: float = 0.05, sync_every: int = 256,
+                 compact_after: int = 100_000):
+        self.directory = directory
+        self.catalog = catalog if catalog is not None else Catalog()
+        self.sync_interval = sync_interval
+        self.sync_every = sync_every
+        self.compact_after = compact_after
+
+        self._lock = threading.Lock()          # guards catalog + sequence + pending
+        self._io_lock = threading.Lock()       # serializes writes to the segment file
+        self._wake = threading.Condition(self._lock)
+        self._pending: List[bytes] = []
+        self._seq = 0
+        self._since_snapshot = 0
+        self._closed = False
+        self._compactor: Optional[threading.Thread] = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+        self._segment = open(self._segment_path(self._seq + 1), "ab")
+        self._flusher = threading.Thread(target=self._flush_loop, name="LibraryStore-flush", daemon=True)
+        self._flusher.start()
+
+    # ------------------------------------------------------------------
+    # logged mutations
+
+    def add_item(self, item: MediaItem):
+        """Add an item to the catalog and log it."""
+        with self._lock:
+            self._check_open()
+            self.catalog.add_item(item)
+            self._log("add_item", item_to_record(item))
+
+    def add_tag(self, item_id: str, tag: str):
+        """Tag an item and log it."""
+        with self._lock:
+            self._check_open()
+            self.catalog.add_tag(item_id, tag)
+            self._log("add_tag", {"item_id": item_id, "tag": tag})
+
+    def add_review(self, review: Review):
+        """Attach a review to its item and log it."""
+        with self._lock:
+            self._check_open()
+            self.catalog.add_review(review)
+            self._log("add_review", review_to_record(review))
+
+    # ------------------------------------------------------------------
+    # durability control
+
+    def flush(self):
+        """Write and fsync every pending record before returning."""
+        with self._lock:
+            batch = self._take_batch()
+        self._write(batch)
+
+    def compact(self, wait: bool = False):
+        """Write a snapshot of the current state and drop the log it covers.
+
+        Only the switch to a new log segment happens under the lock. The
+        snapshot is rebuilt from the files in a background thread, so
+        writers are not held up, however large the catalog.
+        """
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                thread = self._compactor
+            else:
+                thread = self._start_compaction()
+        if wait:
+            thread.join()
+
+    def close(self):
+        """Flush pending records, finish any compaction and close the log."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+        self._flusher.join()
+        self.flush()
+        if self._compactor is not None:
+            self._compactor.join()
+        self._segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # internals: logging
+
+    def _check_open(self):
+        if self._closed:
+            raise StoreError("store is closed")
+
+    def _log(self, op: str, data: Dict[str, Any]):
+        # caller holds self._lock
+        self._seq += 1
+        self._since_snapshot += 1
+        self._pending.append(_encode({"seq": self._seq, "op": op, "data": data}))
+        if len(self._pending) >= self.sync_every:
+            self._wake.notify()
+        if self.compact_after and self._since_snapshot >= self.compact_after:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._start_compaction()
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                if not self._pending and not self._closed:
+                    self._wake.wait(self.sync_interval)
+                elif len(self._pending) < self.sync_every and not self._closed:
+                    # give concurrent writers a chance to join this group commit
+                    self._wake.wait(self.sync_interval)
+                batch = self._take_batch()
+                closed = self._closed
+            self._write(batch)
+            if closed:
+                return
+
+    def _take_batch(self) -> List[bytes]:
+        # caller holds self._lock. The io lock is taken before the state lock
+        # is released so batches reach the file in sequence order even if a
+        # rotation or another flush is waiting; _write releases it.
+        batch, self._pending = self._pending, []
+        self._io_lock.acquire()
+        return batch
+
+    def _write(self, batch: List[bytes]):
+        try:
+            if batch:
+                self._segment.write(b"".join(batch))
+                self._segment.flush()
+                os.fsync(self._segment.fileno())
+        finally:
+            self._io_lock.release()
+
+    def _rotate(self):
+        # caller holds self._lock; everything up to self._seq goes to the old segment
+        batch, self._pending = self._pending, []
+        with self._io_lock:
+            if batch:
+                self._segment.write(b"".join(batch))
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+            self._segment.close()
+            self._segment = open(self._segment_path(self._seq + 1), "ab")
+
+    # ------------------------------------------------------------------
+    # internals: snapshots
+
+    def _start_compaction(self) -> threading.Thread:
+        # caller holds self._lock: cut the log over; everything up to upto is in closed segments
+        self._rotate()
+        upto = self._seq
+        self._since_snapshot = 0
+        self._compactor = threading.Thread(target=self._write_snapshot, args=(upto,),
+                                           name="LibraryStore-compact", daemon=True)
+        self._compactor.start()
+        return self._compactor
+
+    def _rebuild(self, upto: int) -> List[Dict[str, Any]]:
+        """Item records as of sequence number upto, from the snapshot and closed segments."""
+        records: Dict[str, Dict[str, Any]] = {}
+        seq = self._read_snapshot(lambda record: records.__setitem__(record["item_id"], record))
+        for start, path in self._segments():
+            if start > upto:
+                break
+            with open(path, "rb") as f:
+                for line in f:
+                    record = _decode(line)
+                    if record is None:
+                        break
+                    if seq < record["seq"] <= upto:
+                        _apply_to_records(records, record)
+                        seq = record["seq"]
+        return list(records.values())
+
+    def _write_snapshot(self, upto: int):
+        state = self._rebuild(upto)
+        path = self._snapshot_path()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_encode({"version": SNAPSHOT_VERSION, "last_seq": upto,
+                             "items": len(state), "written_at": time.time()}))
+            for record in state:
+                f.write(_encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._fsync_dir()
+        segments = self._segments()
+        for (start, seg_path), (next_start, _) in zip(segments, segments[1:]):
+            if next_start - 1 <= upto:
+                os.remove(seg_path)
+
+    def _fsync_dir(self):
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.directory, os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    # ------------------------------------------------------------------
+    # internals: recovery
+
+    def _recover(self):
+        last_seq = self._load_snapshot()
+        self._seq = last_seq
+        segments = self._segments()
+        for i, (start, path) in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1][0] - 1 <= last_seq:
+                continue   # fully covered by the snapshot
+            if not self._replay_segment(path):
+                # a damaged record ends recovery; later segments cannot be applied
+                for _, later in segments[i + 1:]:
+                    os.remove(later)
+                break
+        self._since_snapshot = self._seq - last_seq
+
+    def _load_snapshot(self) -> int:
+        return self._read_snapshot(lambda record: self.catalog.add_item(item_from_record(record)))
+
+    def _read_snapshot(self, add: Callable[[Dict[str, Any]], None]) -> int:
+        """Pass each item record in the snapshot to add; return the last sequence number it covers."""
+        path = self._snapshot_path()
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as f:
+            header = _decode(f.readline())
+            if header is None or header.get("version") != SNAPSHOT_VERSION:
+                raise StoreError(f"{path} has a missing or unsupported header")
+            count = 0
+            for line in f:
+                record = _decode(line)
+                if record is None:
+                    raise StoreError(f"{path} is damaged after {count} items")
+                add(record)
+                count += 1
+        if count != header["items"]:
+            raise StoreError(f"{path} holds {count} items, header says {header['items']}")
+        return header["last_seq"]
+
+    def _replay_segment(self, path: str) -> bool:
+        """Apply a segment's records; return False if it ended in damage."""
+        good_end = 0
+        clean = True
+        with open(path, "rb") as f:
+            for line in f:
+                record = _decode(line)
+                if record is None or record.get("seq", 0) > self._seq + 1:
+                    clean = False
+                    break
+                if record["seq"] == self._seq + 1:
+                    self._apply(record)
+                    self._seq = record["seq"]
+                good_end += len(line)
+        if not clean:
+            with open(path, "r+b") as f:
+                f.truncate(good_end)
+        return clean
+
+    def _apply(self, record: Dict[str, Any]):
+        op, data = record["op"], record["data"]
+        if op == "add_item":
+            self.catalog.add_item(item_from_record(data))
+        elif op == "add_tag":
+            self.catalog.add_tag(data["item_id"], data["tag"])
+        elif op == "add_review":
+            self.catalog.add_review(review_from_record(data))
+        else:
+            raise StoreError(f"unknown log operation {op!r} at seq {record['seq']}")
+
+    # ------------------------------------------------------------------
+    # internals: paths
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, f"{_BASENAME}.snapshot")
+
+    def _segment_path(self, start: int) -> str:
+        # zero-padded so lexical order matches sequence order
+        return os.path.join(self.directory, f"{_BASENAME}.wal-{start:016d}.log")
+
+    def _segments(self):
+        pattern = os.path.join(self.directory, f"{_BASENAME}.wal-*.log")
+        found = []
+        for path in glob.glob(pattern):
+            start = os.path.basename(path)[len(_BASENAME) + 5:-4]
+            if start.isdigit():
+                found.append((int(start), path))
+        return sorted(found)
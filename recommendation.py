@@ -0,0 +1,259 @@
+"""
+Tag-based "similar titles" recommendations.
+
+RecommendationEngine keeps a tag -> items inverted index so that finding the
+items most similar to one item only touches the items that share a tag
+with it, not the whole catalog. Similarity is TF-IDF cosine over tag sets
+(rare shared tags count for more) or plain Jaccard. For very large catalogs
+an optional MinHash/LSH index narrows the candidates further to items that
+likely share most of their tags.
+
+The engine can be fed directly (add_item/add_tag) or subscribed to a
+catalog.Catalog, in which case it follows new, removed and refreshed items
+and new tags automatically.
+
+Example:
+    >>> from media_system import MediaItem
+    >>> engine = RecommendationEngine()
+    >>> engine.add_item(MediaItem("m1", "Inception", "movie", tags=["Sci-Fi", "Thriller"]))
+    >>> engine.add_item(MediaItem("m2", "Interstellar", "movie", tags=["Sci-Fi", "Drama"]))
+    >>> engine.add_item(MediaItem("m3", "Titanic", "movie", tags=["Romance", "Drama"]))
+    >>> engine.recommend_similar_titles("Inception")
+    ['Interstellar']
+"""
+
+import heapq
+import math
+import random
+import zlib
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+_PRIME = (1 << 61) - 1   # Mersenne prime above any crc32 value
+
+
+def _norm_tag(tag: str) -> str:
+    return tag.strip().casefold()
+
+
+def _norm_title(title: str) -> str:
+    return " ".join(title.split()).casefold()
+
+
+class RecommendationEngine:
+    """Top-k similar items over tag sets.
+
+    Args:
+        weighting (str): "tfidf" for IDF-weighted cosine or "jaccard"
+        use_lsh (bool): draw candidates from MinHash/LSH buckets instead of
+            the full tag postings (approximate, for very large catalogs)
+        num_perm (int): MinHash signature length
+        bands (int): LSH bands; num_perm must divide evenly into them
+        max_candidates (int): once this many candidates have been collected
+            from the rarer tags, the rest of the current tag's postings and
+            all commoner tags only re-score existing candidates instead of
+            adding new ones
+    """
+
+    def __init__(self, weighting: str = "tfidf", use_lsh: bool = False, num_perm: int = 64,
+                 bands: int = 16, max_candidates: int = 5000):
+        if weighting not in ("tfidf", "jaccard"):
+            raise ValueError("weighting must be 'tfidf' or 'jaccard'")
+        if use_lsh and num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.weighting = weighting
+        self.use_lsh = use_lsh
+        self.num_perm = num_perm
+        self.bands = bands
+        self.max_candidates = max_candidates
+        self._tags: Dict[Hashable, Set[str]] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._titles: Dict[Hashable, str] = {}
+        self._by_title: Dict[str, Set[Hashable]] = {}
+        self._signatures: Dict[Hashable, List[int]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[Hashable]] = {}
+        # MinHash permutations: the universal family (a*h + b) mod p over one
+        # crc32 base hash; a fixed seed keeps signatures stable across processes
+        rng = random.Random(num_perm)
+        self._hash_params = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(num_perm)]
+
+    def __len__(self):
+        return len(self._tags)
+
+    # ------------------------------------------------------------------
+    # updates (also the catalog listener interface)
+
+    def add_item(self, item):
+        """Index an item by its item_id, title and tags."""
+        item_id = item.item_id
+        if item_id in self._tags:
+            self.remove_item(item_id)
+        self._tags[item_id] = set()
+        self._titles[item_id] = item.title
+        self._by_title.setdefault(_norm_title(item.title), set()).add(item_id)
+        for tag in item.tags:
+            self._link(item_id, _norm_tag(tag))
+        self._rehash(item_id)
+
+    def add_tag(self, item_id: Hashable, tag: str):
+        """Record a new tag on an already indexed item."""
+        if item_id not in self._tags:
+            raise KeyError(item_id)
+        if self._link(item_id, _norm_tag(tag)):
+            self._rehash(item_id)
+
+    def remove_item(self, item_id: Hashable):
+        tags = self._tags.pop(item_id)
+        for tag in tags:
+            postings = self._postings[tag]
+            postings.discard(item_id)
+            if not postings:
+                del self._postings[tag]
+        title_key = _norm_title(self._titles.pop(item_id))
+        self._by_title[title_key].discard(item_id)
+        if not self._by_title[title_key]:
+            del self._by_title[title_key]
+        self._unbucket(item_id)
+
+    def on_add_item(self, item):
+        self.add_item(item)
+
+    def on_remove_item(self, item):
+        self.remove_item(item.item_id)
+
+    def on_add_tag(self, item, tag):
+        self.add_tag(item.item_id, tag)
+
+    def on_refresh_item(self, item):
+        # retitled or re-tagged outside the catalog: index it afresh
+        self.add_item(item)
+
+    # ------------------------------------------------------------------
+    # queries
+
+    def similar(self, item_id: Hashable, k: int = 5) -> List[Tuple[Hashable, float]]:
+        """Return up to k (item_id, score) pairs most similar to item_id."""
+        tags = self._tags.get(item_id)
+        if tags is None:
+            raise KeyError(item_id)
+        return self.similar_to_tags(tags, k, exclude={item_id})
+
+    def similar_to_tags(self, tags: Iterable[str], k: int = 5,
+                        exclude: Optional[Set[Hashable]] = None) -> List[Tuple[Hashable, float]]:
+        """Return up to k (item_id, score) pairs most similar to a tag set."""
+        query = {_norm_tag(t) for t in tags}
+        query = {t for t in query if t in self._postings}
+        exclude = exclude or set()
+        if not query:
+            return []
+        if self.use_lsh:
+            shared = self._lsh_overlap(query, exclude)
+        else:
+            shared = self._postings_overlap(query, exclude)
+        if self.weighting == "jaccard":
+            scores = ((other, len(common) / (len(query) + len(self._tags[other]) - len(common)))
+                      for other, common in shared.items())
+        else:
+            query_norm = self._norm(query)
+            scores = ((other, sum(self._idf(t) ** 2 for t in common)
+                       / (query_norm * self._norm(self._tags[other])))
+                      for other, common in shared.items())
+        best = heapq.nlargest(k, scores, key=lambda pair: pair[1])
+        return [(other, score) for other, score in best if score > 0]
+
+    def recommend_similar_titles(self, title: str, k: int = 5) -> List[str]:
+        """README-style helper: titles of the items most similar to title."""
+        ids = self._by_title.get(_norm_title(title))
+        if not ids:
+            return []
+        tags = set().union(*(self._tags[i] for i in ids))
+        return [self._titles[other] for other, _ in self.similar_to_tags(tags, k, exclude=set(ids))]
+
+    # ------------------------------------------------------------------
+    # internals
+
+    def _link(self, item_id: Hashable, tag: str) -> bool:
+        if tag in self._tags[item_id]:
+            return False
+        self._tags[item_id].add(tag)
+        self._postings.setdefault(tag, set()).add(item_id)
+        return True
+
+    def _idf(self, tag: str) -> float:
+        return math.log(1 + len(self._tags) / len(self._postings[tag]))
+
+    def _norm(self, tags: Iterable[str]) -> float:
+        return math.sqrt(sum(self._idf(t) ** 2 for t in tags)) or 1.0
+
+    def _postings_overlap(self, query: Set[str], exclude: Set[Hashable]) -> Dict[Hashable, Set[str]]:
+        # rarest tags first: they are the most informative and the cheapest
+        shared: Dict[Hashable, Set[str]] = {}
+        cap = self.max_candidates
+        for tag in sorted(query, key=lambda t: len(self._postings[t])):
+            postings = self._postings[tag]
+            if len(shared) < cap:
+                full = False
+                for other in postings:
+                    if other in exclude:
+                        continue
+                    common = shared.get(other)
+                    if common is not None:
+                        common.add(tag)
+                    elif len(shared) < cap:
+                        shared[other] = {tag}
+                    else:
+                        full = True
+                        break
+                if not full:
+                    continue
+            # enough candidates; only credit the ones we already have
+            if len(postings) < len(shared):
+                for other in postings:
+                    if other in shared:
+                        shared[other].add(tag)
+            else:
+                for other, common in shared.items():
+                    if other in postings:
+                        common.add(tag)
+        return shared
+
+    def _lsh_overlap(self, query: Set[str], exclude: Set[Hashable]) -> Dict[Hashable, Set[str]]:
+        candidates: Set[Hashable] = set()
+        for key in self._band_keys(self._signature(query)):
+            candidates |= self._buckets.get(key, set())
+        candidates -= exclude
+        shared = {}
+        for other in candidates:
+            common = query & self._tags[other]
+            if common:
+                shared[other] = common
+        return shared
+
+    def _signature(self, tags: Set[str]) -> List[int]:
+        base = [zlib.crc32(t.encode("utf-8")) for t in tags]
+        return [min((a * h + b) % _PRIME for h in base) for a, b in self._hash_params]
+
+    def _band_keys(self, signature: List[int]):
+        rows = self.num_perm // self.bands
+        return [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def _rehash(self, item_id: Hashable):
+        if not self.use_lsh:
+            return
+        self._unbucket(item_id)
+        tags = self._tags[item_id]
+        if not tags:
+            return
+        signature = self._signatures[item_id] = self._signature(tags)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(item_id)
+
+    def _unbucket(self, item_id: Hashable):
+        signature = self._signatures.pop(item_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self._buckets[key]
+            bucket.discard(item_id)
+            if not bucket:
+                del self._buckets[key]
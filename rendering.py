@@ -0,0 +1,250 @@
+"""
+Streaming review renderer.
+
+render_reviews() writes a page of reviews to any text stream (a file,
+sys.stdout, io.StringIO, ...). Output goes through a BufferedTextWriter,
+which collects small pieces and hands the stream one large write() every
+buffer_size characters. A 100k-review page is one pass over the reviews,
+with memory bounded by the buffer. There are no per-line print() calls
+and no growing result string.
+
+Templates decide the layout: "plain" (the MediaReviewDisplay look),
+"markdown" and "json". New ones subclass Template and are passed in
+directly or added to TEMPLATES.
+
+Pagination is by position: start skips reviews and limit caps the page.
+The return value is the start of the next page, or None when nothing is
+left. ReviewPager wraps this for "load more" loops.
+
+Example:
+    >>> import io
+    >>> out = io.StringIO()
+    >>> render_reviews(out, "Dune", [{"user": "ali", "rating": 5, "comment": "Classic"},
+    ...                              {"user": "bob", "rating": 4}], template="markdown", average=4.5, limit=1)
+    1
+    >>> print(out.getvalue())
+    ## Dune
+    <BLANKLINE>
+    Average rating: 4.50/5 (2 reviews)
+    <BLANKLINE>
+    1. **ali**: 5/5. Classic
+    <BLANKLINE>
+    _More reviews: continue from #2._
+    <BLANKLINE>
+"""
+
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Mapping, Optional, TextIO, Union
+
+
+class BufferedTextWriter:
+    """Collects strings and forwards them to a stream in large chunks."""
+
+    def __init__(self, stream: TextIO, buffer_size: int = 1 << 16):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._parts: List[str] = []
+        self._size = 0
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.stream.write("".join(self._parts))
+            self._parts.clear()
+            self._size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+def review_fields(review: Any) -> Dict[str, Any]:
+    """Read user/rating/comment from a dict or a review object.
+
+    Dicts may use "rating" or "stars", and "comment" or "review" (as in
+    User.save_review); objects may have .rating or .stars.
+    """
+    if isinstance(review, Mapping):
+        get = review.get
+    else:
+        def get(name, default=None):
+            return getattr(review, name, default)
+    rating = get("rating")
+    if rating is None:
+        rating = get("stars")
+    return {"user": get("user") or "Anonymous", "rating": "N/A" if rating is None else rating,
+            "comment": get("comment") or get("review") or ""}
+
+
+class Template:
+    """Layout of a rendered review page; every method returns a string."""
+
+    def header(self, title: str, average: Optional[float], total: Optional[int]) -> str:
+        return ""
+
+    def review(self, number: int, position: int, fields: Dict[str, Any], review: Any) -> str:
+        """number counts from 1 over all pages; position from 0 within this page."""
+        raise NotImplementedError
+
+    def empty(self) -> str:
+        return ""
+
+    def footer(self, rendered: int, next_start: Optional[int]) -> str:
+        return ""
+
+
+class PlainTemplate(Template):
+    """The boxed text layout used by MediaReviewDisplay.display()."""
+
+    width = 60
+
+    def header(self, title, average, total):
+        rule = "=" * self.width
+        avg = "N/A" if average is None else f"{average:.2f}"
+        return (f"{rule}\n{f'🎬  {title.upper()}  🎬'.center(self.width)}\n{rule}\n"
+                f"⭐ Average Rating: {avg}/5\n{'-' * self.width}\n")
+
+    def review(self, number, position, fields, review):
+        comment = fields["comment"] or "(No comment)"
+        return (f"\n🧾 Review #{number}\n👤 User: {fields['user']}\n⭐ Rating: {fields['rating']}/5\n"
+                f"💬 Comment: {comment}\n{'-' * self.width}\n")
+
+    def empty(self):
+        return "No reviews available.\n"
+
+    def footer(self, rendered, next_start):
+        more = f"More reviews: continue from #{next_start + 1}\n" if next_start is not None else ""
+        return f"{more}{'End of Reviews'.center(self.width, '=')}\n\n\n"
+
+
+class MarkdownTemplate(Template):
+
+    def header(self, title, average, total):
+        avg = "N/A" if average is None else f"{average:.2f}"
+        count = f" ({total} reviews)" if total is not None else ""
+        return f"## {title}\n\nAverage rating: {avg}/5{count}\n\n"
+
+    def review(self, number, position, fields, review):
+        comment = " ".join(str(fields["comment"]).split())
+        return f"{number}. **{fields['user']}**: {fields['rating']}/5" + (f". {comment}" if comment else "") + "\n"
+
+    def empty(self):
+        return "_No reviews yet._\n"
+
+    def footer(self, rendered, next_start):
+        return f"\n_More reviews: continue from #{next_start + 1}._\n" if next_start is not None else ""
+
+
+class JsonTemplate(Template):
+    """One JSON object: title, average_rating, total, reviews[], next_start."""
+
+    def header(self, title, average, total):
+        return f'{{"title": {json.dumps(title)}, "average_rating": {json.dumps(average)}, ' \
+               f'"total": {json.dumps(total)}, "reviews": ['
+
+    def review(self, number, position, fields, review):
+        return ("," if position else "") + json.dumps(dict(fields, number=number), ensure_ascii=False)
+
+    def footer(self, rendered, next_start):
+        return f'], "next_start": {json.dumps(next_start)}}}\n'
+
+
+TEMPLATES: Dict[str, Template] = {"plain": PlainTemplate(), "markdown": MarkdownTemplate(), "json": JsonTemplate()}
+
+
+def render_reviews(out: TextIO, title: str, reviews: Iterable[Any], template: Union[str, Template] = "plain",
+                   average: Optional[float] = None, total: Optional[int] = None, start: int = 0,
+                   limit: Optional[int] = None, buffer_size: int = 1 << 16) -> Optional[int]:
+    """Render one page of reviews to out.
+
+    Args:
+        out: text stream to write to
+        title: heading of the page
+        reviews: sequence or iterable of review dicts/objects
+        template: a name in TEMPLATES or a Template instance
+        average: average rating to show (rendering never recomputes it)
+        total: total number of reviews, if known; taken from len(reviews) for sequences
+        start: index of the first review to render
+        limit: most reviews to render; all remaining if None
+        buffer_size: characters collected before each write to out
+
+    Returns:
+        The start of the next page, or None if this page reached the end.
+    """
+    if isinstance(template, str):
+        try:
+            template = TEMPLATES[template]
+        except KeyError:
+            raise ValueError(f"unknown template {template!r}; choose from {sorted(TEMPLATES)}") from None
+    if start < 0 or (limit is not None and limit < 0):
+        raise ValueError("start and limit must not be negative")
+    if total is None and hasattr(reviews, "__len__"):
+        total = len(reviews)
+    if hasattr(reviews, "__getitem__") and hasattr(reviews, "__len__") and not isinstance(reviews, Mapping):
+        # sequences: jump straight to start instead of skipping element by element
+        stop = len(reviews) if limit is None else min(len(reviews), start + limit + 1)
+        page = (reviews[i] for i in range(start, stop))
+    else:
+        page = islice(reviews, start, None if limit is None else start + limit + 1)
+
+    rendered = 0
+    next_start = None
+    with BufferedTextWriter(out, buffer_size) as writer:
+        writer.write(template.header(title, average, total))
+        for review in page:
+            if limit is not None and rendered == limit:
+                # one review beyond the page was read only to know there is more
+                next_start = start + rendered
+                break
+            writer.write(template.review(start + rendered + 1, rendered, review_fields(review), review))
+            rendered += 1
+        if not rendered and not start:
+            writer.write(template.empty())
+        writer.write(template.footer(rendered, next_start))
+    return next_start
+
+
+class ReviewPager:
+    """Hands out successive pages of a review sequence ("load more").
+
+    Example:
+        >>> import io
+        >>> pager = ReviewPager("Dune", [{"user": "u%d" % i, "rating": 4} for i in range(5)],
+        ...                     template="json", page_size=2)
+        >>> out = io.StringIO()
+        >>> while pager.has_more:
+        ...     pager.next_page(out)
+        >>> out.getvalue().count('"next_start"')
+        3
+    """
+
+    def __init__(self, title: str, reviews: Iterable[Any], template: Union[str, Template] = "plain",
+                 page_size: int = 20, average: Optional[float] = None, total: Optional[int] = None):
+        if page_size < 1:
+            raise ValueError("page_size must be positive")
+        self.title = title
+        self.reviews = reviews
+        self.template = template
+        self.page_size = page_size
+        self.average = average
+        self.total = total
+        self._next: Optional[int] = 0
+
+    @property
+    def has_more(self) -> bool:
+        return self._next is not None
+
+    def next_page(self, out: TextIO):
+        """Render the next page to out (does nothing once the end is reached)."""
+        if self._next is None:
+            return
+        self._next = render_reviews(out, self.title, self.reviews, self.template, self.average,
+                                    self.total, start=self._next, limit=self.page_size)
@@ -0,0 +1,245 @@
+"""
+Full-text search over review text.
+
+ReviewIndex is a tokenized inverted index: every term maps to a postings
+list of {doc_id: [positions]}. It supports term, prefix ("chill*") and
+phrase ('"plot twist"') queries, an optional rating filter, BM25 ranking
+and pagination. Documents are added as reviews are saved, so a query only
+touches the postings of its own terms instead of re-reading every review.
+
+Example:
+    >>> index = ReviewIndex()
+    >>> index.add(0, "Gone Girl", "Amazing plot twist!", rating=4.7)
+    >>> index.add(1, "The Conjuring", "Still gives me chills!", rating=4.8)
+    >>> [hit.doc_id for hit in index.search('"plot twist"').hits]
+    [0]
+    >>> [hit.doc_id for hit in index.search("chill*", min_rating=4.5).hits]
+    [1]
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+# positions of the body start this far after the title so that a phrase
+# can never match across the title/body boundary
+_FIELD_GAP = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-cased word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SearchHit(NamedTuple):
+    doc_id: Hashable
+    score: float
+
+
+class SearchPage(NamedTuple):
+    hits: List[SearchHit]
+    total: int
+    page: int
+    per_page: int
+
+    @property
+    def has_more(self) -> bool:
+        return self.page * self.per_page < self.total
+
+
+class ReviewIndex:
+    """Positional inverted index over review title + body with BM25 ranking.
+
+    Args:
+        k1 (float): BM25 term-frequency saturation
+        b (float): BM25 length normalization
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, List[int]]] = {}
+        self._vocab: List[str] = []   # sorted, for prefix expansion
+        self._doc_len: Dict[Hashable, int] = {}
+        self._doc_rating: Dict[Hashable, Any] = {}
+        self._doc_terms: Dict[Hashable, Tuple[str, ...]] = {}
+        self._total_len = 0
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_len
+
+    # ------------------------------------------------------------------
+    # maintenance
+
+    def add(self, doc_id: Hashable, title: str, body: str, rating: Any = None):
+        """Index one review. Re-adding an existing doc_id replaces it."""
+        if doc_id in self._doc_len:
+            self.remove(doc_id)
+        title_tokens = tokenize(title)
+        body_tokens = tokenize(body)
+        positions: Dict[str, List[int]] = {}
+        for pos, term in enumerate(title_tokens):
+            positions.setdefault(term, []).append(pos)
+        for pos, term in enumerate(body_tokens, start=len(title_tokens) + _FIELD_GAP):
+            positions.setdefault(term, []).append(pos)
+        for term, term_positions in positions.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._vocab, term)
+            postings[doc_id] = term_positions
+        length = len(title_tokens) + len(body_tokens)
+        self._doc_len[doc_id] = length
+        self._doc_rating[doc_id] = rating
+        self._doc_terms[doc_id] = tuple(positions)
+        self._total_len += length
+
+    def remove(self, doc_id: Hashable):
+        """Drop a review from the index."""
+        if doc_id not in self._doc_len:
+            raise KeyError(doc_id)
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocab[bisect_left(self._vocab, term)]
+        self._total_len -= self._doc_len.pop(doc_id)
+        del self._doc_rating[doc_id]
+
+    # ------------------------------------------------------------------
+    # querying
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Return every indexed term starting with prefix."""
+        prefix = prefix.lower()
+        start = bisect_left(self._vocab, prefix)
+        terms = []
+        for term in self._vocab[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, min_rating: Any = None, max_rating: Any = None,
+               page: int = 1, per_page: int = 10) -> SearchPage:
+        """Run a query and return one page of BM25-ranked hits.
+
+        The query is a whitespace-separated list of clauses, all of which must
+        match: a plain word, a prefix ending in "*", or a quoted phrase.
+
+        Args:
+            query (str): e.g. 'scary "plot twist" chill*'
+            min_rating, max_rating: optional inclusive rating bounds
+            page (int): 1-based page number
+            per_page (int): hits per page
+        """
+        if page < 1 or per_page < 1:
+            raise ValueError("page and per_page must be positive")
+        clauses = self._parse(query)
+        if not clauses:
+            return SearchPage([], 0, page, per_page)
+
+        # evaluate the rarest clause first so the candidate set starts small
+        matched = [self._match_clause(clause) for clause in clauses]
+        matched.sort(key=len)
+        candidates = set(matched[0])
+        for clause_docs in matched[1:]:
+            candidates.intersection_update(clause_docs)
+            if not candidates:
+                break
+        if min_rating is not None or max_rating is not None:
+            candidates = {doc for doc in candidates if self._rating_ok(doc, min_rating, max_rating)}
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for clause_docs in matched:
+            for doc_id, term_freqs in clause_docs.items():
+                if doc_id in scores:
+                    scores[doc_id] += sum(self._bm25(tf, df, doc_id) for tf, df in term_freqs)
+
+        top = heapq.nlargest(page * per_page, scores.items(), key=lambda kv: kv[1])
+        hits = [SearchHit(doc_id, score) for doc_id, score in top[(page - 1) * per_page:]]
+        return SearchPage(hits, len(scores), page, per_page)
+
+    # ------------------------------------------------------------------
+    # internals
+
+    @staticmethod
+    def _parse(query: str) -> List[Tuple[str, Any]]:
+        clauses = []
+        for phrase, word in _QUERY_RE.findall(query):
+            if phrase:
+                terms = tokenize(phrase)
+                if len(terms) == 1:
+                    clauses.append(("term", terms[0]))
+                elif terms:
+                    clauses.append(("phrase", terms))
+            elif word.endswith("*") and word.strip("*"):
+                prefix = "".join(tokenize(word))
+                if prefix:
+                    clauses.append(("prefix", prefix))
+            else:
+                clauses.extend(("term", term) for term in tokenize(word))
+        return clauses
+
+    def _match_clause(self, clause) -> Dict[Hashable, List[Tuple[int, int]]]:
+        """Return {doc_id: [(term frequency, document frequency), ...]}."""
+        kind, value = clause
+        if kind == "term":
+            postings = self._postings.get(value, {})
+            df = len(postings)
+            return {doc: [(len(pos), df)] for doc, pos in postings.items()}
+        if kind == "prefix":
+            result: Dict[Hashable, List[Tuple[int, int]]] = {}
+            for term in self.expand_prefix(value):
+                postings = self._postings[term]
+                df = len(postings)
+                for doc, pos in postings.items():
+                    result.setdefault(doc, []).append((len(pos), df))
+            return result
+        return self._match_phrase(value)
+
+    def _match_phrase(self, terms: List[str]):
+        postings = [self._postings.get(term) for term in terms]
+        if any(p is None for p in postings):
+            return {}
+        # walk the documents of the rarest term
+        rarest = min(range(len(terms)), key=lambda i: len(postings[i]))
+        result = {}
+        for doc in postings[rarest]:
+            if not all(doc in p for p in postings):
+                continue
+            starts = set(postings[0][doc])
+            for offset in range(1, len(terms)):
+                starts.intersection_update(pos - offset for pos in postings[offset][doc])
+                if not starts:
+                    break
+            if starts:
+                # score a phrase as one pseudo-term with its own tf
+                result[doc] = [(len(starts), len(postings[rarest]))]
+        return result
+
+    def _bm25(self, tf: int, df: int, doc_id: Hashable) -> float:
+        n_docs = len(self._doc_len)
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        avg_len = self._total_len / n_docs if n_docs else 0
+        norm = 1 - self.b + self.b * (self._doc_len[doc_id] / avg_len if avg_len else 0)
+        return idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+    def _rating_ok(self, doc_id, min_rating, max_rating) -> bool:
+        rating = self._doc_rating.get(doc_id)
+        if rating is None:
+            return False
+        try:
+            return ((min_rating is None or rating >= min_rating)
+                    and (max_rating is None or rating <= max_rating))
+        except TypeError:
+            return False
@@ -0,0 +1,319 @@
+"""
+Columnar storage for large numbers of reviews.
+
+A Review object with its __dict__, a per-review dict or a tuple all cost
+hundreds of bytes each. ReviewStore keeps one row per review in parallel
+array-backed columns instead:
+
+    item     array('I')  index into the interned item id table
+    user     array('I')  index into the interned username table
+    stars    array('H')  rating in hundredths of a star (4.7 -> 470)
+    time     array('d')  POSIX timestamp
+    comment  array('Q')  end offset of the comment in one shared UTF-8 buffer
+
+That is about 26 bytes per review plus the comment text. ReviewView is a
+two-slot view over one row and behaves like a read-only review. Per-item
+averages and histograms run over whole columns, with NumPy when installed.
+
+Example:
+    >>> store = ReviewStore()
+    >>> store.append("m1", "ali", 5, "Amazing!")
+    0
+    >>> store.append("m1", "bob", 4.5)
+    1
+    >>> store[0].comment, store.item_average("m1")
+    ('Amazing!', 4.75)
+"""
+
+import time
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# numpy is optional and takes ~100 ms to import, so it is loaded on first use.
+# The other numpy-accelerated modules import this helper rather than numpy.
+_np = None
+_numpy_checked = False
+
+
+def _numpy():
+    """Return numpy, importing it on the first call; None if it is not installed."""
+    global _np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - exercised only without numpy
+            numpy = None
+        _np, _numpy_checked = numpy, True
+    return _np
+
+STARS_SCALE = 100
+
+
+class ReviewView:
+    """Read-only view of one ReviewStore row.
+
+    Only the store and the row number are stored, so a view costs two slots
+    however long the comment is.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "ReviewStore", row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    @property
+    def media_item_id(self) -> str:
+        return self._store._item_ids[self._store._item[self._row]]
+
+    @property
+    def user(self) -> str:
+        return self._store._user_ids[self._store._user[self._row]]
+
+    @property
+    def stars(self) -> float:
+        return _unscale(self._store._stars[self._row])
+
+    @property
+    def timestamp(self) -> float:
+        return self._store._time[self._row]
+
+    @property
+    def comment(self) -> str:
+        return self._store._comment(self._row)
+
+    def __eq__(self, other):
+        return isinstance(other, ReviewView) and other._store is self._store and other._row == self._row
+
+    def __hash__(self):
+        return hash((id(self._store), self._row))
+
+    def __repr__(self):
+        return f"ReviewView({self.media_item_id!r}, {self.user!r}, {self.stars!r})"
+
+
+def _unscale(value: int):
+    whole, frac = divmod(value, STARS_SCALE)
+    return whole if not frac else value / STARS_SCALE
+
+
+class ReviewStore:
+    """Append-only columnar review table with per-item row lists."""
+
+    def __init__(self):
+        self._item = array("I")
+        self._user = array("I")
+        self._stars = array("H")
+        self._time = array("d")
+        self._comment_end = array("Q")
+        self._text = bytearray()
+        self._item_ids: List[str] = []
+        self._item_index: Dict[str, int] = {}
+        self._user_ids: List[str] = []
+        self._user_index: Dict[str, int] = {}
+        self._rows_by_item: List[array] = []
+
+    # ------------------------------------------------------------------
+    # writing
+
+    def append(self, media_item_id: str, user: str, stars: float, comment: str = "",
+               timestamp: Optional[float] = None) -> int:
+        """Add one review and return its row number."""
+        if isinstance(stars, bool) or not isinstance(stars, (int, float)):
+            raise ValueError("stars must be a number")
+        scaled = round(stars * STARS_SCALE)
+        if not 0 <= scaled <= 0xFFFF:
+            raise ValueError("stars is out of range")
+        item = self._intern_item(media_item_id)
+        row = len(self._item)
+        self._item.append(item)
+        self._user.append(self._intern(user, self._user_ids, self._user_index))
+        self._stars.append(scaled)
+        self._time.append(time.time() if timestamp is None else timestamp)
+        if comment:
+            self._text += comment.encode("utf-8")
+        self._comment_end.append(len(self._text))
+        self._rows_by_item[item].append(row)
+        return row
+
+    def extend(self, reviews: Iterable[Any]) -> int:
+        """Append review-like objects (media_system.Review, ReviewView, ...).
+
+        Returns the number of rows added.
+        """
+        added = 0
+        for review in reviews:
+            self.append(review.media_item_id, review.user, review.stars,
+                        getattr(review, "comment", "") or "", getattr(review, "timestamp", None))
+            added += 1
+        return added
+
+    # ------------------------------------------------------------------
+    # reading
+
+    def __len__(self):
+        return len(self._item)
+
+    def __getitem__(self, row: int) -> ReviewView:
+        if row < 0:
+            row += len(self._item)
+        if not 0 <= row < len(self._item):
+            raise IndexError("review row out of range")
+        return ReviewView(self, row)
+
+    def __iter__(self) -> Iterator[ReviewView]:
+        return (ReviewView(self, row) for row in range(len(self._item)))
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[str, str, float, str, float]]:
+        """Yield (item_id, user, stars, comment, timestamp) for rows [start, stop).
+
+        Cheaper than going through ReviewView when streaming many rows out.
+        """
+        stop = len(self._item) if stop is None else min(stop, len(self._item))
+        item_ids, user_ids, text = self._item_ids, self._user_ids, self._text
+        ends = self._comment_end
+        begin = ends[start - 1] if start else 0
+        for row in range(start, stop):
+            end = ends[row]
+            yield (item_ids[self._item[row]], user_ids[self._user[row]], _unscale(self._stars[row]),
+                   text[begin:end].decode("utf-8"), self._time[row])
+            begin = end
+
+    def rows_for_item_code(self, code: int) -> array:
+        """Return a copy of the row numbers of the item with this column code (see item_ids())."""
+        return array("I", self._rows_by_item[code])
+
+    def item_stars(self, code: int) -> array:
+        """Return the stars (hundredths) of every review of the item with this column code."""
+        stars = self._stars
+        return array("H", [stars[row] for row in self._rows_by_item[code]])
+
+    def item_ids(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Return the interned item ids; an item's position is its column code.
+
+        With start/stop only the ids of codes [start, stop) are copied.
+        """
+        return self._item_ids[start:stop]
+
+    def item_count(self) -> int:
+        """Number of distinct item ids (one more than the highest column code)."""
+        return len(self._item_ids)
+
+    def user_ids(self) -> List[str]:
+        """Return the interned usernames; a user's position is its column code."""
+        return list(self._user_ids)
+
+    def reviews_for(self, media_item_id: str) -> List[ReviewView]:
+        """Return views of every review of one item, oldest first."""
+        item = self._item_index.get(media_item_id)
+        if item is None:
+            return []
+        return [ReviewView(self, row) for row in self._rows_by_item[item]]
+
+    def columns(self) -> Dict[str, array]:
+        """Return copies of the numeric columns as they are now.
+
+        Keys are "item", "user", "stars" (hundredths), "time" and "comment_end".
+        Used by the analytics module to aggregate without building objects.
+        Each copy is one memcpy. A live memoryview would lock the arrays
+        against resizing, so append() would fail for as long as it existed.
+        """
+        return {"item": self._item[:], "user": self._user[:], "stars": self._stars[:],
+                "time": self._time[:], "comment_end": self._comment_end[:]}
+
+    # ------------------------------------------------------------------
+    # aggregation
+
+    def item_average(self, media_item_id: str) -> Optional[float]:
+        """Return one item's average rating, or None if it has no reviews."""
+        item = self._item_index.get(media_item_id)
+        if item is None or not self._rows_by_item[item]:
+            return None
+        rows = self._rows_by_item[item]
+        stars = self._stars
+        return sum(stars[r] for r in rows) / len(rows) / STARS_SCALE
+
+    def item_histogram(self, media_item_id: str) -> Dict[float, int]:
+        """Return one item's {stars: count} histogram."""
+        item = self._item_index.get(media_item_id)
+        hist: Dict[int, int] = {}
+        if item is not None:
+            stars = self._stars
+            for r in self._rows_by_item[item]:
+                hist[stars[r]] = hist.get(stars[r], 0) + 1
+        return {_unscale(k): v for k, v in sorted(hist.items())}
+
+    def averages(self) -> Dict[str, float]:
+        """Return {item_id: average rating} for every reviewed item in one pass."""
+        counts, sums = self._grouped_sums()
+        return {self._item_ids[i]: sums[i] / counts[i] / STARS_SCALE
+                for i in range(len(counts)) if counts[i]}
+
+    def histograms(self) -> Dict[str, Dict[float, int]]:
+        """Return {item_id: {stars: count}} for every reviewed item in one pass."""
+        np = _numpy()
+        if np is not None and len(self._item):
+            items = np.frombuffer(self._item, dtype=np.uint32)
+            stars = np.frombuffer(self._stars, dtype=np.uint16)
+            pairs, counts = np.unique(items.astype(np.uint64) << 16 | stars, return_counts=True)
+            result: Dict[str, Dict[float, int]] = {}
+            for pair, count in zip(pairs.tolist(), counts.tolist()):
+                result.setdefault(self._item_ids[pair >> 16], {})[_unscale(pair & 0xFFFF)] = count
+            return result
+        grouped: Dict[Tuple[int, int], int] = {}
+        for key in zip(self._item, self._stars):
+            grouped[key] = grouped.get(key, 0) + 1
+        result = {}
+        for (item, stars), count in sorted(grouped.items()):
+            result.setdefault(self._item_ids[item], {})[_unscale(stars)] = count
+        return result
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the columns and the comment buffer."""
+        columns = (self._item, self._user, self._stars, self._time, self._comment_end)
+        total = sum(col.buffer_info()[1] * col.itemsize for col in columns)
+        total += len(self._text)
+        total += sum(rows.buffer_info()[1] * rows.itemsize for rows in self._rows_by_item)
+        return total
+
+    # ------------------------------------------------------------------
+    # internals
+
+    def _grouped_sums(self):
+        n_items = len(self._item_ids)
+        np = _numpy()
+        if np is not None and len(self._item):
+            items = np.frombuffer(self._item, dtype=np.uint32)
+            stars = np.frombuffer(self._stars, dtype=np.uint16)
+            counts = np.bincount(items, minlength=n_items).tolist()
+            sums = np.bincount(items, weights=stars, minlength=n_items).tolist()
+            return counts, sums
+        counts = [0] * n_items
+        sums = [0] * n_items
+        for item, stars in zip(self._item, self._stars):
+            counts[item] += 1
+            sums[item] += stars
+        return counts, sums
+
+    def _comment(self, row: int) -> str:
+        start = self._comment_end[row - 1] if row else 0
+        return self._text[start:self._comment_end[row]].decode("utf-8")
+
+    def _intern_item(self, media_item_id: str) -> int:
+        code = self._item_index.get(media_item_id)
+        if code is None:
+            code = self._intern(media_item_id, self._item_ids, self._item_index)
+            self._rows_by_item.append(array("I"))
+        return code
+
+    @staticmethod
+    def _intern(value: str, values: List[str], index: Dict[str, int]) -> int:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(value)
+        return code
@@ -0,0 +1,96 @@
+"""
+Single entry point for the media review system, with no import-time work.
+
+`import review_system` loads nothing else. Each name below is imported
+from its own module the first time it is used (PEP 562 module
+__getattr__) and then cached here. A CLI or worker process that only
+needs a Catalog never pays for sqlite3, asyncio, numpy,
+concurrent.futures or the renderer. Subsystem modules are reachable the
+same way, e.g. review_system.persistence.
+
+No module in this tree does work at import time: no demo objects, no
+prints, no file or network access. numpy is only imported on the first
+vectorized call (see analytics and review_store). benchmarks.py measures
+the cost of this import with -X importtime and fails the run when it goes
+over STARTUP_BUDGET_MS (the "startup" benchmark).
+
+`python -m review_system profile` profiles workloads with the
+instrumentation probes on (see instrumentation.profile).
+
+Example:
+    >>> import review_system
+    >>> catalog = review_system.Catalog()
+    >>> catalog.add_item(review_system.MediaItem("m1", "Dune", "book"))
+    >>> len(catalog)
+    1
+"""
+
+# name -> module that defines it
+_EXPORTS = {
+    "MediaItem": "media_system",
+    "Review": "media_system",
+    "Catalog": "catalog",
+    "Book": "media_items",
+    "Film": "media_items",
+    "AudioRecording": "media_items",
+    "FavoritesContainer": "containers",
+    "WatchlistContainer": "containers",
+    "User": "user_item",
+    "UserRegistry": "user_registry",
+    "ItemsView": "views",
+    "ReviewIndex": "review_search",
+    "TitleIndex": "title_index",
+    "Autocomplete": "autocomplete",
+    "ReviewStore": "review_store",
+    "ConcurrentReviewStore": "concurrent_store",
+    "Leaderboards": "leaderboards",
+    "RecommendationEngine": "recommendation",
+    "RatingMatrix": "collaborative",
+    "build_neighbors": "collaborative",
+    "ReviewColumns": "analytics",
+    "item_stats": "analytics",
+    "LibraryStore": "persistence",
+    "Snapshot": "binary_snapshot",
+    "write_snapshot": "binary_snapshot",
+    "SQLiteStore": "sqlite_store",
+    "StreamingImporter": "data_import",
+    "export_report": "exporter",
+    "render_reviews": "rendering",
+    "ReviewPager": "rendering",
+    "MediaReviewDisplay": "media_review_display",
+    "ReviewService": "service",
+}
+
+# subsystems available as attributes, e.g. review_system.persistence
+_SUBMODULES = frozenset({
+    "analytics", "autocomplete", "binary_snapshot", "catalog", "collaborative", "concurrent_store", "data_import", "exporter",
+    "instrumentation", "leaderboards", "media_review_display", "persistence", "recommendation", "rendering",
+    "review_search", "review_store", "service", "sqlite_store", "title_index",
+})
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    # plain __import__: every module here is top-level, and importlib itself costs ~2 ms to load
+    module = _EXPORTS.get(name)
+    if module is not None:
+        value = getattr(__import__(module), name)
+    elif name in _SUBMODULES:
+        value = __import__(name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | _SUBMODULES)
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] != ["profile"]:
+        sys.exit("usage: python -m review_system profile [options]")
+    from instrumentation import profile
+    sys.exit(profile(sys.argv[2:]))
@@ -0,0 +1,450 @@
+"""
+Asyncio service layer for concurrent review ingestion and queries.
+
+ReviewService wraps an in-memory Catalog (with a review search index and
+leaderboards) behind coroutine methods: add_item, add_review, get_item,
+search and top.
+
+Reads are answered from memory on the event loop. Writes work like this:
+- Reviews go onto a bounded asyncio.Queue, so producers wait when ingestion
+  falls behind (backpressure).
+- One writer task drains the queue in batches. Each batch is stored
+  first and only then applied to the catalog, so a review the store
+  rejected never shows up in memory.
+- With sqlite_store.SQLiteStore the batch is written in a worker thread,
+  so disk I/O never blocks the loop and concurrent writes coalesce into
+  one transaction.
+- persistence.LibraryStore keeps its own Catalog and applies every write
+  to it, so the service serves that catalog and writes only through the
+  store. Each batch is logged and then fsync'ed in one group commit.
+
+Two front ends share one dispatcher:
+
+    python service.py --http 8080 [--db library.db]    minimal HTTP/1.1 JSON API
+    python service.py --stdio [--db library.db]        one JSON request per line
+
+HTTP routes:
+    GET  /items/<item_id>
+    GET  /search?q=<query>&page=1&per_page=10
+    GET  /top/<board>?k=10&genre=...&media_type=...
+    POST /items    {"item_id", "title", "media_type", "tags", "metadata"}
+    POST /reviews  {"item_id", "user", "stars", "comment"}
+
+stdio requests look like {"op": "add_review", "item_id": "m1", ...}; each gets
+one JSON response line.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from catalog import Catalog
+from leaderboards import Leaderboards
+from media_system import MediaItem, Review
+from persistence import item_to_record, review_to_record
+from review_search import ReviewIndex
+
+
+class ServiceError(Exception):
+    """A request that cannot be served; status follows HTTP conventions."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class ReviewService:
+    """Coroutine API over a Catalog with batched, back-pressured writes.
+
+    Args:
+        catalog (Catalog, optional): live in-memory state; a new one by default
+        store (optional): persistent backend with add_item and add_reviews (or
+            add_review); its get_item, if any, loads items missing from the catalog.
+            A store with its own catalog (LibraryStore) must be given without one
+            or with that same catalog.
+        max_pending (int): queued reviews before add_review starts to wait
+        batch_size (int): most reviews applied and persisted together
+    """
+
+    def __init__(self, catalog: Optional[Catalog] = None, store: Any = None,
+                 max_pending: int = 10_000, batch_size: int = 512):
+        # a store that owns a Catalog applies writes to it itself; writing to the
+        # catalog as well would apply every change twice
+        self._store_applies = store is not None and isinstance(getattr(store, "catalog", None), Catalog)
+        if self._store_applies:
+            if catalog is not None and catalog is not store.catalog:
+                raise ValueError("store already has a catalog; pass that catalog or none")
+            catalog = store.catalog
+        self.catalog = catalog if catalog is not None else Catalog()
+        self.store = store
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.leaderboards = Leaderboards()
+        self.catalog.subscribe(self.leaderboards)
+        self._search = ReviewIndex()
+        self._indexed: List[Review] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.batches_written = 0
+
+    # ------------------------------------------------------------------
+    # lifecycle
+
+    async def start(self):
+        if self._writer is not None:
+            return
+        self._queue = asyncio.Queue(self.max_pending)
+        self._writer = asyncio.create_task(self._write_loop(), name="ReviewService-writer")
+
+    async def stop(self):
+        """Finish every queued write, then stop the writer task."""
+        if self._writer is None:
+            return
+        await self._queue.join()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # ------------------------------------------------------------------
+    # operations
+
+    async def add_item(self, item_id: str, title: str, media_type: str,
+                       tags: Optional[List[str]] = None, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        try:
+            item = MediaItem(item_id, title, media_type, tags=tags, metadata=metadata)
+            if item.item_id in self.catalog:
+                raise ValueError(f"item_id {item.item_id!r} is already in the catalog")
+            if self._store_applies:
+                self.store.add_item(item)       # adds it to the shared catalog and logs it
+                await asyncio.to_thread(self.store.flush)
+            else:
+                if self.store is not None:
+                    await asyncio.to_thread(self.store.add_item, item)
+                self.catalog.add_item(item)
+        except (TypeError, ValueError) as exc:
+            raise ServiceError(str(exc)) from exc
+        return {"item_id": item_id}
+
+    async def add_review(self, item_id: str, user: str, stars: float, comment: str = "",
+                         wait: bool = True) -> Dict[str, Any]:
+        """Queue a review; waits for queue space, and with wait=True until it is stored."""
+        if self._queue is None:
+            raise ServiceError("service is not running", 503)
+        try:
+            review = Review(item_id, user, stars, comment)
+        except (TypeError, ValueError) as exc:
+            raise ServiceError(str(exc)) from exc
+        await self._load(item_id)
+        done = asyncio.get_running_loop().create_future() if wait else None
+        await self._queue.put((review, done))
+        if done is not None:
+            await done
+        return {"queued": not wait, "item_id": item_id}
+
+    async def get_item(self, item_id: str) -> Dict[str, Any]:
+        item = await self._load(item_id)
+        record = item_to_record(item)
+        del record["reviews"]
+        record["review_count"] = item.review_count()
+        record["average_rating"] = item.average_rating()
+        return record
+
+    async def search(self, q: str, page: int = 1, per_page: int = 10,
+                     min_rating: Any = None, max_rating: Any = None) -> Dict[str, Any]:
+        found = self._search.search(q, min_rating=min_rating, max_rating=max_rating,
+                                    page=int(page), per_page=int(per_page))
+        return {"total": found.total, "page": found.page, "has_more": found.has_more,
+                "hits": [dict(review_to_record(self._indexed[hit.doc_id]), score=hit.score)
+                         for hit in found.hits]}
+
+    async def top(self, board: str, k: int = 10, genre: Any = None, media_type: Any = None) -> Dict[str, Any]:
+        try:
+            ranked = self.leaderboards.top(board, int(k), genre=genre, media_type=media_type)
+        except ValueError as exc:
+            raise ServiceError(str(exc)) from exc
+        return {"board": board,
+                "items": [{"item_id": item.item_id, "title": item.title, "score": score}
+                          for item, score in ranked]}
+
+    async def dispatch(self, op: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run an operation by name; used by both front ends."""
+        handler: Optional[Callable[..., Awaitable[Dict[str, Any]]]] = {
+            "add_item": self.add_item, "add_review": self.add_review, "get_item": self.get_item,
+            "search": self.search, "top": self.top,
+        }.get(op)
+        if handler is None:
+            raise ServiceError(f"unknown operation {op!r}", 404)
+        try:
+            return await handler(**params)
+        except (TypeError, ValueError) as exc:
+            raise ServiceError(f"bad parameters for {op}: {exc}") from exc
+
+    # ------------------------------------------------------------------
+    # internals
+
+    async def _load(self, item_id: str) -> MediaItem:
+        item = self.catalog.get(item_id)
+        if item is None and self.store is not None and hasattr(self.store, "get_item"):
+            item = await asyncio.to_thread(self.store.get_item, item_id)
+            if item is not None and item_id not in self.catalog:
+                self.catalog.add_item(item)
+                self._index_reviews(item.reviews)
+            item = self.catalog.get(item_id)
+        if item is None:
+            raise ServiceError(f"no item {item_id!r}", 404)
+        return item
+
+    async def _write_loop(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _write_batch(self, batch: List[Tuple[Review, Optional[asyncio.Future]]]):
+        outcomes: List[Tuple[Optional[asyncio.Future], Optional[Exception]]] = []
+        pending = []
+        for review, done in batch:
+            if review.media_item_id in self.catalog:
+                pending.append((review, done))
+            else:
+                outcomes.append((done, ServiceError(f"no item {review.media_item_id!r}", 404)))
+        applied, error = [], None
+        if self._store_applies:
+            # LibraryStore applies and logs each review under its lock, then one fsync covers the batch
+            for review, done in pending:
+                try:
+                    self.store.add_review(review)
+                    applied.append((review, done))
+                except Exception as exc:
+                    outcomes.append((done, ServiceError(f"could not store review: {exc}", 500)))
+            if applied:
+                try:
+                    await asyncio.to_thread(self.store.flush)
+                except Exception as exc:
+                    error = ServiceError(f"could not store reviews: {exc}", 500)
+        else:
+            if self.store is not None and pending:
+                try:
+                    await asyncio.to_thread(self._persist, [review for review, _ in pending])
+                except Exception as exc:
+                    error = ServiceError(f"could not store reviews: {exc}", 500)
+            if error is None:
+                for review, done in pending:
+                    self.catalog.add_review(review)
+                applied = pending
+            else:
+                outcomes.extend((done, error) for _, done in pending)
+        self._index_reviews([review for review, _ in applied])
+        self.batches_written += 1
+        outcomes.extend((done, error) for _, done in applied)
+        for done, exc in outcomes:
+            if done is not None and not done.done():
+                if exc is None:
+                    done.set_result(None)
+                else:
+                    done.set_exception(exc)
+
+    def _persist(self, reviews: List[Review]):
+        add_many = getattr(self.store, "add_reviews", None)
+        if add_many is not None:
+            add_many(reviews)
+        else:
+            for review in reviews:
+                self.store.add_review(review)
+
+    def _index_reviews(self, reviews: List[Review]):
+        for review in reviews:
+            self._search.add(len(self._indexed), "", review.comment, review.stars)
+            self._indexed.append(review)
+
+
+# ----------------------------------------------------------------------
+# front ends
+
+_ROUTES = {("GET", "items"): "get_item", ("GET", "search"): "search", ("GET", "top"): "top",
+           ("POST", "items"): "add_item", ("POST", "reviews"): "add_review"}
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+MAX_BODY = 1 << 20
+
+
+async def _respond(service: ReviewService, op: str, params: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    try:
+        return 200, await service.dispatch(op, params)
+    except ServiceError as exc:
+        return exc.status, {"error": str(exc)}
+
+
+def _route(method: str, target: str, body: bytes) -> Tuple[str, Dict[str, Any]]:
+    url = urlsplit(target)
+    parts = [unquote(p) for p in url.path.split("/") if p]
+    if not parts or (method, parts[0]) not in _ROUTES:
+        raise ServiceError(f"no route for {method} {url.path}", 404)
+    op = _ROUTES[method, parts[0]]
+    params: Dict[str, Any] = dict(parse_qsl(url.query))
+    if method == "POST":
+        try:
+            decoded = json.loads(body or b"{}")
+        except ValueError as exc:
+            raise ServiceError("request body is not valid JSON") from exc
+        if not isinstance(decoded, dict):
+            raise ServiceError("request body must be a JSON object")
+        params.update(decoded)
+    elif len(parts) > 1:
+        params["item_id" if op == "get_item" else "board"] = parts[1]
+    return op, params
+
+
+async def handle_http(service: ReviewService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve HTTP/1.1 requests (with keep-alive) on one connection."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = headers.get("content-length") or "0"
+            # the body is left unread when it is invalid or too large, so the connection is closed
+            body_unread = True
+            if not (length.isascii() and length.isdigit()):
+                status, payload = 400, {"error": "invalid Content-Length"}
+            elif int(length) > MAX_BODY:
+                status, payload = 413, {"error": "request body too large"}
+            else:
+                body_unread = False
+                length = int(length)
+                body = await reader.readexactly(length) if length else b""
+                try:
+                    op, params = _route(method.upper(), target, body)
+                    status, payload = await _respond(service, op, params)
+                except ServiceError as exc:
+                    status, payload = exc.status, {"error": str(exc)}
+            data = json.dumps(payload).encode("utf-8")
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n"
+                         b"Connection: %s\r\n\r\n%s" % (status, _REASONS.get(status, "").encode(), len(data),
+                                                       b"keep-alive" if keep_alive else b"close", data))
+            await writer.drain()
+            if not keep_alive or body_unread:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_http(service: ReviewService, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+    return await asyncio.start_server(lambda r, w: handle_http(service, r, w), host, port,
+                                      backlog=4096)
+
+
+async def serve_stdio(service: ReviewService, reader: asyncio.StreamReader, write: Callable[[str], None]):
+    """Answer one JSON request per input line until EOF.
+
+    Requests are handled concurrently; each response carries the request's
+    "id" (if given) so callers can match them up.
+    """
+    pending = set()
+
+    async def answer(request: Any):
+        if not isinstance(request, dict) or "op" not in request:
+            status, payload = 400, {"error": "expected an object with an 'op' field"}
+            request = request if isinstance(request, dict) else {}
+        else:
+            params = {k: v for k, v in request.items() if k not in ("op", "id")}
+            status, payload = await _respond(service, request["op"], params)
+        payload["status"] = status
+        if "id" in request:
+            payload["id"] = request["id"]
+        write(json.dumps(payload) + "\n")
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        task = asyncio.create_task(answer(request))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def _run(args) -> None:
+    store = None
+    if args.db:
+        from sqlite_store import SQLiteStore
+        store = SQLiteStore(args.db)
+    try:
+        async with ReviewService(store=store, max_pending=args.max_pending) as service:
+            if args.http is not None:
+                server = await serve_http(service, args.host, args.http)
+                print(f"serving on http://{args.host}:{args.http}", file=sys.stderr)
+                async with server:
+                    await server.serve_forever()
+            else:
+                loop = asyncio.get_running_loop()
+                reader = asyncio.StreamReader()
+                await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+                def write(text):
+                    sys.stdout.write(text)
+                    sys.stdout.flush()
+                await serve_stdio(service, reader, write)
+    finally:
+        if store is not None:
+            store.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the media review API.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--http", type=int, metavar="PORT", help="serve HTTP on this port")
+    mode.add_argument("--stdio", action="store_true", help="read JSON requests from stdin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--db", help="SQLite database to persist to (sqlite_store)")
+    parser.add_argument("--max-pending", type=int, default=10_000, help="queued reviews before backpressure")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,494 @@
+"""
+SQLite storage backend for media items, reviews, users and containers.
+
+The JSON and log-based stores (data_persistence.md, persistence.py) load the
+whole library at startup. SQLiteStore keeps everything in one local SQLite
+database instead and loads objects only when they are asked for, so startup
+cost does not grow with the library.
+
+- The database runs in WAL mode, so readers never block the single writer.
+- Reads use a small pool of connections; writes are serialized through one
+  connection.
+- Bulk inserts use executemany inside one transaction.
+- All SQL is in module-level constants, so sqlite3's statement cache
+  prepares each one once per connection.
+- Loaded MediaItems are kept in an LRU cache. The regular in-memory classes
+  (MediaItem, Review, User, the containers) stay the working objects, and
+  the store only sits behind them.
+
+A Catalog can write through to the store by subscribing it:
+catalog.subscribe(store).
+
+Example:
+    >>> store = SQLiteStore("library.db")                     # doctest: +SKIP
+    >>> store.add_items([MediaItem("m1", "Dune", "book")])    # doctest: +SKIP
+    >>> store.add_review(Review("m1", "ali", 5, "Classic"))   # doctest: +SKIP
+    >>> store.get_item("m1").average_rating()                 # doctest: +SKIP
+    5.0
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from media_system import MediaItem, Review
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id     TEXT PRIMARY KEY,
+    title       TEXT NOT NULL,
+    title_norm  TEXT NOT NULL,
+    media_type  TEXT NOT NULL,
+    metadata    TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS items_title ON items (title_norm);
+CREATE INDEX IF NOT EXISTS items_type ON items (media_type);
+
+CREATE TABLE IF NOT EXISTS tags (
+    item_id   TEXT NOT NULL REFERENCES items (item_id) ON DELETE CASCADE,
+    position  INTEGER NOT NULL,
+    tag       TEXT NOT NULL,
+    tag_norm  TEXT NOT NULL,
+    PRIMARY KEY (item_id, position)
+);
+CREATE INDEX IF NOT EXISTS tags_by_tag ON tags (tag_norm);
+
+CREATE TABLE IF NOT EXISTS reviews (
+    review_id  INTEGER PRIMARY KEY,
+    item_id    TEXT NOT NULL REFERENCES items (item_id) ON DELETE CASCADE,
+    user       TEXT NOT NULL,
+    stars      NUMERIC NOT NULL,
+    comment    TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS reviews_by_item ON reviews (item_id);
+CREATE INDEX IF NOT EXISTS reviews_by_user ON reviews (user);
+
+CREATE TABLE IF NOT EXISTS users (
+    username       TEXT PRIMARY KEY,
+    username_norm  TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS user_reviews (
+    username  TEXT NOT NULL REFERENCES users (username) ON DELETE CASCADE,
+    position  INTEGER NOT NULL,
+    title     TEXT NOT NULL,
+    review    TEXT NOT NULL,
+    rating    NUMERIC,
+    PRIMARY KEY (username, position)
+);
+
+CREATE TABLE IF NOT EXISTS containers (
+    container_id  TEXT PRIMARY KEY,
+    kind          TEXT NOT NULL,
+    name          TEXT NOT NULL,
+    description   TEXT
+);
+
+CREATE TABLE IF NOT EXISTS container_entries (
+    container_id  TEXT NOT NULL REFERENCES containers (container_id) ON DELETE CASCADE,
+    position      INTEGER NOT NULL,
+    item_id       TEXT NOT NULL,
+    PRIMARY KEY (container_id, position)
+);
+"""
+
+_UPSERT_ITEM = ("INSERT OR REPLACE INTO items (item_id, title, title_norm, media_type, metadata) "
+                "VALUES (?, ?, ?, ?, ?)")
+_DELETE_ITEM = "DELETE FROM items WHERE item_id = ?"
+_DELETE_TAGS = "DELETE FROM tags WHERE item_id = ?"
+_DELETE_REVIEWS = "DELETE FROM reviews WHERE item_id = ?"
+_INSERT_TAG = ("INSERT INTO tags (item_id, position, tag, tag_norm) "
+               "SELECT ?1, (SELECT COUNT(*) FROM tags WHERE item_id = ?1), ?2, ?3 "
+               "WHERE NOT EXISTS (SELECT 1 FROM tags WHERE item_id = ?1 AND tag = ?2)")
+_INSERT_TAG_AT = "INSERT INTO tags (item_id, position, tag, tag_norm) VALUES (?, ?, ?, ?)"
+_INSERT_REVIEW = "INSERT INTO reviews (item_id, user, stars, comment) VALUES (?, ?, ?, ?)"
+_SELECT_ITEM = "SELECT item_id, title, media_type, metadata FROM items WHERE item_id = ?"
+_SELECT_TAGS = "SELECT tag FROM tags WHERE item_id = ? ORDER BY position"
+_SELECT_REVIEWS = "SELECT item_id, user, stars, comment FROM reviews WHERE item_id = ? ORDER BY review_id"
+_SELECT_USER_REVIEWS = ("SELECT item_id, user, stars, comment FROM reviews WHERE user = ? "
+                        "ORDER BY review_id")
+_SELECT_IDS_PAGE = "SELECT item_id FROM items WHERE item_id > ? ORDER BY item_id LIMIT ?"
+_SELECT_IDS_BY_TAG = "SELECT DISTINCT item_id FROM tags WHERE tag_norm = ? ORDER BY item_id"
+_SELECT_IDS_BY_TITLE = "SELECT item_id FROM items WHERE title_norm = ? ORDER BY item_id"
+_SELECT_RATING = "SELECT COUNT(*), AVG(stars) FROM reviews WHERE item_id = ?"
+_COUNT_ITEMS = "SELECT COUNT(*) FROM items"
+
+_UPSERT_USER = "INSERT OR REPLACE INTO users (username, username_norm) VALUES (?, ?)"
+_SELECT_USER = "SELECT username FROM users WHERE username_norm = ?"
+_DELETE_USER_REVIEWS = "DELETE FROM user_reviews WHERE username = ?"
+_INSERT_USER_REVIEW = ("INSERT INTO user_reviews (username, position, title, review, rating) "
+                       "VALUES (?, ?, ?, ?, ?)")
+_APPEND_USER_REVIEW = ("INSERT INTO user_reviews (username, position, title, review, rating) "
+                       "VALUES (?, (SELECT COUNT(*) FROM user_reviews WHERE username = ?), ?, ?, ?)")
+_SELECT_SAVED = "SELECT title, review, rating FROM user_reviews WHERE username = ? ORDER BY position"
+
+_UPSERT_CONTAINER = "INSERT OR REPLACE INTO containers (container_id, kind, name, description) VALUES (?, ?, ?, ?)"
+_DELETE_ENTRIES = "DELETE FROM container_entries WHERE container_id = ?"
+_INSERT_ENTRY = "INSERT INTO container_entries (container_id, position, item_id) VALUES (?, ?, ?)"
+_SELECT_CONTAINER = "SELECT kind, name, description FROM containers WHERE container_id = ?"
+_SELECT_ENTRIES = "SELECT item_id FROM container_entries WHERE container_id = ? ORDER BY position"
+
+
+class SQLiteStoreError(Exception):
+    """Raised when the database is missing, from a newer version, or closed."""
+
+
+def _norm(text: str) -> str:
+    return " ".join(str(text).split()).casefold()
+
+
+def _item_key(item: Any) -> Optional[str]:
+    return getattr(item, "item_id", None)
+
+
+class ConnectionPool:
+    """One writer connection plus a fixed pool of reader connections.
+
+    In WAL mode readers see the last committed state and never wait for the
+    writer, so reads can run concurrently from any thread.
+    """
+
+    def __init__(self, path: str, readers: int = 4, timeout: float = 30.0):
+        if readers < 1:
+            raise ValueError("readers must be at least 1")
+        self.path = path
+        self._timeout = timeout
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all = [self._writer]
+        for _ in range(readers):
+            conn = self._connect()
+            self._all.append(conn)
+            self._readers.put(conn)
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self._timeout, check_same_thread=False,
+                               isolation_level=None, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection for the duration of the block."""
+        self._check_open()
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the block as one write transaction on the writer connection."""
+        self._check_open()
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        with self._write_lock:
+            for conn in self._all:
+                conn.close()
+
+    def _check_open(self):
+        if self._closed:
+            raise SQLiteStoreError("the store is closed")
+
+
+class SQLiteStore:
+    """Lazily loading SQLite backend with an LRU cache of MediaItems.
+
+    Args:
+        path (str): database file (created if missing)
+        readers (int): reader connections in the pool
+        cache_size (int): MediaItems kept loaded; 0 disables the cache
+    """
+
+    def __init__(self, path: str, readers: int = 4, cache_size: int = 1024):
+        self.path = path
+        self.cache_size = cache_size
+        self._pool = ConnectionPool(path, readers)
+        self._cache: "OrderedDict[str, MediaItem]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._migrate()
+
+    # ------------------------------------------------------------------
+    # media items and reviews
+
+    def add_item(self, item: MediaItem):
+        """Insert or replace one item together with its tags and reviews."""
+        self.add_items([item])
+
+    def add_items(self, items: Iterable[MediaItem]) -> int:
+        """Insert or replace many items in one transaction; returns the count."""
+        items = list(items)
+        item_rows, tag_rows, review_rows, ids = [], [], [], []
+        for item in items:
+            ids.append((item.item_id,))
+            item_rows.append((item.item_id, item.title, _norm(item.title), item.media_type,
+                              json.dumps(item.metadata, ensure_ascii=False)))
+            tag_rows.extend((item.item_id, position, tag, _norm(tag)) for position, tag in enumerate(item.tags))
+            review_rows.extend((item.item_id, r.user, r.stars, r.comment) for r in item.reviews)
+        with self._pool.transaction() as conn:
+            conn.executemany(_DELETE_TAGS, ids)
+            conn.executemany(_DELETE_REVIEWS, ids)
+            conn.executemany(_UPSERT_ITEM, item_rows)
+            conn.executemany(_INSERT_TAG_AT, tag_rows)
+            conn.executemany(_INSERT_REVIEW, review_rows)
+        with self._cache_lock:
+            for item in items:
+                if item.item_id in self._cache:
+                    self._cache[item.item_id] = item
+        return len(items)
+
+    def remove_item(self, item_id: str):
+        with self._pool.transaction() as conn:
+            conn.execute(_DELETE_ITEM, (item_id,))
+        self._forget(item_id)
+
+    def add_tag(self, item_id: str, tag: str):
+        with self._pool.transaction() as conn:
+            try:
+                conn.execute(_INSERT_TAG, (item_id, tag, _norm(tag)))
+            except sqlite3.IntegrityError as exc:
+                raise KeyError(item_id) from exc
+        self._forget(item_id)
+
+    def add_review(self, review: Review):
+        self.add_reviews([review])
+
+    def add_reviews(self, reviews: Iterable[Review]) -> int:
+        """Append reviews in one transaction; returns the count."""
+        reviews = list(reviews)
+        with self._pool.transaction() as conn:
+            try:
+                conn.executemany(_INSERT_REVIEW, [(r.media_item_id, r.user, r.stars, r.comment)
+                                                  for r in reviews])
+            except sqlite3.IntegrityError as exc:
+                raise KeyError("review for an unknown media item") from exc
+        # cached objects may be shared with a Catalog that has already applied
+        # the change, so they are reloaded on next access instead of patched
+        for review in reviews:
+            self._forget(review.media_item_id)
+        return len(reviews)
+
+    def get_item(self, item_id: str) -> Optional[MediaItem]:
+        """Return the item with this id (loaded on first access), or None."""
+        item = self._cached(item_id)
+        if item is not None:
+            return item
+        with self._pool.reader() as conn:
+            row = conn.execute(_SELECT_ITEM, (item_id,)).fetchone()
+            if row is None:
+                return None
+            tags = [tag for (tag,) in conn.execute(_SELECT_TAGS, (item_id,))]
+            reviews = conn.execute(_SELECT_REVIEWS, (item_id,)).fetchall()
+        item = MediaItem(row[0], row[1], row[2], tags=tags, metadata=json.loads(row[3]))
+        for review in reviews:
+            item.add_review(Review(*review))
+        self._remember(item)
+        return item
+
+    def __contains__(self, item_id: str) -> bool:
+        if self._cached(item_id) is not None:
+            return True
+        with self._pool.reader() as conn:
+            return conn.execute(_SELECT_ITEM, (item_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._pool.reader() as conn:
+            return conn.execute(_COUNT_ITEMS).fetchone()[0]
+
+    def item_ids(self, after: str = "", limit: int = 100) -> List[str]:
+        """Return up to limit item ids greater than after, in id order (keyset paging)."""
+        with self._pool.reader() as conn:
+            return [item_id for (item_id,) in conn.execute(_SELECT_IDS_PAGE, (after, limit))]
+
+    def iter_items(self, batch_size: int = 500) -> Iterator[MediaItem]:
+        """Yield every item, loading batch_size ids at a time."""
+        after = ""
+        while True:
+            ids = self.item_ids(after, batch_size)
+            for item_id in ids:
+                item = self.get_item(item_id)
+                if item is not None:
+                    yield item
+            if len(ids) < batch_size:
+                return
+            after = ids[-1]
+
+    def find_by_tag(self, tag: str) -> List[MediaItem]:
+        return self._load_ids(_SELECT_IDS_BY_TAG, _norm(tag))
+
+    def find_by_title(self, title: str) -> List[MediaItem]:
+        return self._load_ids(_SELECT_IDS_BY_TITLE, _norm(title))
+
+    def reviews_by_user(self, user: str) -> List[Review]:
+        with self._pool.reader() as conn:
+            return [Review(*row) for row in conn.execute(_SELECT_USER_REVIEWS, (user,))]
+
+    def rating_summary(self, item_id: str) -> Tuple[int, Optional[float]]:
+        """Return (review count, average stars) computed in the database."""
+        with self._pool.reader() as conn:
+            count, average = conn.execute(_SELECT_RATING, (item_id,)).fetchone()
+        return count, average
+
+    # catalog listener interface: catalog.subscribe(store) writes through
+    def on_add_item(self, item):
+        self.add_item(item)
+
+    def on_remove_item(self, item):
+        self.remove_item(item.item_id)
+
+    def on_add_tag(self, item, tag):
+        self.add_tag(item.item_id, tag)
+
+    def on_add_review(self, item, review):
+        self.add_review(review)
+
+    # ------------------------------------------------------------------
+    # users
+
+    def save_user(self, user):
+        """Insert or replace a user_item.User and its saved reviews."""
+        username = user.username
+        rows = [(username, position, r["title"], r["review"], r["rating"])
+                for position, r in enumerate(user.saved_reviews)]
+        with self._pool.transaction() as conn:
+            existing = conn.execute(_SELECT_USER, (_norm(username),)).fetchone()
+            if existing is not None and existing[0] != username:
+                raise ValueError(f"username {username!r} is already taken")
+            conn.execute(_UPSERT_USER, (username, _norm(username)))
+            conn.execute(_DELETE_USER_REVIEWS, (username,))
+            conn.executemany(_INSERT_USER_REVIEW, rows)
+
+    def save_user_review(self, username: str, title: str, review: str, rating: Any):
+        """Append one saved review for an existing user."""
+        with self._pool.transaction() as conn:
+            try:
+                conn.execute(_APPEND_USER_REVIEW, (username, username, title, review, rating))
+            except sqlite3.IntegrityError as exc:
+                raise KeyError(username) from exc
+
+    def get_user(self, username: str):
+        """Load a user_item.User (case-insensitive lookup), or None."""
+        from user_item import User
+        with self._pool.reader() as conn:
+            row = conn.execute(_SELECT_USER, (_norm(username),)).fetchone()
+            if row is None:
+                return None
+            saved = conn.execute(_SELECT_SAVED, (row[0],)).fetchall()
+        user = User(row[0])
+        for title, review, rating in saved:
+            user.save_review(title, review, rating)
+        return user
+
+    # ------------------------------------------------------------------
+    # containers
+
+    def save_container(self, container):
+        """Insert or replace a review container and its entries (by item_id)."""
+        rows = []
+        for position, item in enumerate(container):
+            item_id = _item_key(item)
+            if item_id is None:
+                raise ValueError("container entries need an item_id to be stored")
+            rows.append((container.container_id, position, item_id))
+        with self._pool.transaction() as conn:
+            conn.execute(_UPSERT_CONTAINER, (container.container_id, type(container).__name__,
+                                             container.name, container.description))
+            conn.execute(_DELETE_ENTRIES, (container.container_id,))
+            conn.executemany(_INSERT_ENTRY, rows)
+
+    def load_container(self, container_id: str, resolve: Optional[Callable[[str], Any]] = None):
+        """Rebuild a container; entries are resolved with resolve(item_id).
+
+        resolve defaults to get_item. Entries it cannot resolve are skipped.
+        """
+        import containers
+        with self._pool.reader() as conn:
+            row = conn.execute(_SELECT_CONTAINER, (container_id,)).fetchone()
+            if row is None:
+                return None
+            item_ids = [item_id for (item_id,) in conn.execute(_SELECT_ENTRIES, (container_id,))]
+        kind, name, description = row
+        cls = getattr(containers, kind, None)
+        if cls is None:
+            raise SQLiteStoreError(f"unknown container kind {kind!r}")
+        container = cls(container_id, name, description)
+        resolve = resolve or self.get_item
+        for item_id in item_ids:
+            item = resolve(item_id)
+            if item is not None:
+                container.add_item(item)
+        return container
+
+    # ------------------------------------------------------------------
+    # lifecycle
+
+    def close(self):
+        self._pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # internals
+
+    def _migrate(self):
+        with self._pool.transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise SQLiteStoreError(f"database schema {version} is newer than supported {SCHEMA_VERSION}")
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _load_ids(self, sql: str, value: Any) -> List[MediaItem]:
+        with self._pool.reader() as conn:
+            ids = [item_id for (item_id,) in conn.execute(sql, (value,))]
+        items = (self.get_item(item_id) for item_id in ids)
+        return [item for item in items if item is not None]
+
+    def _cached(self, item_id: str) -> Optional[MediaItem]:
+        with self._cache_lock:
+            item = self._cache.get(item_id)
+            if item is not None:
+                self._cache.move_to_end(item_id)
+            return item
+
+    def _forget(self, item_id: str):
+        with self._cache_lock:
+            self._cache.pop(item_id, None)
+
+    def _remember(self, item: MediaItem):
+        if not self.cache_size:
+            return
+        with self._cache_lock:
+            self._cache[item.item_id] = item
+            self._cache.move_to_end(item.item_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
@@ -0,0 +1,78 @@
+"""
+Tests for the column-based review analytics, with and without NumPy.
+"""
+
+import unittest
+from unittest import mock
+
+import analytics
+from analytics import (ReviewColumns, average_for, counts, group_rows_by, item_stats, most_reviewed,
+                       rating_buckets, rows_of_most_reviewed, top_k_by_count)
+from review_store import ReviewStore
+
+REVIEWS = [
+    {"title": "Gone Girl", "rating": 4.6},
+    {"title": "The Conjuring", "rating": 4.7},
+    {"title": "Up", "rating": 2.0},
+    {"title": "The Conjuring", "rating": 4.8},
+    {"title": "Gone Girl", "rating": 1.5},
+    {"title": "The Conjuring", "rating": 3.0},
+]
+
+
+class TestAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.cols = ReviewColumns.from_dicts(REVIEWS)
+
+    def each_backend(self):
+        for numpy in (analytics._numpy(), None):
+            with self.subTest(numpy=numpy is not None), mock.patch.object(analytics, "_numpy", return_value=numpy):
+                yield
+
+    def test_counts_and_most_reviewed(self):
+        for _ in self.each_backend():
+            self.assertEqual(counts(self.cols), [2, 3, 1])
+            self.assertEqual(top_k_by_count(self.cols, 2), [("The Conjuring", 3), ("Gone Girl", 2)])
+            self.assertEqual(most_reviewed(self.cols), ["The Conjuring"])
+            self.assertEqual(rows_of_most_reviewed(self.cols), [1, 3, 5])
+
+    def test_grouping_and_buckets(self):
+        genres = {"Gone Girl": "Thriller", "The Conjuring": "Horror"}
+        for _ in self.each_backend():
+            self.assertEqual(group_rows_by(self.cols, genres), {"thriller": [0, 4], "horror": [1, 3, 5]})
+            self.assertEqual(rating_buckets(self.cols), {"positive": [0, 1, 3, 5], "negative": [2, 4]})
+
+    def test_item_stats_and_average(self):
+        for _ in self.each_backend():
+            stats = item_stats(self.cols)
+            self.assertEqual(stats["The Conjuring"]["count"], 3)
+            self.assertEqual(stats["The Conjuring"]["median"], 4.7)
+            self.assertEqual(stats["Up"]["p75"], 2.0)
+            self.assertAlmostEqual(average_for(self.cols, "Gone Girl"), 3.05)
+            self.assertIsNone(average_for(self.cols, "Missing"))
+
+    def test_empty_batch(self):
+        cols = ReviewColumns.from_dicts([])
+        for _ in self.each_backend():
+            self.assertEqual(top_k_by_count(cols, 3), [])
+            self.assertEqual(most_reviewed(cols), [])
+            self.assertEqual(item_stats(cols), {})
+
+    def test_from_store_does_not_block_writes(self):
+        store = ReviewStore()
+        store.append("m1", "ali", 5)
+        store.append("m2", "bob", 3)
+        cols = ReviewColumns.from_store(store)
+        store.append("m1", "cy", 4)
+        self.assertEqual(len(cols), 2)
+        self.assertEqual(average_for(cols, "m1"), 5.0)
+        self.assertEqual(average_for(ReviewColumns.from_store(store), "m1"), 4.5)
+
+    def test_mismatched_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            ReviewColumns([0, 1], [4.0], ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
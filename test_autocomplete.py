@@ -0,0 +1,143 @@
+"""
+Tests for ranked prefix autocomplete and its catalog wiring.
+"""
+
+import functools
+import random
+import unittest
+
+from autocomplete import Autocomplete, PrefixIndex, word_starts
+from catalog import Catalog
+from media_system import MediaItem, Review
+
+_starts = functools.lru_cache(maxsize=None)(word_starts)
+
+
+def brute_force(entries, prefix, k):
+    """entries: key -> (text, score)."""
+    hits = [key for key, (text, _) in entries.items() if any(term.startswith(prefix) for term in _starts(text))]
+    hits.sort(key=lambda key: (-entries[key][1], entries[key][0]))
+    return hits[:k]
+
+
+class TestPrefixIndex(unittest.TestCase):
+
+    def test_ranks_by_score_then_text_and_matches_word_starts(self):
+        index = PrefixIndex()
+        index.add("a", "The Conjuring", 3)
+        index.add("b", "Contact", 3)
+        index.add("c", "Conan", 7)
+        index.add("d", "Inception", 9)
+        self.assertEqual([c.key for c in index.complete("CON")], ["c", "b", "a"])
+        self.assertEqual([c.key for c in index.complete("the c")], ["a"])
+        self.assertEqual([c.key for c in index.complete("con", k=1)], ["c"])
+        self.assertEqual(index.complete("x"), [])
+        self.assertEqual(index.complete(""), [])
+
+    def test_cached_prefixes_stay_correct_under_updates(self):
+        rng = random.Random(5)
+        index = PrefixIndex(cache_size=5, scan_limit=4)
+        entries = {}
+        words = ["star", "stone", "storm", "river", "rise", "road"]
+        for i in range(120):
+            entries[i] = (f"{rng.choice(words)} {rng.choice(words)} {i}", rng.randint(0, 9))
+        index.add_many((key, text, score) for key, (text, score) in entries.items())
+        prefixes = ["s", "st", "sto", "r", "ri", "road"]
+        for step in range(200):
+            key = rng.randrange(160)
+            action = rng.random()
+            if key in entries and action < 0.15:
+                index.remove(key)
+                del entries[key]
+            elif key in entries:
+                score = max(0, entries[key][1] + rng.choice((-2, 1, 3)))
+                index.set_score(key, score)
+                entries[key] = (entries[key][0], score)
+            else:
+                text = f"{rng.choice(words)} {key}"
+                index.add(key, text, rng.randint(0, 9))
+                entries[key] = (text, index.score(key))
+            for prefix in prefixes:
+                for k in (3, 5, 8):
+                    self.assertEqual([c.key for c in index.complete(prefix, k)], brute_force(entries, prefix, k),
+                                     (step, prefix, k))
+
+    def test_add_many_replaces_existing_keys(self):
+        index = PrefixIndex()
+        index.add("a", "Old Title", 1)
+        index.add_many([("a", "New Title", 2), ("b", "Other", 0), ("b", "Newer", 5)])
+        self.assertEqual(index.complete("old"), [])
+        self.assertEqual([c.key for c in index.complete("new")], ["b", "a"])
+        self.assertEqual(len(index), 2)
+
+
+class TestAutocomplete(unittest.TestCase):
+
+    def setUp(self):
+        self.items = [
+            MediaItem("m1", "The Conjuring", "movie", tags=["horror", "Haunted"], metadata={"creator": "James Wan"}),
+            MediaItem("m2", "Insidious", "movie", tags=["horror"], metadata={"creator": "James Wan"}),
+            MediaItem("m3", "Contact", "movie", tags=["sci-fi"], metadata={"creator": "Robert Zemeckis"}),
+        ]
+        self.complete = Autocomplete()
+        self.complete.add_items(self.items)
+
+    def test_creators_and_tags_are_scored_by_their_items(self):
+        self.items[1].add_review(Review("m2", "ali", 4))
+        self.items[1].add_review(Review("m2", "bob", 5))
+        self.complete.update_score(self.items[1])
+        self.items[2].add_review(Review("m3", "ali", 5))
+        self.complete.update_score(self.items[2])
+        self.assertEqual([(c.text, c.score) for c in self.complete.complete("h", "tag")],
+                         [("horror", 2), ("Haunted", 0)])
+        self.assertEqual([(c.text, c.score) for c in self.complete.complete("", "creator")], [])
+        self.assertEqual([(c.text, c.score) for c in self.complete.complete("wan", "creator")], [("James Wan", 2)])
+        self.complete.remove_item("m2")
+        self.assertEqual([(c.text, c.score) for c in self.complete.complete("h", "tag")],
+                         [("Haunted", 0), ("horror", 0)])
+        self.complete.remove_item("m3")
+        self.assertEqual(self.complete.complete("sci", "tag"), [])
+
+    def test_unknown_field_and_duplicate_items_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.complete.complete("x", field="year")
+        with self.assertRaises(ValueError):
+            self.complete.add_item(self.items[0])
+        with self.assertRaises(ValueError):
+            self.complete.add_items([MediaItem("m9", "New", "movie"), self.items[0]])
+
+    def test_complete_all_groups_by_field(self):
+        results = self.complete.complete_all("ja")
+        self.assertEqual([c.text for c in results["creator"]], ["James Wan"])
+        self.assertEqual(results["title"], [])
+
+
+class TestCatalogSubscription(unittest.TestCase):
+
+    def test_follows_catalog_changes(self):
+        catalog = Catalog()
+        catalog.add_item(MediaItem("m1", "Dune", "book", tags=["classic"]))
+        complete = Autocomplete()
+        catalog.subscribe(complete)  # replays existing items through on_add_items
+        self.assertEqual([c.key for c in complete.complete("du")], ["m1"])
+
+        catalog.add_item(MediaItem("m2", "Dune Messiah", "book"))
+        catalog.add_review(Review("m2", "ali", 4))
+        self.assertEqual([c.key for c in complete.complete("dune")], ["m2", "m1"])
+
+        catalog.add_tag("m2", "sequel")
+        self.assertEqual([c.text for c in complete.complete("se", "tag")], ["sequel"])
+
+        item = catalog.get("m1")
+        item.title = "Arrakis"
+        catalog.refresh("m1")
+        self.assertEqual([c.key for c in complete.complete("arr")], ["m1"])
+        self.assertEqual([c.key for c in complete.complete("dune")], ["m2"])
+
+        catalog.remove_item("m2")
+        self.assertEqual(complete.complete("se", "tag"), [])
+        self.assertEqual(len(complete), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
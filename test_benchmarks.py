@@ -0,0 +1,64 @@
+"""
+Smoke tests for the benchmark harness: every benchmark runs at a tiny scale and baselines are compared.
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import benchmarks
+
+TINY = ["--scale", "100", "--repeats", "1", "--container-cap", "50", "--threads", "2", "--no-memory"]
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_main(self, *args):
+        path = os.path.join(self.directory, "bench-%d.json" % len(os.listdir(self.directory)))
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            status = benchmarks.main(TINY + ["--out", path] + list(args))
+        with open(path, encoding="utf-8") as f:
+            return status, path, json.load(f)
+
+    def test_every_benchmark_runs_at_tiny_scale(self):
+        status, _, report = self.run_main()
+        self.assertEqual(status, 0)
+        self.assertEqual(list(report["results"]), list(benchmarks._BENCHMARKS))
+        for name, result in report["results"].items():
+            with self.subTest(name=name):
+                self.assertGreater(result["samples"], 0)
+                self.assertLessEqual(result["p50_s"], result["p99_s"])
+        result = benchmarks.run_one("analytics", benchmarks.Workload(100, repeats=1))
+        self.assertGreater(result["peak_memory_bytes"], 0)
+
+    def test_baseline_comparison_flags_regressions(self):
+        only = ["--only", "add_review,analytics"]
+        _, baseline_path, baseline = self.run_main(*only)
+        status, _, report = self.run_main(*only, "--baseline", baseline_path, "--tolerance", "1e9")
+        self.assertEqual(status, 0)
+        self.assertEqual(report["regressions"], [])
+        self.assertIn("p50_vs_baseline", report["results"]["analytics"])
+
+        baseline["results"]["analytics"]["p50_s"] = 1e-12
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f)
+        status, _, report = self.run_main(*only, "--baseline", baseline_path)
+        self.assertEqual(status, 1)
+        self.assertEqual(len(report["regressions"]), 1)
+        self.assertTrue(report["regressions"][0].startswith("analytics: "))
+        # benchmarks missing from the baseline are not compared
+        self.assertEqual(benchmarks.compare({"new": {"p50_s": 1.0}}, {}, 0.25), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
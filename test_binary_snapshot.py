@@ -0,0 +1,110 @@
+"""
+Tests for the memory-mapped binary snapshot: round trip, lazy lookup, ratings views and damage detection.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import binary_snapshot
+from binary_snapshot import Snapshot, write_snapshot
+from catalog import Catalog
+from media_system import MediaItem, Review
+from persistence import StoreError
+
+
+class TestBinarySnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "library.snap")
+        self.catalog = Catalog()
+        dune = MediaItem("m2", "Dune", "book", tags=["sci-fi", "classic"], metadata={"year": 1965})
+        dune.add_review(Review("m2", "ali", 5, "Classic"))
+        dune.add_review(Review("m2", "bob", 3.5, None))
+        dune.add_review(Review("m2", "zoë", 4, "Épique ✓"))
+        self.catalog.add_item(dune)
+        self.catalog.add_item(MediaItem("m1", "Amélie", "movie"))
+        self.catalog.add_item(MediaItem("m3", "Inception", "movie", tags=["sci-fi"]))
+        self.assertEqual(write_snapshot(self.path, self.catalog), 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        with Snapshot(self.path) as snapshot:
+            snapshot.verify()
+            self.assertEqual((len(snapshot), snapshot.review_count), (3, 3))
+            self.assertEqual(list(snapshot.item_ids()), ["m2", "m1", "m3"])
+            dune = snapshot.get("m2")
+            self.assertEqual((dune.title, dune.media_type, dune.tags, dune.metadata),
+                             ("Dune", "book", ["sci-fi", "classic"], {"year": 1965}))
+            self.assertEqual([(r.user, r.stars, r.comment) for r in dune.reviews],
+                             [("ali", 5, "Classic"), ("bob", 3.5, None), ("zoë", 4, "Épique ✓")])
+            self.assertEqual(dune.average_rating(), 4.1666666666666667)
+            self.assertIs(snapshot.get("m2"), dune)
+            self.assertIsNone(snapshot.get("m9"))
+            self.assertNotIn("m0", snapshot)
+            catalog = snapshot.load_catalog()
+        self.assertEqual(sorted(item.item_id for item in catalog), ["m1", "m2", "m3"])
+        self.assertEqual(catalog.get("m1").title, "Amélie")
+
+    def test_items_are_decoded_on_first_access(self):
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(snapshot._items, {})
+            snapshot.get("m3")
+            self.assertEqual([item.item_id for item in snapshot._items.values()], ["m3"])
+
+    def test_ratings_are_views_of_the_mapped_file(self):
+        snapshot = Snapshot(self.path)
+        ratings = snapshot.ratings("m2")
+        self.assertIsInstance(ratings, memoryview)
+        self.assertEqual(ratings.tolist(), [500, 350, 400])
+        self.assertEqual(snapshot.ratings("m1").tolist(), [])
+        self.assertEqual(snapshot.average_rating("m2"), 4.166666666666667)
+        self.assertIsNone(snapshot.average_rating("m1"))
+        with self.assertRaises(KeyError):
+            snapshot.ratings("m9")
+        self.assertEqual(snapshot.averages(), {"m2": 4.166666666666667})
+        with mock.patch.object(binary_snapshot, "_numpy", return_value=None):
+            self.assertEqual(snapshot.averages(), {"m2": 4.166666666666667})
+        columns = snapshot.columns()
+        snapshot.close()
+        self.assertEqual(ratings.tolist(), [500, 350, 400])  # still mapped while the view lives
+        self.assertEqual(columns["stars"].tolist(), [500, 350, 400])
+        self.assertEqual(columns["review_offsets"].tolist(), [0, 3, 3, 3])
+
+    def test_rewrite_replaces_file_atomically(self):
+        with Snapshot(self.path) as old:
+            self.catalog.add_review(Review("m3", "ali", 4))
+            write_snapshot(self.path, self.catalog)
+            self.assertEqual(old.ratings("m3").tolist(), [])
+            with Snapshot(self.path) as new:
+                self.assertEqual(new.ratings("m3").tolist(), [400])
+        self.assertEqual(os.listdir(self.directory), ["library.snap"])
+
+    def test_rejects_damaged_files(self):
+        with open(self.path, "rb") as f:
+            data = bytearray(f.read())
+        damaged = os.path.join(self.directory, "damaged.snap")
+        for contents in (b"", bytes(data[:40]), b"X" + bytes(data[1:]), bytes(data[:-8])):
+            with open(damaged, "wb") as f:
+                f.write(contents)
+            with self.assertRaises(StoreError):
+                Snapshot(damaged).close()
+        data[-1] ^= 0xFF
+        with open(damaged, "wb") as f:
+            f.write(data)
+        with Snapshot(damaged) as snapshot:
+            with self.assertRaises(StoreError):
+                snapshot.verify()
+
+    def test_duplicate_item_ids_are_rejected(self):
+        with self.assertRaises(ValueError):
+            write_snapshot(self.path, [MediaItem("m1", "A", "book"), MediaItem("m1", "B", "book")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests for the indexed Catalog and its query predicates.
+"""
+
+import unittest
+
+from catalog import And, Catalog, Eq, Or, Range
+from media_system import MediaItem, Review
+
+
+class TestCatalogQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = Catalog()
+        self.catalog.add_item(MediaItem("m1", "Dune", "book", tags=["sci-fi", "classic"],
+                                        metadata={"year": 1965, "genre": "Sci-Fi"}))
+        self.catalog.add_item(MediaItem("m2", "Inception", "movie", tags=["sci-fi"],
+                                        metadata={"year": 2010, "genre": "Thriller"}))
+        self.catalog.add_item(MediaItem("m3", "Titanic", "movie", tags=["romance"],
+                                        metadata={"year": 1997, "genre": "Drama"}))
+
+    def ids(self, predicate):
+        return sorted(item.item_id for item in self.catalog.find(predicate))
+
+    def test_get_by_id(self):
+        self.assertEqual(self.catalog.get("m2").title, "Inception")
+        self.assertIsNone(self.catalog.get("missing"))
+
+    def test_equality_on_inverted_indexes(self):
+        self.assertEqual(self.ids(Eq("tag", "SCI-FI")), ["m1", "m2"])
+        self.assertEqual(self.ids(Eq("media_type", "movie")), ["m2", "m3"])
+        self.assertEqual(self.ids(Eq("genre", "drama")), ["m3"])
+
+    def test_range_and_boolean_combinations(self):
+        self.assertEqual(self.ids(Range("year", 1990, 2010)), ["m2", "m3"])
+        self.assertEqual(self.ids(And(Eq("tag", "sci-fi"), Range("year", None, 2000))), ["m1"])
+        self.assertEqual(self.ids(Or(Eq("tag", "romance"), Eq("genre", "sci-fi"))), ["m1", "m3"])
+
+    def test_unindexed_field_falls_back_to_scan(self):
+        self.catalog.add_item(MediaItem("m4", "Up", "movie", metadata={"studio": "Pixar"}))
+        self.assertEqual(self.ids(Eq("studio", "pixar")), ["m4"])
+
+    def test_indexes_follow_mutations(self):
+        self.catalog.add_tag("m3", "Classic")
+        self.assertEqual(self.ids(Eq("tag", "classic")), ["m1", "m3"])
+        self.catalog.add_review(Review("m3", "ali", 5))
+        self.catalog.add_review(Review("m2", "bob", 3))
+        self.assertEqual(self.ids(Range("rating", 4)), ["m3"])
+        self.catalog.remove_item("m3")
+        self.assertEqual(self.ids(Eq("tag", "classic")), ["m1"])
+        self.assertEqual(self.ids(Range("rating", 0)), ["m2"])
+
+    def test_duplicate_id_rejected(self):
+        with self.assertRaises(ValueError):
+            self.catalog.add_item(MediaItem("m1", "Other", "book"))
+
+    def test_sorted_views_and_paging(self):
+        titles = lambda items: [m.title for m in items]
+        self.assertEqual(titles(self.catalog.view()), ["Dune", "Inception", "Titanic"])
+        self.assertEqual(titles(self.catalog.view(sort_by="year", descending=True)[:2]),
+                         ["Inception", "Titanic"])
+        self.catalog.add_review(Review("m2", "ali", 2))
+        self.catalog.add_review(Review("m1", "bob", 5))
+        by_rating = self.catalog.view(sort_by="rating")
+        first = by_rating.page(size=1)
+        self.assertEqual(titles(first.items), ["Inception"])
+        self.assertEqual(titles(by_rating.page(first.next_cursor, size=1).items), ["Dune"])
+        self.catalog.remove_item("m2")
+        self.assertEqual(titles(self.catalog.view()), ["Dune", "Titanic"])
+
+
+if __name__ == "__main__":
+    unittest.main()
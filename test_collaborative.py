@@ -0,0 +1,104 @@
+"""
+Tests for item-item collaborative filtering: the CSR matrix, cosine neighbours and recommendations.
+"""
+
+import math
+import unittest
+
+from collaborative import NeighborTable, RatingMatrix, build_neighbors
+from review_store import ReviewStore
+
+RATINGS = [("ann", "dune", 5), ("ann", "alien", 4),
+           ("bob", "dune", 4), ("bob", "alien", 5),
+           ("cat", "dune", 1), ("cat", "up", 5)]
+
+
+def store_of(ratings):
+    store = ReviewStore()
+    for user, item, stars in ratings:
+        store.append(item, user, stars)
+    return store
+
+
+class TestRatingMatrix(unittest.TestCase):
+
+    def test_from_store_keeps_the_latest_rating(self):
+        matrix = RatingMatrix.from_store(store_of(RATINGS + [("ann", "dune", 2)]))
+        self.assertEqual(matrix.shape, (3, 3))
+        self.assertEqual(matrix.nnz, 6)
+        ann = matrix.row_labels.index("ann")
+        columns, values = matrix.row(ann)
+        self.assertEqual({matrix.col_labels[c]: v for c, v in zip(columns, values)}, {"dune": 2.0, "alien": 4.0})
+        self.assertEqual(list(columns), sorted(columns))
+
+    def test_transpose(self):
+        by_item = RatingMatrix.from_store(store_of(RATINGS)).transpose()
+        self.assertEqual(by_item.shape, (3, 3))
+        dune = by_item.row_labels.index("dune")
+        users, values = by_item.row(dune)
+        self.assertEqual({by_item.col_labels[u]: v for u, v in zip(users, values)},
+                         {"ann": 5.0, "bob": 4.0, "cat": 1.0})
+
+
+class TestNeighbors(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = RatingMatrix.from_store(store_of(RATINGS))
+        self.table = build_neighbors(self.matrix, k=5, workers=1)
+
+    def test_cosine_similarity_scores(self):
+        dune = dict(self.table.also_liked("dune"))
+        self.assertAlmostEqual(dune["alien"], 40 / math.sqrt(42 * 41))
+        self.assertAlmostEqual(dune["up"], 1 / math.sqrt(42))
+        self.assertEqual([item for item, _ in self.table.also_liked("dune")], ["alien", "up"])
+        self.assertEqual(self.table.also_liked("dune", k=1)[0][0], "alien")
+        # alien and up share no users, so neither lists the other
+        self.assertEqual([item for item, _ in self.table.also_liked("up")], ["dune"])
+
+    def test_min_support_drops_thin_pairs(self):
+        table = build_neighbors(self.matrix, min_support=2, workers=1)
+        self.assertEqual([item for item, _ in table.also_liked("dune")], ["alien"])
+        self.assertEqual(table.also_liked("up"), [])
+
+    def test_worker_processes_match_in_process_result(self):
+        table = build_neighbors(self.matrix, k=5, workers=2, block_size=1)
+        for item in ("dune", "alien", "up"):
+            self.assertEqual(table.also_liked(item), self.table.also_liked(item))
+
+    def test_recommendations(self):
+        # one rating: every neighbour scores that rating; ties go to the closer neighbour
+        recommended = self.table.recommend_for({"dune": 5})
+        self.assertEqual([item for item, _ in recommended], ["alien", "up"])
+        for _, score in recommended:
+            self.assertAlmostEqual(score, 5.0)
+        self.assertEqual([item for item, _ in self.table.recommend_for({"dune": 5}, k=1)], ["alien"])
+        # seen items are never recommended
+        self.assertEqual([item for item, _ in self.table.recommend_for({"dune": 5, "alien": 2})], ["up"])
+        # up is a neighbour of dune only, so only the dune rating counts toward it
+        (item, score), = self.table.recommend_for({"dune": 2, "alien": 4})
+        self.assertEqual(item, "up")
+        self.assertAlmostEqual(score, 2.0)
+        # dune neighbours both rated items: a similarity-weighted average of the two ratings
+        near, far = 40 / math.sqrt(42 * 41), 1 / math.sqrt(42)
+        (item, score), = self.table.recommend_for({"alien": 4, "up": 2})
+        self.assertEqual(item, "dune")
+        self.assertAlmostEqual(score, (near * 4 + far * 2) / (near + far))
+
+    def test_empty_and_cold_start_users(self):
+        self.assertEqual(self.table.recommend_for({}), [])
+        self.assertEqual(self.table.recommend_for({"unknown": 5}), [])
+        self.assertEqual(self.table.also_liked("unknown"), [])
+        lonely = build_neighbors(RatingMatrix.from_store(store_of([("dan", "solo", 4)])), workers=1)
+        self.assertEqual(lonely.also_liked("solo"), [])
+        self.assertEqual(lonely.recommend_for({"solo": 4}), [])
+        zero = build_neighbors(RatingMatrix.from_store(store_of([("u", "a", 5), ("u", "b", 0), ("v", "b", 0)])),
+                               workers=1)
+        self.assertEqual(zero.also_liked("a"), [])
+        self.assertEqual(zero.also_liked("b"), [])
+        empty = build_neighbors(RatingMatrix.from_store(ReviewStore()), workers=1)
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(NeighborTable([], {}).recommend_for({"dune": 5}), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
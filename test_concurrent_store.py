@@ -0,0 +1,102 @@
+"""
+Stress tests for ConcurrentReviewStore and the thread-safe containers/users.
+"""
+
+import threading
+import unittest
+
+from concurrent_store import ConcurrentReviewStore
+from containers import FavoritesContainer, WatchlistContainer
+from media_items import Book
+from media_system import MediaItem, Review
+from user_item import User
+
+THREADS = 16
+
+
+def run_threads(target, count=THREADS):
+    start = threading.Barrier(count)
+    errors = []
+
+    def worker(n):
+        start.wait()
+        try:
+            target(n)
+        except Exception as exc:  # collected for the main thread
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class TestConcurrentReviewStore(unittest.TestCase):
+
+    def test_no_lost_updates_on_hot_items(self):
+        store = ConcurrentReviewStore(stripes=4)
+        for i in range(8):
+            store.add_item(MediaItem(f"m{i}", f"Title {i}", "movie"))
+        per_thread = 2000
+
+        def write(n):
+            for i in range(per_thread):
+                store.add_review(Review(f"m{i % 8}", f"user{n}", 1 + (i + n) % 5))
+
+        self.assertEqual(run_threads(write), [])
+        snapshot = store.snapshot()
+        self.assertEqual(sum(s.count for s in snapshot.values()), THREADS * per_thread)
+        for item_id, stats in snapshot.items():
+            reviews = store.reviews_for(item_id)
+            self.assertEqual(stats.count, len(reviews))
+            self.assertAlmostEqual(stats.average, sum(r.stars for r in reviews) / len(reviews))
+
+    def test_readers_see_whole_updates(self):
+        store = ConcurrentReviewStore()
+        store.add_item(MediaItem("m1", "Dune", "book"))
+        stop = threading.Event()
+        torn = []
+
+        def read():
+            while not stop.is_set():
+                stats = store.stats("m1")
+                # every review is 4 stars, so a consistent snapshot averages exactly 4
+                if stats.count and stats.average != 4:
+                    torn.append(stats)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        errors = run_threads(lambda n: store.add_reviews(Review("m1", f"u{n}", 4) for _ in range(500)))
+        stop.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual((errors, torn), ([], []))
+        self.assertEqual(store.stats("m1").count, THREADS * 500)
+
+
+class TestThreadSafeContainersAndUsers(unittest.TestCase):
+
+    def test_favorites_stay_unique(self):
+        favorites = FavoritesContainer("c1", "Favorites")
+        books = [Book(f"b{i}", f"Book {i}", "Author", "Genre", 2000) for i in range(200)]
+        self.assertEqual(run_threads(lambda n: [favorites.add_item(b) for b in books]), [])
+        self.assertEqual(len(favorites), 200)
+
+    def test_watchlist_counts_every_add(self):
+        watchlist = WatchlistContainer("c2", "Watchlist")
+        book = Book("b1", "Book", "Author", "Genre", 2000)
+        self.assertEqual(run_threads(lambda n: [watchlist.add_item(book) for _ in range(300)]), [])
+        self.assertEqual(watchlist.count(book), THREADS * 300)
+
+    def test_username_claimed_once(self):
+        created = []
+        run_threads(lambda n: created.append(User.register("race-winner")))
+        self.assertEqual(sum(user is not None for user in created), 1)
+        User.registry.remove("race-winner")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests for the hash-backed FavoritesContainer and WatchlistContainer.
+"""
+
+import unittest
+
+from containers import FavoritesContainer, WatchlistContainer
+from media_items import Book, Film
+
+
+class TestFavoritesContainer(unittest.TestCase):
+
+    def setUp(self):
+        self.favorites = FavoritesContainer("c1", "My Favorites")
+        self.book = Book("b1", "1984", "George Orwell", "Dystopian", 1949)
+        self.film = Film("f1", "Inception", "Christopher Nolan", "Sci-Fi", 2010)
+
+    def test_no_duplicates_and_order_kept(self):
+        self.favorites.add_item(self.book)
+        self.favorites.add_item(self.film)
+        self.favorites.add_item(self.book)
+        self.assertEqual(self.favorites.get_items(), [self.book, self.film])
+        self.assertEqual(len(self.favorites), 2)
+        self.assertIn(self.film, self.favorites)
+
+    def test_remove_and_readd_goes_to_end(self):
+        self.favorites.add_item(self.book)
+        self.favorites.add_item(self.film)
+        self.favorites.remove_item(self.book)
+        self.favorites.remove_item(self.book)  # absent items are ignored
+        self.favorites.add_item(self.book)
+        self.assertEqual(self.favorites.get_items(), [self.film, self.book])
+        self.assertIs(self.favorites.item_at(0), self.film)
+
+
+class TestWatchlistContainer(unittest.TestCase):
+
+    def setUp(self):
+        self.watchlist = WatchlistContainer("c2", "Weekend Watchlist")
+        self.book = Book("b1", "1984", "George Orwell", "Dystopian", 1949)
+        self.film = Film("f1", "Inception", "Christopher Nolan", "Sci-Fi", 2010)
+
+    def test_duplicates_counted(self):
+        for item in (self.film, self.book, self.film):
+            self.watchlist.add_item(item)
+        self.assertEqual(self.watchlist.count(self.film), 2)
+        self.assertEqual(self.watchlist.get_items(), [self.film, self.book, self.film])
+
+    def test_remove_drops_first_occurrence(self):
+        for item in (self.film, self.book, self.film):
+            self.watchlist.add_item(item)
+        self.watchlist.remove_item(self.film)
+        self.assertEqual(self.watchlist.get_items(), [self.book, self.film])
+        self.assertEqual(self.watchlist.item_at(-1), self.film)
+        self.watchlist.remove_item(self.film)
+        self.assertNotIn(self.film, self.watchlist)
+        self.assertEqual(list(self.watchlist), [self.book])
+
+
+class TestContainerViews(unittest.TestCase):
+
+    def setUp(self):
+        self.watchlist = WatchlistContainer("c3", "Big Watchlist")
+        self.books = [Book(f"b{i}", f"Title {i:03d}", "Author", "Genre", 2000 + i % 7) for i in range(120)]
+        for book in reversed(self.books):
+            self.watchlist.add_item(book)
+
+    def test_slice_and_cursor_pages(self):
+        view = self.watchlist.get_items()
+        self.assertEqual(view[10:13], self.books[::-1][10:13])
+        seen, cursor = [], None
+        while True:
+            page = view.page(cursor, size=50)
+            seen.extend(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.books[::-1])
+
+    def test_sorted_view_tracks_changes(self):
+        by_title = self.watchlist.view(sort_by="title")
+        self.assertEqual(by_title[:3], self.books[:3])
+        self.watchlist.remove_item(self.books[0])
+        self.assertIs(by_title[0], self.books[1])
+        newest = self.watchlist.view(sort_by="release_year", descending=True)
+        self.assertEqual(newest[0].release_year, 2006)
+        with self.assertRaises(KeyError):
+            self.watchlist.view(sort_by="nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
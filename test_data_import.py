@@ -0,0 +1,182 @@
+"""
+Tests for streaming import: file readers, record builders and batch validation.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from data_import import (StreamingImporter, build_media_item, build_typed_item, iter_csv, iter_json_array,
+                         iter_json_lines)
+from media_items import AudioRecording, Book, Film
+from media_system import MediaItem
+
+
+class ImportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+
+class TestReaders(ImportTestCase):
+
+    def test_json_array_is_read_across_chunk_boundaries(self):
+        values = [{"id": i, "title": "A [b], {c}", "n": 12345678, "tags": ["x", "y"]} for i in range(20)]
+        values += [1234567890123, "tail ] ,", None, [], {}]
+        path = self.write("feed.json", " " * 300 + "\n" + json.dumps(values, indent=1) + "\n")
+        # every element must fit in one chunk; these sizes still split most of them
+        self.assertLess(max(len(json.dumps([value], indent=1)) for value in values), 128)
+        for chunk_size in (128, 131, 200, 1 << 16):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(iter_json_array(path, chunk_size=chunk_size)), values)
+        self.assertEqual(list(iter_json_array(self.write("empty.json", "[ ]"))), [])
+        self.assertEqual(list(iter_json_array(self.write("numbers.json", "[1,22,333]"), chunk_size=3)),
+                         [1, 22, 333])
+
+    def test_json_array_reports_bad_elements_and_resumes(self):
+        path = self.write("feed.json", '[{"item_id": "a"}, {"item_id": bad, "x": "}, ["}, {"item_id": "c"}, nul]')
+        records = list(iter_json_array(path, chunk_size=32))
+        self.assertEqual(records[0], {"item_id": "a"})
+        self.assertEqual(records[1].raw, '{"item_id": bad, "x": "}, ["}')
+        self.assertTrue(records[1].reason.startswith("invalid JSON"))
+        self.assertEqual(records[2], {"item_id": "c"})
+        self.assertEqual(records[3].raw, "nul")
+        # an element longer than chunk_size is skipped without being held in memory
+        path = self.write("long.json", '[1, {"comment": "%s"}, 2]' % ("x" * 500))
+        first, long, last = iter_json_array(path, chunk_size=32)
+        self.assertEqual((first, last), (1, 2))
+        self.assertLessEqual(len(long.raw), 203)
+        self.assertIn("chunk_size", long.reason)
+
+    def test_json_array_rejects_malformed_files(self):
+        for name, text in (("object.json", '{"id": 1}'), ("blank.json", "   \n ")):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(self.write(name, text), chunk_size=2))
+        for name, text in (("cut.json", '[{"id": 1}, {"id": 2'), ("no-comma.json", '[{"id": 1} {"id": 2}]'),
+                           ("trailing.json", '[{"id": 1},]'), ("unclosed.json", '[{"id": 1}, {"id": 2}')):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                list(iter_json_array(self.write(name, text), chunk_size=4))
+        with self.assertRaisesRegex(ValueError, "expected ',' or ']' after element 1"):
+            list(iter_json_array(self.write("no-comma.json", '[{"id": 1} {"id": 2}]')))
+
+    def test_json_lines_yields_bad_lines_as_records(self):
+        path = self.write("feed.jsonl", '{"id": 1}\n\n{broken\n[1, 2]\n')
+        records = list(iter_json_lines(path))
+        self.assertEqual(records[0], {"id": 1})
+        self.assertEqual(records[1].raw, "{broken")
+        self.assertTrue(records[1].reason.startswith("invalid JSON"))
+        self.assertEqual(records[2], [1, 2])
+
+    def test_csv_rows_are_keyed_by_header(self):
+        path = self.write("feed.csv", 'id,title,type,tags\nm1,"Dune, Part One",movie,sci-fi;epic\n')
+        self.assertEqual(list(iter_csv(path)),
+                         [{"id": "m1", "title": "Dune, Part One", "type": "movie", "tags": "sci-fi;epic"}])
+
+
+class TestBuilders(unittest.TestCase):
+
+    def test_media_item_fields_tags_and_metadata(self):
+        item = build_media_item({"id": 7, "title": "Dune", "type": " Book ", "tags": "sci-fi | classic",
+                                 "year": "1965", "author": "Herbert", "blank": ""})
+        self.assertIsInstance(item, MediaItem)
+        self.assertEqual((item.item_id, item.title, item.media_type), ("7", "Dune", "book"))
+        self.assertEqual(item.tags, ["sci-fi", "classic"])
+        self.assertEqual(item.metadata, {"year": 1965, "author": "Herbert"})
+        self.assertEqual(build_media_item({"item_id": "m1", "title": "Up", "media_type": "movie",
+                                           "tags": ["a", 2]}).tags, ["a", "2"])
+
+    def test_media_item_rejects_invalid_records(self):
+        for record in ({"title": "Up", "type": "movie"},
+                       {"id": "m1", "title": "", "type": "movie"},
+                       {"id": "m1", "title": "Up", "type": "movie", "year": "20000"},
+                       {"id": "m1", "title": "Up", "type": "movie", "year": True},
+                       {"id": "m1", "title": "Up", "type": "movie", "tags": 5}):
+            with self.subTest(record=record), self.assertRaises((ValueError, KeyError)):
+                build_media_item(record)
+
+    def test_typed_items_dispatch_on_type(self):
+        base = {"id": "x", "title": " Title ", "creator": "Someone", "genre": "Drama", "year": 1999}
+        for kind, cls in (("book", Book), ("Movie", Film), ("film", Film), ("podcast", AudioRecording),
+                          ("Audio Recording", AudioRecording), ("album", AudioRecording)):
+            with self.subTest(kind=kind):
+                item = build_typed_item(dict(base, type=kind))
+                self.assertIs(type(item), cls)
+                self.assertEqual((item.title, item.release_year), ("Title", 1999))
+        film = build_typed_item({"id": 1, "title": "Alien", "type": "film", "director": "Scott",
+                                 "release_year": "1979"})
+        self.assertEqual((film.item_id, film.creator, film.genre), ("1", "Scott", ""))
+        with self.assertRaises(ValueError):
+            build_typed_item(dict(base, type="vinyl"))
+        with self.assertRaises(ValueError):
+            build_typed_item(dict(base, type="book", title=12))
+        with self.assertRaises(KeyError):
+            build_typed_item({"id": "x", "title": "T", "type": "book", "year": 1999})
+
+
+class TestStreamingImporter(ImportTestCase):
+
+    def test_imports_by_extension_and_rejects_bad_rows(self):
+        path = self.write("feed.jsonl", "\n".join([
+            '{"id": "m1", "title": "Dune", "type": "book"}',
+            '{"id": "m2", "title": "Up"}',
+            'not json',
+            '["a", "list"]',
+            '{"id": "m3", "title": "Alien", "type": "movie", "year": 1979}',
+        ]))
+        progress = []
+        importer = StreamingImporter(batch_size=2, on_progress=lambda stats: progress.append(stats.imported))
+        items = list(importer.import_file(path))
+        self.assertEqual([item.item_id for item in items], ["m1", "m3"])
+        self.assertEqual(repr(importer.stats),
+                         "ImportStats(records_read=5, imported=2, rejected=3, batches=3)")
+        self.assertEqual(progress, [1, 1, 2])
+        missing_type, bad_json, not_object = importer.errors
+        self.assertEqual([missing_type.record_number, bad_json.record_number, not_object.record_number], [2, 3, 4])
+        self.assertIn("media_type", missing_type.reason)
+        self.assertEqual(bad_json.record, "not json")
+        self.assertTrue(bad_json.reason.startswith("invalid JSON"))
+        self.assertEqual(not_object.reason, "record is not an object")
+
+    def test_csv_and_json_files_with_typed_builder(self):
+        csv_path = self.write("feed.csv", "id,title,type,author,year\nb1,Dune,book,Herbert,1965\n"
+                                          "b2,Bad,book,Nobody,year\n")
+        json_path = self.write("feed.json", json.dumps([{"id": "f1", "title": "Alien", "type": "film",
+                                                         "director": "Scott", "year": 1979}]))
+        rejected = []
+        importer = StreamingImporter(build_typed_item, on_error=rejected.append)
+        items = list(importer.import_file(csv_path)) + list(importer.import_file(json_path))
+        self.assertEqual([(type(item), item.item_id) for item in items], [(Book, "b1"), (Film, "f1")])
+        self.assertEqual([error.record["id"] for error in rejected], ["b2"])
+        bad_path = self.write("bad.json", '[{"id": "f2", "title": "Up", "type": "film", "director": "D", "year": 2009},'
+                                          ' {"id": oops}]')
+        self.assertEqual([item.item_id for item in importer.import_file(bad_path)], ["f2"])
+        self.assertEqual(rejected[-1].record, '{"id": oops}')
+        self.assertEqual(len(importer.errors), 0)
+
+    def test_errors_are_kept_in_a_bounded_buffer(self):
+        importer = StreamingImporter(max_errors_kept=2)
+        batches = list(importer.iter_batches([{"id": str(i)} for i in range(5)]))
+        self.assertEqual(batches, [[]])
+        self.assertEqual([error.record_number for error in importer.errors], [4, 5])
+        self.assertEqual(importer.stats.rejected, 5)
+
+    def test_rejects_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            StreamingImporter(batch_size=0)
+        with self.assertRaises(ValueError):
+            StreamingImporter().import_file(self.write("feed.xml", "<feed/>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
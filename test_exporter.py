@@ -0,0 +1,85 @@
+"""
+Tests for the sharded, parallel report exporter.
+"""
+
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+
+from exporter import export_report
+from review_store import ReviewStore
+
+
+class TestExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="exports-")
+        self.store = ReviewStore()
+        for i in range(1000):
+            self.store.append(f"m{i % 37}", f"user{i % 11}", 1 + i % 5, f"review, \"number\" {i}\nline two",
+                              timestamp=1_700_000_000 + i)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_parallel_gzip_csv_matches_serial_order(self):
+        result = export_report(self.store, "reviews", self.path("reviews.csv.gz"), fmt="csv",
+                               compression="gzip", workers=3, shard_size=128)
+        self.assertEqual((result.rows, result.shards), (1000, 8))
+        with gzip.open(result.path, "rt", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["item_id", "user", "stars", "comment", "timestamp"])
+        self.assertEqual(len(rows), 1001)
+        self.assertEqual(rows[1:], [[str(v) for v in row] for row in self.store.rows()])
+        self.assertEqual(os.listdir(self.directory), ["reviews.csv.gz"])
+
+    def test_json_array_across_shards_and_filter(self):
+        result = export_report(self.store, "reviews", self.path("r.json.xz"), fmt="json",
+                               compression="xz", workers=1, shard_size=100, only_items={"m3", "m4"})
+        with lzma.open(result.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(len(data), result.rows)
+        self.assertEqual({row["item_id"] for row in data}, {"m3", "m4"})
+
+    def test_ratings_report(self):
+        result = export_report(self.store, "ratings", self.path("ratings.jsonl"), fmt="jsonl",
+                               workers=2, shard_size=10, titles={"m0": "Dune"})
+        with open(result.path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 37)
+        first = rows[0]
+        self.assertEqual((first["item_id"], first["title"]), ("m0", "Dune"))
+        self.assertAlmostEqual(first["average"], self.store.item_average("m0"), places=4)
+        self.assertEqual((first["min"], first["max"]), (1, 5))
+        self.assertIsInstance(first["min"], int)
+        text = export_report(self.store, "ratings", self.path("ratings.txt"), fmt="txt", workers=1)
+        with io.open(text.path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 38)
+
+    def test_ratings_min_max_match_review_stars(self):
+        store = ReviewStore()
+        store.append("m1", "ali", 3.5)
+        store.append("m1", "bob", 4)
+        result = export_report(store, "ratings", self.path("ratings.csv"), workers=1)
+        with open(result.path, encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[1], ["m1", "", "2", "3.75", "3.5", "4"])
+
+    def test_rejects_unknown_options(self):
+        with self.assertRaises(ValueError):
+            export_report(self.store, "everything", self.path("x"))
+        with self.assertRaises(ValueError):
+            export_report(self.store, "reviews", self.path("x"), compression="zip")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Tests for the opt-in instrumentation probes, traces and metric exports.
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import instrumentation
+from catalog import Catalog
+from cattaloglibrary import Library
+from media_system import MediaItem, Review
+from instrumentation import Metrics, instrumented, trace
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_disabled_means_original_methods(self):
+        original = vars(MediaItem)["add_review"]
+        with instrumented():
+            self.assertIsNot(vars(MediaItem)["add_review"], original)
+        self.assertIs(vars(MediaItem)["add_review"], original)
+        self.assertFalse(instrumentation.is_enabled())
+
+    def test_counts_latency_errors_and_allocations(self):
+        metrics = Metrics()
+        item = MediaItem("m1", "Dune", "book")
+        with instrumented(["media_system:MediaItem.add_review"], sample_allocations=2, metrics=metrics):
+            for _ in range(10):
+                item.add_review(Review("m1", "ali", 4))
+            with self.assertRaises(ValueError):
+                item.add_review(Review("m2", "bob", 4))
+        entry = metrics.snapshot()["media_system.MediaItem.add_review"]
+        self.assertEqual((entry["calls"], entry["errors"]), (11, 1))
+        self.assertEqual(sum(entry["buckets"].values()), 11)
+        self.assertEqual(entry["allocations"]["samples"], 5)
+        self.assertEqual(item.review_count(), 10)
+
+    def test_trace_records_nested_spans(self):
+        catalog = Catalog()
+        catalog.add_item(MediaItem("m1", "Dune", "book"))
+        with instrumented(metrics=Metrics()), trace("req-7") as t:
+            catalog.add_review(Review("m1", "ali", 5))
+        names = [(span.name, span.depth) for span in t.spans]
+        self.assertEqual(t.trace_id, "req-7")
+        self.assertIn(("catalog.Catalog.add_review", 0), names)
+        self.assertIn(("media_system.MediaItem.add_review", 1), names)
+        self.assertIsNone(instrumentation.current_trace())
+
+    def test_classmethod_probe_and_exports(self):
+        metrics = Metrics()
+        with instrumented(metrics=metrics), contextlib.redirect_stdout(io.StringIO()):
+            library = Library.from_list("Campus", [{"title": "Emma", "author": "Austen", "year": 1815}])
+        self.assertEqual(len(library.catalog), 1)
+        text = metrics.to_prometheus()
+        self.assertIn('review_system_calls_total{probe="cattaloglibrary.Library.from_list"} 1', text)
+        self.assertIn('le="+Inf"} 1', text)
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "metrics.json")
+        metrics.write(path)
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["cattaloglibrary.Library.from_list"]["calls"], 1)
+        os.remove(path)
+        os.rmdir(directory)
+
+    def test_rejects_bad_probe(self):
+        with self.assertRaises(ValueError):
+            instrumentation.enable(["media_system:MediaItem"])
+        with self.assertRaises(ValueError):
+            instrumentation.enable(["media_items:Book.add_review"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Tests for the incrementally maintained Leaderboards.
+"""
+
+import unittest
+
+from catalog import Catalog
+from leaderboards import Leaderboards
+from media_system import MediaItem, Review
+
+
+class TestLeaderboards(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = Catalog()
+        self.boards = Leaderboards(prior_mean=3.0, prior_weight=2)
+        self.catalog.subscribe(self.boards)
+        self.catalog.add_item(MediaItem("m1", "Dune", "book", metadata={"genre": "Sci-Fi"}))
+        self.catalog.add_item(MediaItem("m2", "Inception", "movie", metadata={"genre": "Sci-Fi"}))
+        self.catalog.add_item(MediaItem("m3", "Titanic", "movie", metadata={"genre": "Drama"}))
+        for item_id, stars in [("m1", 5), ("m2", 4), ("m2", 4), ("m2", 3), ("m3", 5), ("m3", 5)]:
+            self.catalog.add_review(Review(item_id, "u", stars))
+
+    def titles(self, board, **kwargs):
+        return [item.title for item, _ in self.boards.top(board, **kwargs)]
+
+    def test_most_reviewed_and_slices(self):
+        self.assertEqual(self.titles("most_reviewed"), ["Inception", "Titanic", "Dune"])
+        self.assertEqual(self.titles("most_reviewed", genre="sci-fi", k=1), ["Inception"])
+        self.assertEqual(self.titles("most_reviewed", media_type="book"), ["Dune"])
+        self.assertEqual(self.titles("most_reviewed", genre="western"), [])
+
+    def test_bayesian_average_discounts_few_reviews(self):
+        # Dune: (2*3 + 5) / 3 = 3.67, Titanic: (2*3 + 10) / 4 = 4.0
+        self.assertEqual(self.titles("top_rated"), ["Titanic", "Dune", "Inception"])
+        self.assertAlmostEqual(self.boards.score("top_rated", "m1"), 11 / 3)
+
+    def test_updates_and_removal(self):
+        for _ in range(3):
+            self.catalog.add_review(Review("m1", "v", 5))
+        self.assertEqual(self.titles("most_engaged", k=1), ["Dune"])
+        self.assertEqual(self.boards.view("most_reviewed")[0].title, "Dune")
+        self.catalog.remove_item("m1")
+        self.assertEqual(self.titles("most_reviewed", genre="sci-fi"), ["Inception"])
+        with self.assertRaises(ValueError):
+            self.boards.top("loudest")
+
+    def test_refresh_re_ranks_items_changed_outside_the_catalog(self):
+        inception = self.catalog.get("m2")
+        for review in inception.reviews[:2]:
+            inception.remove_review(review)
+        self.catalog.refresh("m2")
+        self.assertEqual(self.titles("most_reviewed"), ["Titanic", "Dune", "Inception"])
+        self.assertEqual(self.titles("most_reviewed", genre="sci-fi"), ["Dune", "Inception"])
+
+
+if __name__ == "__main__":
+    unittest.main()
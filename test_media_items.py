@@ -0,0 +1,88 @@
+"""
+Tests for memoized engagement scores and rank_by_engagement.
+"""
+
+import unittest
+
+from media_items import AudioRecording, Book, Film, rank_by_engagement
+
+
+class CountingBook(Book):
+    calls = 0
+
+    def calculate_engagement_score(self):
+        CountingBook.calls += 1
+        return len(self.reviews) * 1.2
+
+
+class Note:
+    def __init__(self, rating):
+        self.rating = rating
+
+
+class TestEngagementCache(unittest.TestCase):
+
+    def setUp(self):
+        CountingBook.calls = 0
+        self.book = CountingBook("b1", "1984", "George Orwell", "Dystopian", 1949)
+
+    def test_score_memoized_until_reviews_change(self):
+        self.book.add_review(Note(4))
+        self.assertAlmostEqual(self.book.calculate_engagement_score(), 1.2)
+        self.book.calculate_engagement_score()
+        self.assertEqual(CountingBook.calls, 1)
+        self.book.add_review(Note(5))
+        self.assertAlmostEqual(self.book.calculate_engagement_score(), 2.4)
+        self.assertEqual(CountingBook.calls, 2)
+
+    def test_edit_and_remove_invalidate(self):
+        note = Note(2)
+        self.book.add_review(note)
+        self.book.calculate_engagement_score()
+        self.book.edit_review(note, rating=5)
+        self.assertEqual(note.rating, 5)
+        self.book.calculate_engagement_score()
+        self.assertEqual(CountingBook.calls, 2)
+        self.book.remove_review(note)
+        self.assertEqual(self.book.calculate_engagement_score(), 0)
+        with self.assertRaises(ValueError):
+            self.book.edit_review(note, rating=1)
+
+    def test_replacing_a_review_is_noticed_at_the_same_length(self):
+        class RatingBook(Book):
+            def calculate_engagement_score(self):
+                return sum(review.rating for review in self.reviews)
+
+        book = RatingBook("b2", "Dune", "Frank Herbert", "Sci-Fi", 1965)
+        old = Note(2)
+        book.add_review(old)
+        self.assertEqual(book.calculate_engagement_score(), 2)
+        book.remove_review(old)
+        book.add_review(Note(5))
+        self.assertEqual(book.calculate_engagement_score(), 5)
+        book.reviews[0] = Note(1)
+        book.invalidate_engagement()
+        self.assertEqual(book.calculate_engagement_score(), 1)
+
+    def test_direct_list_append_is_noticed(self):
+        self.book.calculate_engagement_score()
+        self.book.reviews.append(Note(3))
+        self.assertAlmostEqual(self.book.calculate_engagement_score(), 1.2)
+
+
+class TestRankByEngagement(unittest.TestCase):
+
+    def test_top_k_best_first(self):
+        book = Book("b1", "1984", "George Orwell", "Dystopian", 1949)
+        film = Film("f1", "Inception", "Christopher Nolan", "Sci-Fi", 2010)
+        audio = AudioRecording("a1", "Serial", "Sarah Koenig", "Podcast", 2014)
+        for item, n in ((book, 3), (film, 1), (audio, 2)):
+            for _ in range(n):
+                item.add_review(Note(4))
+        ranked = rank_by_engagement([book, film, audio], 2)
+        self.assertEqual([item for item, _ in ranked], [book, film])
+        self.assertAlmostEqual(ranked[0][1], 3.6)
+
+
+if __name__ == "__main__":
+    unittest.main()
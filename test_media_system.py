@@ -0,0 +1,79 @@
+"""
+Tests for media_system: MediaItem rating aggregates and the Review class.
+"""
+
+import unittest
+
+from media_system import MediaItem, Review
+
+
+class TestRatingAggregates(unittest.TestCase):
+    # the running aggregates must always match a fresh pass over _reviews
+
+    def setUp(self):
+        self.item = MediaItem("m1", "Dune", "book")
+        self.reviews = [Review("m1", f"user{i}", stars) for i, stars in enumerate([1, 5, 3, 5, 2])]
+        for review in self.reviews:
+            self.item.add_review(review)
+
+    def test_add_review_updates_aggregates(self):
+        self.assertEqual(self.item.review_count(), 5)
+        self.assertAlmostEqual(self.item.average_rating(), 3.2)
+        self.assertAlmostEqual(self.item.rating_variance(), 2.56)
+        self.assertEqual(self.item.min_rating(), 1)
+        self.assertEqual(self.item.max_rating(), 5)
+        self.assertEqual(self.item.rating_distribution(), {1: 1, 2: 1, 3: 1, 5: 2})
+
+    def test_remove_review_reverses_aggregates(self):
+        self.item.remove_review(self.reviews[0])
+        self.assertEqual(self.item.min_rating(), 2)
+        self.assertAlmostEqual(self.item.average_rating(), 3.75)
+        for review in self.reviews[1:]:
+            self.item.remove_review(review)
+        self.assertIsNone(self.item.average_rating())
+        self.assertIsNone(self.item.min_rating())
+        self.assertEqual(self.item.rating_distribution(), {})
+
+    def test_remove_unknown_review_raises(self):
+        with self.assertRaises(ValueError):
+            self.item.remove_review(Review("m1", "stranger", 4))
+
+    def test_reviews_are_found_by_identity_and_keep_their_order(self):
+        twin = Review("m1", "user1", 5)
+        with self.assertRaises(ValueError):
+            self.item.edit_review(twin, stars=1)
+        with self.assertRaises(ValueError):
+            self.item.add_review(self.reviews[2])
+        self.item.remove_review(self.reviews[2])
+        self.item.add_review(twin)
+        self.assertEqual(self.item.reviews, [self.reviews[0], self.reviews[1], self.reviews[3], self.reviews[4], twin])
+        self.assertEqual(self.item.review_count(), 5)
+
+    def test_edit_review_moves_rating(self):
+        self.item.edit_review(self.reviews[1], stars=4, comment="changed my mind")
+        self.assertEqual(self.reviews[1].stars, 4)
+        self.assertEqual(self.reviews[1].comment, "changed my mind")
+        self.assertEqual(self.item.rating_distribution(), {1: 1, 2: 1, 3: 1, 4: 1, 5: 1})
+        self.assertAlmostEqual(self.item.average_rating(), 3.0)
+
+    def test_to_dict_and_str_use_aggregates(self):
+        data = self.item.to_dict()
+        self.assertAlmostEqual(data["avg_rating"], 3.2)
+        self.assertEqual(data["review_count"], 5)
+        self.assertEqual(str(self.item), "Dune (book) — 3.20/5")
+
+
+class TestReviewValidation(unittest.TestCase):
+
+    def test_rejects_out_of_range_stars(self):
+        with self.assertRaises(ValueError):
+            Review("m1", "ali", 6)
+
+    def test_add_review_checks_item_id(self):
+        item = MediaItem("m1", "Dune", "book")
+        with self.assertRaises(ValueError):
+            item.add_review(Review("m2", "ali", 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
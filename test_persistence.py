@@ -0,0 +1,95 @@
+"""
+Tests for the write-ahead-log LibraryStore: replay, compaction and torn-tail recovery.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from catalog import Catalog
+from media_system import MediaItem, Review
+from persistence import LibraryStore, item_to_record
+
+
+class TestLibraryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def fill(self, store):
+        store.add_item(MediaItem("m1", "Dune", "book", metadata={"year": 1965}))
+        store.add_item(MediaItem("m2", "Inception", "movie"))
+        store.add_tag("m1", "sci-fi")
+        store.add_review(Review("m1", "ali", 5, "Classic"))
+        store.add_review(Review("m1", "bob", 3))
+
+    def assertRecovered(self, store):
+        dune = store.catalog.get("m1")
+        self.assertEqual(len(store.catalog), 2)
+        self.assertEqual(dune.tags, ["sci-fi"])
+        self.assertEqual(dune.review_count(), 2)
+        self.assertEqual(dune.average_rating(), 4)
+        self.assertEqual(dune.metadata, {"year": 1965})
+
+    def test_replays_log_on_startup(self):
+        with LibraryStore(self.directory) as store:
+            self.fill(store)
+        with LibraryStore(self.directory) as store:
+            self.assertRecovered(store)
+
+    def test_compaction_writes_snapshot_and_drops_covered_log(self):
+        with LibraryStore(self.directory) as store:
+            self.fill(store)
+            store.compact(wait=True)
+            store.add_review(Review("m2", "ali", 4))
+        files = sorted(os.listdir(self.directory))
+        self.assertIn("media_library.snapshot", files)
+        self.assertEqual(len([f for f in files if ".wal-" in f]), 1)
+        with LibraryStore(self.directory) as store:
+            self.assertRecovered(store)
+            self.assertEqual(store.catalog.get("m2").review_count(), 1)
+
+    def test_torn_tail_is_discarded(self):
+        with LibraryStore(self.directory) as store:
+            self.fill(store)
+        segment = [f for f in os.listdir(self.directory) if ".wal-" in f][0]
+        with open(os.path.join(self.directory, segment), "ab") as f:
+            f.write(b'0badc0de {"seq": 6, "op": "add_re')
+        with LibraryStore(self.directory) as store:
+            self.assertRecovered(store)
+            store.add_review(Review("m2", "ali", 4))
+        with LibraryStore(self.directory) as store:
+            self.assertEqual(store.catalog.get("m2").review_count(), 1)
+
+    def test_rejected_mutation_is_not_logged(self):
+        with LibraryStore(self.directory) as store:
+            self.fill(store)
+            with self.assertRaises(KeyError):
+                store.add_review(Review("missing", "ali", 4))
+        with LibraryStore(self.directory) as store:
+            self.assertRecovered(store)
+
+    def test_compaction_rebuilds_state_without_reading_the_catalog(self):
+        with LibraryStore(self.directory) as store:
+            self.fill(store)
+            store.compact(wait=True)
+            store.add_tag("m1", "sci-fi")          # a repeated tag is not added twice
+            store.add_tag("m2", "dreams")
+            store.add_review(Review("m2", "bob", 2))
+            with mock.patch.object(Catalog, "__iter__", side_effect=AssertionError("catalog was read")):
+                store.compact(wait=True)
+            store.add_review(Review("m2", "cy", 4))
+            expected = {item.item_id: item_to_record(item) for item in store.catalog}
+        files = os.listdir(self.directory)
+        self.assertEqual(len([f for f in files if ".wal-" in f]), 1)
+        with LibraryStore(self.directory) as store:
+            self.assertEqual({item.item_id: item_to_record(item) for item in store.catalog}, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests for tag-based recommendations: scoring, the candidate cap, MinHash/LSH and catalog wiring.
+"""
+
+import unittest
+
+from catalog import Catalog
+from media_system import MediaItem
+from recommendation import RecommendationEngine
+
+
+def item(item_id, tags, title=None):
+    return MediaItem(item_id, title or item_id.upper(), "movie", tags=tags)
+
+
+class TestRecommendationEngine(unittest.TestCase):
+
+    def test_rare_shared_tags_score_higher(self):
+        engine = RecommendationEngine()
+        engine.add_item(item("q", ["noir", "drama"]))
+        engine.add_item(item("a", ["noir"]))
+        engine.add_item(item("b", ["drama"]))
+        for i in range(5):
+            engine.add_item(item("x%d" % i, ["drama"]))
+        self.assertEqual(engine.similar("q", k=2)[0][0], "a")
+        jaccard = RecommendationEngine(weighting="jaccard")
+        jaccard.add_item(item("q", ["noir", "drama"]))
+        jaccard.add_item(item("a", ["noir", "drama", "crime"]))
+        self.assertEqual(jaccard.similar("q"), [("a", 2 / 3)])
+        with self.assertRaises(KeyError):
+            engine.similar("missing")
+        self.assertEqual(engine.similar_to_tags(["unknown"]), [])
+
+    def test_candidate_cap_applies_within_a_single_tag(self):
+        engine = RecommendationEngine(max_candidates=10)
+        for i in range(100):
+            engine.add_item(item("m%d" % i, ["drama"]))
+        self.assertEqual(len(engine._postings_overlap({"drama"}, set())), 10)
+        engine.add_item(item("rare", ["drama", "noir"]))
+        shared = engine._postings_overlap({"noir", "drama"}, {"m0"})
+        self.assertEqual(len(shared), 10)
+        self.assertEqual(shared["rare"], {"noir", "drama"})
+        self.assertNotIn("m0", shared)
+        self.assertEqual(engine.similar_to_tags(["noir", "drama"], k=1)[0][0], "rare")
+
+    def test_minhash_agreement_estimates_jaccard(self):
+        engine = RecommendationEngine(use_lsh=True, num_perm=256, bands=32)
+        first = {"t%d" % i for i in range(30)}
+        second = {"t%d" % i for i in range(15, 45)}
+        a, b = engine._signature(first), engine._signature(second)
+        agreement = sum(x == y for x, y in zip(a, b)) / len(a)
+        self.assertAlmostEqual(agreement, 15 / 45, delta=0.1)
+        self.assertEqual(engine._signature(first), a)
+
+    def test_lsh_finds_near_duplicates(self):
+        engine = RecommendationEngine(use_lsh=True)
+        base = ["tag%d" % i for i in range(20)]
+        engine.add_item(item("a", base))
+        engine.add_item(item("b", base[:19] + ["other"]))
+        engine.add_item(item("c", ["unrelated%d" % i for i in range(20)]))
+        self.assertEqual([other for other, _ in engine.similar("a")], ["b"])
+        engine.remove_item("b")
+        self.assertEqual(engine.similar("a"), [])
+        self.assertEqual(engine._buckets.keys(), set(engine._band_keys(engine._signatures["a"]))
+                         | set(engine._band_keys(engine._signatures["c"])))
+        with self.assertRaises(ValueError):
+            RecommendationEngine(use_lsh=True, num_perm=10, bands=3)
+
+
+class TestCatalogWiring(unittest.TestCase):
+
+    def test_follows_catalog_changes(self):
+        catalog = Catalog()
+        catalog.add_item(item("m1", ["Sci-Fi", "Thriller"], "Inception"))
+        engine = RecommendationEngine()
+        catalog.subscribe(engine)
+        catalog.add_item(item("m2", ["Drama"], "Interstellar"))
+        self.assertEqual(engine.recommend_similar_titles("Inception"), [])
+        catalog.add_tag("m2", "sci-fi")
+        self.assertEqual(engine.recommend_similar_titles("Inception"), ["Interstellar"])
+
+        interstellar = catalog.get("m2")
+        interstellar.title = "Interstellar (2014)"
+        interstellar.add_tag("Thriller")
+        catalog.refresh("m2")
+        self.assertEqual(engine.recommend_similar_titles("Interstellar"), [])
+        self.assertEqual(engine.recommend_similar_titles("Inception"), ["Interstellar (2014)"])
+        self.assertEqual(engine._tags["m2"], {"drama", "sci-fi", "thriller"})
+
+        catalog.remove_item("m2")
+        self.assertEqual(engine.recommend_similar_titles("Inception"), [])
+        self.assertEqual(len(engine), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
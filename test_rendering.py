@@ -0,0 +1,119 @@
+"""
+Tests for the streaming review renderer and the displays built on it.
+"""
+
+import io
+import json
+import unittest
+
+from media_review_display import MediaReviewDisplay
+from media_review_manager import MediaItem, MediaReviewDisplay as ReviewList, Review
+from rendering import BufferedTextWriter, ReviewPager, render_reviews
+from user_item import User
+
+
+class CountingStream(io.StringIO):
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+class TestRenderReviews(unittest.TestCase):
+
+    def setUp(self):
+        self.reviews = [{"user": f"u{i}", "rating": 1 + i % 5, "comment": f"c{i}"} for i in range(100_000)]
+
+    def test_large_list_is_written_in_few_chunks(self):
+        out = CountingStream()
+        self.assertIsNone(render_reviews(out, "Big", self.reviews, average=3.0, buffer_size=1 << 16))
+        text = out.getvalue()
+        self.assertEqual(text.count("🧾 Review #"), 100_000)
+        self.assertLess(out.writes, len(text) // (1 << 16) + 2)
+
+    def test_pages_cover_every_review_once(self):
+        out = io.StringIO()
+        pager = ReviewPager("Big", self.reviews[:25], template="markdown", page_size=10)
+        while pager.has_more:
+            pager.next_page(out)
+        numbers = [line.split(".")[0] for line in out.getvalue().splitlines() if line[:1].isdigit()]
+        self.assertEqual(numbers, [str(n) for n in range(1, 26)])
+
+    def test_json_page_is_valid(self):
+        out = io.StringIO()
+        next_start = render_reviews(out, 'Say "hi"', iter(self.reviews), "json", average=3.0, start=5, limit=3)
+        page = json.loads(out.getvalue())
+        self.assertEqual((next_start, page["next_start"]), (8, 8))
+        self.assertEqual([r["number"] for r in page["reviews"]], [6, 7, 8])
+        self.assertEqual(page["title"], 'Say "hi"')
+
+    def test_rejects_unknown_template(self):
+        with self.assertRaises(ValueError):
+            render_reviews(io.StringIO(), "x", [], template="html")
+
+    def test_writer_flushes_on_exit(self):
+        out = io.StringIO()
+        with BufferedTextWriter(out, buffer_size=100) as writer:
+            writer.write("abc")
+            self.assertEqual(out.getvalue(), "")
+        self.assertEqual(out.getvalue(), "abc")
+
+
+class TestDisplays(unittest.TestCase):
+
+    def test_media_review_display_pages(self):
+        display = MediaReviewDisplay("Dune", 4.0, [{"user": "a", "rating": 4, "comment": "x"},
+                                                   {"user": "b", "rating": 5, "comment": ""}])
+        out = io.StringIO()
+        self.assertEqual(display.display(out, limit=1), 1)
+        self.assertIn("More reviews: continue from #2", out.getvalue())
+        out = io.StringIO()
+        self.assertIsNone(display.display(out, start=1))
+        self.assertIn("🧾 Review #2", out.getvalue())
+        self.assertIn("(No comment)", out.getvalue())
+
+    def test_media_review_display_average_ignores_unrated_and_outside_changes(self):
+        reviews = [{"user": "a", "rating": 4}, {"user": "b", "comment": "no stars"}]
+        display = MediaReviewDisplay("Dune", 4.0, reviews)
+        reviews.append({"user": "c", "rating": 0})
+        display.reviews.append({"user": "d", "rating": 0})
+        display.add_review("e", 5)
+        self.assertEqual(display.average_rating, 4.5)
+        self.assertEqual(len(display.reviews), 3)
+        out = io.StringIO()
+        display.display(out)
+        self.assertIn("N/A", out.getvalue())
+        with self.assertRaises(ValueError):
+            MediaReviewDisplay("Dune", 4.0, ["not a dict"])
+
+    def test_view_saved_keeps_its_layout(self):
+        user = User("renderer")
+        self.assertEqual(user.view_saved(), "User had not saved any reviews yet.")
+        user.save_review("Dune", "Great", 5)
+        user.save_review("Emma", "Witty", 4)
+        rule = "-" * 30 + "\n"
+        self.assertEqual(user.view_saved(), "Saved Reviews for user:\n" + rule
+                         + "Title: Dune\nReview: Great\nRating: 5\n" + rule
+                         + "Title: Emma\nReview: Witty\nRating: 4\n" + rule)
+        out = io.StringIO()
+        self.assertEqual(user.view_saved(limit=1, out=out), 1)
+        self.assertNotIn("Emma", out.getvalue())
+
+    def test_show_reviews_keeps_its_layout(self):
+        movie = MediaItem("m1", "Movie1")
+        out = io.StringIO()
+        ReviewList(movie).show_reviews(out)
+        self.assertEqual(out.getvalue(), "\n=== Reviews for Movie1 ===\nNo reviews yet.\n")
+        movie.add_review(Review("m1", "Ali", 5, "Amazing"))
+        movie.add_review(Review("m1", "Bob", 4, "Good"))
+        out = io.StringIO()
+        ReviewList(movie).show_reviews(out)
+        self.assertEqual(out.getvalue().splitlines()[-1], "Average Rating: 4.50 (2 reviews)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for the full-text ReviewIndex and User.search_reviews.
+"""
+
+import unittest
+
+from review_search import ReviewIndex
+from user_item import User
+
+
+class TestReviewIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ReviewIndex()
+        self.index.add("r1", "The Conjuring", "Terrifying and well-directed.", rating=4.7)
+        self.index.add("r2", "Gone Girl", "Amazing plot twist! The twist got me.", rating=4.7)
+        self.index.add("r3", "Insidious", "Creepy atmosphere, no plot, great scares.", rating=3.0)
+        self.index.add("r4", "Paddington 2", "Heartwarming twist on a plot.", rating=4.9)
+
+    def ids(self, query, **kwargs):
+        return [hit.doc_id for hit in self.index.search(query, **kwargs).hits]
+
+    def test_term_query_is_bm25_ranked(self):
+        # r2 mentions "twist" twice in a similar-length review
+        self.assertEqual(self.ids("twist"), ["r2", "r4"])
+
+    def test_prefix_and_phrase_queries(self):
+        self.assertEqual(self.ids("terrif*"), ["r1"])
+        self.assertEqual(self.ids('"plot twist"'), ["r2"])
+        self.assertEqual(sorted(self.ids("plot twist")), ["r2", "r4"])
+
+    def test_phrase_does_not_span_title_and_body(self):
+        self.assertEqual(self.ids('"girl amazing"'), [])
+
+    def test_rating_filter(self):
+        self.assertEqual(self.ids("plot", max_rating=3.5), ["r3"])
+
+    def test_pagination(self):
+        first = self.index.search("plot", per_page=2)
+        second = self.index.search("plot", page=2, per_page=2)
+        self.assertEqual(first.total, 3)
+        self.assertTrue(first.has_more)
+        self.assertFalse(second.has_more)
+        self.assertEqual(len(first.hits) + len(second.hits), 3)
+
+    def test_remove_drops_postings(self):
+        self.index.remove("r1")
+        self.assertEqual(self.ids("terrifying"), [])
+        self.assertEqual(self.index.expand_prefix("terr"), [])
+
+
+class TestUserSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.user = User("mia")
+        self.user.save_review(" Inception ", "Mind bending plot twist", 5)
+        self.user.save_review("Titanic", "Long but great", 3)
+        self.user.save_review("Up", "Great fun!", 4)
+
+    def titles(self, *args, **kwargs):
+        return [r["title"] for r in self.user.search_reviews(*args, **kwargs)]
+
+    def test_search_reviews_uses_index(self):
+        self.assertEqual(self.titles("incep"), ["Inception"])
+        self.assertEqual(self.titles("PLOT twist"), ["Inception"])
+        self.assertEqual(sorted(self.titles("GREAT")), ["Titanic", "Up"])
+        self.assertEqual(self.titles("GREAT", min_rating=4), ["Up"])
+        self.assertEqual(self.titles("great", min_rating=3, max_rating=3), ["Titanic"])
+        self.assertEqual(self.user.search_reviews("missing"), "No reviews found containing 'missing'.\n")
+
+    def test_matches_word_starts_not_infixes(self):
+        # a change from the old substring scan, which also matched inside words
+        self.assertEqual(self.titles("bend"), ["Inception"])
+        self.assertEqual(self.user.search_reviews("ending"), "No reviews found containing 'ending'.\n")
+
+    def test_keywords_without_words_match_as_substrings(self):
+        self.assertEqual(self.titles(""), ["Inception", "Titanic", "Up"])
+        self.assertEqual(self.titles("", min_rating=4), ["Inception", "Up"])
+        self.assertEqual(self.titles("!"), ["Up"])
+        self.assertEqual(self.titles("", page=2, per_page=2), ["Up"])
+
+    def test_returns_every_match_unless_paged(self):
+        for i in range(15):
+            self.user.save_review("Film %d" % i, "great", 4)
+        self.assertEqual(len(self.user.search_reviews("great")), 17)
+        self.assertEqual(len(self.user.search_reviews("great", per_page=10)), 10)
+        self.assertEqual(len(self.user.search_reviews("great", page=2, per_page=10)), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Tests for the columnar ReviewStore: rows, views, aggregates and column copies.
+"""
+
+import unittest
+from unittest import mock
+
+import review_store
+from media_system import Review
+from review_store import ReviewStore
+
+
+class TestReviewStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ReviewStore()
+        self.store.append("m1", "ali", 5, "Amazing!", timestamp=1.0)
+        self.store.append("m2", "bob", 3, timestamp=2.0)
+        self.store.append("m1", "bob", 4.5, "Ünïcode", timestamp=3.0)
+
+    def test_rows_and_views(self):
+        self.assertEqual(len(self.store), 3)
+        view = self.store[-1]
+        self.assertEqual((view.media_item_id, view.user, view.stars, view.comment, view.timestamp),
+                         ("m1", "bob", 4.5, "Ünïcode", 3.0))
+        self.assertEqual(self.store[0].stars, 5)
+        self.assertEqual(list(self.store.rows(1)), [("m2", "bob", 3, "", 2.0), ("m1", "bob", 4.5, "Ünïcode", 3.0)])
+        self.assertEqual([v.row for v in self.store.reviews_for("m1")], [0, 2])
+        self.assertEqual(self.store.reviews_for("zz"), [])
+        with self.assertRaises(IndexError):
+            self.store[3]
+
+    def test_rejects_bad_stars(self):
+        for stars in (True, "5", -1, 1000):
+            with self.assertRaises(ValueError):
+                self.store.append("m1", "ali", stars)
+
+    def test_extend_from_review_objects(self):
+        self.assertEqual(self.store.extend([Review("m3", "cy", 2, "meh")]), 1)
+        self.assertEqual(self.store[3].comment, "meh")
+
+    def test_aggregates_with_and_without_numpy(self):
+        for numpy in (review_store._numpy(), None):
+            with mock.patch.object(review_store, "_numpy", return_value=numpy):
+                self.assertEqual(self.store.averages(), {"m1": 4.75, "m2": 3.0})
+                self.assertEqual(self.store.histograms(), {"m1": {4.5: 1, 5: 1}, "m2": {3: 1}})
+        self.assertEqual(self.store.item_average("m1"), 4.75)
+        self.assertIsNone(self.store.item_average("zz"))
+        self.assertEqual(self.store.item_histogram("m1"), {4.5: 1, 5: 1})
+
+    def test_columns_are_copies_that_do_not_block_writes(self):
+        columns = self.store.columns()
+        self.store.append("m2", "cy", 1)
+        self.assertEqual(list(columns["stars"]), [500, 300, 450])
+        self.assertEqual(list(self.store.columns()["stars"]), [500, 300, 450, 100])
+        self.assertEqual(list(columns["item"]), [0, 1, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
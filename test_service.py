@@ -0,0 +1,157 @@
+"""
+Tests for the asyncio ReviewService and its HTTP/stdio front ends.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from catalog import Catalog
+from persistence import LibraryStore
+from service import ReviewService, ServiceError, serve_http, serve_stdio
+from sqlite_store import SQLiteStore
+
+
+class TestReviewService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.service = ReviewService(max_pending=8, batch_size=64)
+        await self.service.start()
+        await self.service.add_item("m1", "Dune", "book", tags=["sci-fi"], metadata={"genre": "Sci-Fi"})
+        await self.service.add_item("m2", "Up", "movie", metadata={"genre": "Family"})
+
+    async def asyncTearDown(self):
+        await self.service.stop()
+
+    async def test_concurrent_reviews_are_batched(self):
+        await asyncio.gather(*(self.service.add_review("m1" if i % 3 else "m2", f"u{i}", 4 + i % 2,
+                                                       "spice and sand")
+                               for i in range(600)))
+        item = await self.service.get_item("m1")
+        self.assertEqual(item["review_count"], 400)
+        # a queue of 8 cannot hold 600 reviews, so producers waited and writes coalesced
+        self.assertLess(self.service.batches_written, 600)
+        top = await self.service.top("most_reviewed", k=1)
+        self.assertEqual(top["items"][0]["item_id"], "m1")
+        found = await self.service.search("sand", per_page=5)
+        self.assertEqual(found["total"], 600)
+        self.assertTrue(found["has_more"])
+
+    async def test_errors(self):
+        with self.assertRaises(ServiceError) as ctx:
+            await self.service.add_review("missing", "ali", 5)
+        self.assertEqual(ctx.exception.status, 404)
+        with self.assertRaises(ServiceError):
+            await self.service.add_review("m1", "ali", 9)
+        with self.assertRaises(ServiceError):
+            await self.service.dispatch("get_item", {"nope": 1})
+
+    async def test_http_front_end(self):
+        server = await serve_http(self.service, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        async def request(method, path, body=None):
+            data = json.dumps(body).encode() if body is not None else b""
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+                         + data)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            headers = {}
+            while (line := await reader.readline()) != b"\r\n":
+                name, _, value = line.decode().partition(":")
+                headers[name.lower()] = value.strip()
+            return status, json.loads(await reader.readexactly(int(headers["content-length"])))
+
+        try:
+            status, _ = await request("POST", "/reviews", {"item_id": "m2", "user": "ali", "stars": 5})
+            self.assertEqual(status, 200)
+            status, item = await request("GET", "/items/m2")
+            self.assertEqual((status, item["average_rating"]), (200, 5.0))
+            status, top = await request("GET", "/top/top_rated?k=1&genre=family")
+            self.assertEqual(top["items"][0]["title"], "Up")
+            status, _ = await request("GET", "/nowhere")
+            self.assertEqual(status, 404)
+            for body in ([["stars", "5"]], "text", 5):
+                status, error = await request("POST", "/reviews", body)
+                self.assertEqual((status, error["error"]), (400, "request body must be a JSON object"))
+            writer.write(b"POST /reviews HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+            await writer.drain()
+            self.assertEqual((await reader.readline()).split()[1], b"400")
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+
+    async def test_stdio_front_end(self):
+        reader = asyncio.StreamReader()
+        for request in ({"id": 1, "op": "add_review", "item_id": "m1", "user": "bob", "stars": 3},
+                        {"id": 2, "op": "get_item", "item_id": "m2"}):
+            reader.feed_data((json.dumps(request) + "\n").encode())
+        reader.feed_data(b"not json\n")
+        reader.feed_eof()
+        out = []
+        await serve_stdio(self.service, reader, out.append)
+        responses = sorted((json.loads(line) for line in out), key=lambda r: r.get("id", 0))
+        self.assertEqual([r["status"] for r in responses], [400, 200, 200])
+        self.assertEqual(responses[2]["title"], "Up")
+
+
+class FailingStore:
+    def add_item(self, item):
+        pass
+
+    def add_reviews(self, reviews):
+        raise OSError("disk full")
+
+
+class TestPersistentStores(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    async def test_sqlite_store_gets_each_review_once(self):
+        path = os.path.join(self.directory, "library.db")
+        store = SQLiteStore(path)
+        try:
+            async with ReviewService(store=store) as service:
+                await service.add_item("m1", "Dune", "book")
+                await service.add_review("m1", "ali", 5)
+                self.assertEqual((await service.get_item("m1"))["review_count"], 1)
+        finally:
+            store.close()
+        with SQLiteStore(path) as store:
+            self.assertEqual(store.get_item("m1").review_count(), 1)
+
+    async def test_library_store_gets_each_review_once(self):
+        with LibraryStore(self.directory) as store:
+            async with ReviewService(store=store) as service:
+                self.assertIs(service.catalog, store.catalog)
+                await service.add_item("m1", "Dune", "book")
+                await service.add_review("m1", "ali", 5)
+                self.assertEqual((await service.get_item("m1"))["review_count"], 1)
+                self.assertEqual(service.leaderboards.top("most_reviewed", 1)[0][1], 1)
+        with LibraryStore(self.directory) as store:
+            self.assertEqual(store.catalog.get("m1").review_count(), 1)
+        with self.assertRaises(ValueError):
+            with LibraryStore(self.directory) as store:
+                ReviewService(catalog=Catalog(), store=store)
+
+    async def test_reviews_the_store_rejects_are_not_applied(self):
+        async with ReviewService(store=FailingStore()) as service:
+            await service.add_item("m1", "Dune", "book")
+            with self.assertRaises(ServiceError) as ctx:
+                await service.add_review("m1", "ali", 5, "spice")
+            self.assertEqual(ctx.exception.status, 500)
+            self.assertEqual((await service.get_item("m1"))["review_count"], 0)
+            self.assertEqual((await service.search("spice"))["total"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests for the SQLite storage backend.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from catalog import Catalog
+from containers import WatchlistContainer
+from media_system import MediaItem, Review
+from sqlite_store import SQLiteStore, SQLiteStoreError
+from user_item import User
+
+
+class TestSQLiteStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="sqlite-store-")
+        self.path = os.path.join(self.directory, "library.db")
+        self.store = SQLiteStore(self.path, readers=2, cache_size=2)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def reopen(self):
+        self.store.close()
+        self.store = SQLiteStore(self.path, readers=2, cache_size=2)
+
+    def test_items_round_trip_lazily(self):
+        self.store.add_items(MediaItem(f"m{i}", f"Title {i}", "book", tags=["Sci-Fi"],
+                                       metadata={"year": 1960 + i}) for i in range(10))
+        self.store.add_reviews([Review("m3", "ali", 5, "great"), Review("m3", "bob", 4)])
+        self.reopen()
+        self.assertEqual(len(self.store), 10)
+        item = self.store.get_item("m3")
+        self.assertEqual(item.metadata, {"year": 1963})
+        self.assertEqual(item.average_rating(), 4.5)
+        self.assertIs(self.store.get_item("m3"), item)
+        self.assertEqual(len(self.store.find_by_tag("sci-fi")), 10)
+        self.assertEqual(self.store.item_ids("m7", 5), ["m8", "m9"])
+        self.assertEqual([r.user for r in self.store.reviews_by_user("bob")], ["bob"])
+        self.assertIsNone(self.store.get_item("missing"))
+        with self.assertRaises(KeyError):
+            self.store.add_review(Review("missing", "ali", 3))
+
+    def test_catalog_writes_through(self):
+        catalog = Catalog()
+        catalog.subscribe(self.store)
+        catalog.add_item(MediaItem("m1", "Dune", "book"))
+        catalog.add_tag("m1", "classic")
+        catalog.add_review(Review("m1", "ali", 5))
+        self.reopen()
+        item = self.store.get_item("m1")
+        self.assertEqual(item.tags, ["classic"])
+        self.assertEqual(self.store.rating_summary("m1"), (1, 5.0))
+
+    def test_users_and_containers(self):
+        user = User("Ali")
+        user.save_review("Dune", "Classic", 5)
+        self.store.save_user(user)
+        self.store.save_user_review("Ali", "Up", "Sweet", 4)
+        loaded = self.store.get_user("ali")
+        self.assertEqual([r["title"] for r in loaded.saved_reviews], ["Dune", "Up"])
+        with self.assertRaises(ValueError):
+            self.store.save_user(User("ALI"))
+
+        self.store.add_items([MediaItem("m1", "Dune", "book"), MediaItem("m2", "Up", "movie")])
+        watchlist = WatchlistContainer("w1", "Weekend")
+        for item_id in ("m2", "m1", "m2"):
+            watchlist.add_item(self.store.get_item(item_id))
+        self.store.save_container(watchlist)
+        self.reopen()
+        loaded = self.store.load_container("w1")
+        self.assertEqual([item.item_id for item in loaded], ["m2", "m1", "m2"])
+        self.assertIsNone(self.store.load_container("nope"))
+
+    def test_concurrent_readers(self):
+        self.store.add_items(MediaItem(f"m{i}", f"Title {i}", "book") for i in range(50))
+        errors = []
+
+        def read():
+            try:
+                for i in range(50):
+                    self.assertIsNotNone(self.store.get_item(f"m{i}"))
+            except Exception as exc:  # collected for the main thread
+                errors.append(exc)
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        self.store.add_review(Review("m1", "ali", 5))
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_closed_store_rejects_use(self):
+        self.store.close()
+        with self.assertRaises(SQLiteStoreError):
+            self.store.get_item("m1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Startup tests: imports do no work and load optional subsystems lazily.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from benchmarks import STARTUP_BUDGET_MS, import_profile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY = ("numpy", "sqlite3", "asyncio", "concurrent.futures", "json")
+
+
+def run(statement):
+    return subprocess.run([sys.executable, "-c", statement], capture_output=True, text=True,
+                          check=True, cwd=HERE).stdout
+
+
+def loaded_after(statement):
+    out = run(f"import sys\n{statement}\nprint(' '.join(m for m in {HEAVY!r} if m in sys.modules))")
+    return out.split()
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_entry_point_loads_nothing(self):
+        self.assertEqual(loaded_after("import review_system"), [])
+        self.assertEqual(run("import sys, review_system; print('catalog' in sys.modules)").strip(), "False")
+
+    def test_core_names_skip_optional_subsystems(self):
+        loaded = loaded_after("import review_system as r; r.Catalog(); r.ReviewStore(); r.Leaderboards()")
+        self.assertEqual(loaded, [])
+
+    def test_subsystems_load_on_first_use(self):
+        import review_system
+        self.assertIs(review_system.persistence, sys.modules["persistence"])
+        with self.assertRaises(AttributeError):
+            review_system.no_such_thing
+
+    def test_imports_are_silent(self):
+        self.assertEqual(run("import cattaloglibrary, media_review_display, media_review_manager"), "")
+
+    def test_startup_budget(self):
+        best = min(import_profile()["review_system"][1] for _ in range(3))
+        self.assertLess(best / 1000, STARTUP_BUDGET_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Tests for the normalized-title / trigram title index and its catalog wiring.
+"""
+
+import unittest
+from unittest import mock
+
+import title_index
+from catalog import Catalog
+from media_system import MediaItem
+from title_index import TitleIndex, normalize_title, trigrams
+
+
+class TestTitleIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TitleIndex()
+        for key, title in [("m1", "The Conjuring"), ("m2", "Mission: Impossible"), ("m3", "Amélie"),
+                           ("m4", "The Conjuring 2"), ("m5", "Inception")]:
+            self.index.add(key, title)
+
+    def test_exact_lookup_ignores_case_spacing_accents_and_punctuation(self):
+        self.assertEqual(self.index.lookup("the conjuring "), ["m1"])
+        self.assertEqual(self.index.lookup("MISSION IMPOSSIBLE"), ["m2"])
+        self.assertEqual(self.index.lookup("amelie"), ["m3"])
+        self.assertEqual(self.index.lookup("conjuring"), [])
+
+    def test_fuzzy_search_ranks_closest_first(self):
+        matches = self.index.search("the conjurnig")
+        self.assertEqual([m.key for m in matches[:2]], ["m1", "m4"])
+        self.assertGreater(matches[0].score, matches[1].score)
+        self.assertEqual(self.index.search("Inception")[0].score, 1.0)
+        self.assertEqual(self.index.search("zzzz"), [])
+        self.assertEqual(self.index.resolve("incepton"), "m5")
+
+    def test_search_agrees_with_brute_force(self):
+        index = TitleIndex(threshold=0.2)
+        titles = {f"t{i}": f"{w} {v} {i % 7}" for i, (w, v) in
+                  enumerate((w, v) for w in ("red", "blue", "green", "gold") for v in ("fox", "star", "road"))}
+        for key, title in titles.items():
+            index.add(key, title)
+        query = "gren stars"
+        wanted = trigrams(normalize_title(query))
+        expected = set()
+        for key, title in titles.items():
+            grams = trigrams(normalize_title(title))
+            if len(wanted & grams) / len(wanted | grams) >= 0.2:
+                expected.add(key)
+        self.assertEqual({m.key for m in index.search(query, limit=100)}, expected)
+        with mock.patch.object(title_index, "_numpy", return_value=None):
+            self.assertEqual({m.key for m in index.search(query, limit=100)}, expected)
+            self.assertEqual(self.index.resolve("incepton"), "m5")
+
+    def test_remove_readd_and_compact(self):
+        self.index.remove("m1")
+        self.assertEqual(self.index.lookup("The Conjuring"), [])
+        self.assertNotIn("m1", [m.key for m in self.index.search("the conjuring")])
+        self.index.add("m4", "Dune")
+        self.assertEqual(self.index.lookup("dune"), ["m4"])
+        self.index.compact()
+        self.assertEqual((len(self.index), self.index.resolve("dune"), self.index.title("m2")),
+                         (4, "m4", "Mission: Impossible"))
+
+
+class TestCatalogTitles(unittest.TestCase):
+
+    def test_find_title_and_normalized_title(self):
+        catalog = Catalog()
+        item = MediaItem("m1", "The Conjuring", "movie")
+        catalog.add_item(item)
+        catalog.add_item(MediaItem("m2", "Dune", "book"))
+        self.assertEqual(catalog.find_title(" the conjuring "), [item])
+        self.assertEqual(catalog.find_title("the conjring"), [item])
+        self.assertEqual(catalog.find_title("the conjring", fuzzy=False), [])
+        self.assertEqual(item.normalized_title(), "the conjuring")
+        item.title = "The Conjuring: Last Rites"
+        self.assertEqual(item.normalized_title(), "the conjuring last rites")
+        catalog.refresh("m1")
+        self.assertEqual(catalog.find_title("the conjuring last rites"), [item])
+        catalog.remove_item("m1")
+        self.assertEqual(catalog.find_title("the conjuring last rites"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
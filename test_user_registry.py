@@ -0,0 +1,85 @@
+"""
+Tests for the UserRegistry and its Bloom filter.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from user_item import User
+from user_registry import BloomFilter, UserRegistry, UsernameTaken
+
+
+class TestUserRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="users-")
+        self.path = os.path.join(self.directory, "users.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_case_insensitive_register_and_get(self):
+        registry = UserRegistry(factory=User, bloom=True, expected_users=1000)
+        ali = registry.register("  Ali ")
+        self.assertEqual(ali.username, "Ali")
+        self.assertIs(registry.get("ALI"), ali)
+        self.assertIn("aLi", registry)
+        self.assertFalse(registry.is_available("ali"))
+        with self.assertRaises(UsernameTaken):
+            registry.register("ALI")
+        with self.assertRaises(ValueError) as raised:
+            registry.register("   ")
+        self.assertNotIsInstance(raised.exception, UsernameTaken)
+        self.assertIsNone(registry.get("bob"))
+
+    def test_persists_across_restarts(self):
+        with UserRegistry(self.path) as registry:
+            registry.register("ali")
+            self.assertEqual(registry.bulk_import(["bob", "Bob", "", "ALI", "cat"]), (2, 3))
+            registry.remove("bob")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('"half-writ')   # crash in the middle of a write
+        with UserRegistry(self.path) as registry:
+            self.assertEqual(list(registry), ["ali", "cat"])
+            registry.register("dan")
+            registry.compact()
+        with UserRegistry(self.path) as registry:
+            self.assertEqual(list(registry), ["ali", "cat", "dan"])
+
+    def test_damaged_lines_end_the_replay(self):
+        for damage in ('{"renamed": "ali"}\n', '42\n', '{"removed": null}\n'):
+            with self.subTest(damage=damage):
+                with open(self.path, "w", encoding="utf-8") as f:
+                    f.write('"ali"\n' + damage + '"bob"\n')
+                with UserRegistry(self.path) as registry:
+                    self.assertEqual(list(registry), ["ali"])
+                    registry.register("cat")
+                with UserRegistry(self.path) as registry:
+                    self.assertEqual(list(registry), ["ali", "cat"])
+
+    def test_user_class_uses_registry(self):
+        self.assertIsNotNone(User.register("registry-test"))
+        self.assertIsNone(User.register("REGISTRY-TEST"))
+        with self.assertRaises(ValueError):
+            User.register("  ")
+        self.assertEqual(User.get("Registry-Test").username, "registry-test")
+        User.registry.remove("registry-test")
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives_and_low_false_positives(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f"user{i}")
+        self.assertTrue(all(f"user{i}" in bloom for i in range(5000)))
+        false_positives = sum(f"other{i}" in bloom for i in range(5000))
+        self.assertLess(false_positives, 150)
+        copy = BloomFilter.from_bytes(bloom.to_bytes())
+        self.assertIn("user42", copy)
+
+
+if __name__ == "__main__":
+    unittest.main()
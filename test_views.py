@@ -0,0 +1,91 @@
+"""
+Tests for OrderIndex, the blocked SortedIndex and the paginated views over them.
+"""
+
+import random
+import unittest
+from unittest import mock
+
+import views
+from views import ItemsView, OrderIndex, SortedIndex
+
+
+class TestOrderIndex(unittest.TestCase):
+
+    def test_positional_reads_skip_removed_values_without_compacting(self):
+        rng = random.Random(3)
+        order = OrderIndex()
+        live = []
+        for step in range(2000):
+            if live and rng.random() < 0.4:
+                seq = live.pop(rng.randrange(len(live)))
+                order.remove(seq)
+            else:
+                live.append(order.append(step * 10))
+            if step % 25 == 0 and live:
+                self.assertEqual(len(order), len(live))
+                index = rng.randrange(len(live))
+                self.assertEqual(order.seq_at(index), live[index])
+                self.assertEqual(order.seq_at(-1), live[-1])
+                self.assertEqual(order.slice(index, index + 5), [order.get(seq) for seq in live[index:index + 5]])
+        with self.assertRaises(IndexError):
+            order.seq_at(len(live))
+
+    def test_removal_leaves_tombstones_until_half_are_dead(self):
+        order = OrderIndex()
+        for value in "abcdef":
+            order.append(value)
+        order.remove(1)
+        order.remove(2)
+        self.assertEqual(len(order._order), 6)
+        self.assertEqual(ItemsView.over_order(order)[:], ["a", "d", "e", "f"])
+        self.assertEqual(order.seq_at(1), 3)
+        order.remove(3)
+        order.remove(4)
+        self.assertEqual(order._order, [0, 5])
+        self.assertEqual(order.slice(0, 9), ["a", "f"])
+
+
+class TestSortedIndex(unittest.TestCase):
+
+    def test_matches_a_sorted_list_through_splits_and_merges(self):
+        rng = random.Random(7)
+        with mock.patch.object(views, "_LOAD", 4):
+            index = SortedIndex()
+            keys = {}
+            for step in range(3000):
+                ident = rng.randrange(300)
+                if ident in keys and rng.random() < 0.5:
+                    index.remove(ident)
+                    del keys[ident]
+                else:
+                    keys[ident] = rng.randrange(50)
+                    index.add(ident, keys[ident])
+                expected = sorted((key, ident) for ident, key in keys.items())
+                self.assertEqual(len(index), len(expected))
+                if step % 50 == 0:
+                    self.assertEqual(index.entries(0, len(index)), expected)
+                    start = rng.randrange(len(expected) + 1)
+                    self.assertEqual(index.idents(start, start + 7), [i for _, i in expected[start:start + 7]])
+                    low, high = sorted(rng.sample(range(50), 2))
+                    start, stop = index.bounds(low, high)
+                    self.assertEqual(index.entries(start, stop),
+                                     [e for e in expected if low <= e[0] <= high])
+
+    def test_views_page_in_both_directions(self):
+        index = SortedIndex()
+        for ident in range(10):
+            index.add(ident, ident % 3)
+        ascending = ItemsView.over_sorted(index, str)
+        descending = ItemsView.over_sorted(index, str, reverse=True)
+        self.assertEqual(list(ascending), ["0", "3", "6", "9", "1", "4", "7", "2", "5", "8"])
+        self.assertEqual(list(descending), list(reversed(list(ascending))))
+        first = descending.page(size=4)
+        self.assertEqual(descending.page(first.next_cursor, size=4).items, ["4", "1", "9", "6"])
+        self.assertEqual(ascending[2:5], ["6", "9", "1"])
+        index.discard(99)
+        self.assertEqual(index.key_of(4), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
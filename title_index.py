@@ -0,0 +1,230 @@
+"""
+Title resolution: exact and typo-tolerant lookup of titles typed by users.
+
+The notebook's calc_avg() strips and lower-cases every title until one
+matches the input. TitleIndex normalizes each title once, when it is
+added:
+    - exact lookups go through a dict keyed by the normalized title, so
+      "the conjuring " finds "The Conjuring" in O(1)
+    - fuzzy lookups use a character-trigram inverted index. A title
+      matches when the Jaccard similarity of its trigram set and the
+      query's is at least the threshold.
+
+Posting lists are uint32 arrays of dense title ids. With numpy, a fuzzy
+search is one bincount over the query's lists, which scores every title
+at once: a few milliseconds over a million titles. Without numpy, only
+the rarest lists are read. A title that reaches threshold t must share
+at least ceil(t * |q|) of the query's |q| trigrams, so it must appear in
+one of the |q| - ceil(t * |q|) + 1 least common ones. The search tries
+strict thresholds first, since those read the fewest lists.
+
+Catalog keeps one of these as Catalog.titles (see Catalog.find_title).
+It can also subscribe to a Catalog like the other derived indexes.
+
+Example:
+    >>> index = TitleIndex()
+    >>> index.add("m1", "The Conjuring")
+    >>> index.add("m2", "Mission: Impossible")
+    >>> index.lookup("  the CONJURING ")
+    ['m1']
+    >>> index.search("mision impossibel")[0]
+    TitleMatch(key='m2', title='Mission: Impossible', score=0.6364)
+    >>> index.resolve("conjring")
+    'm1'
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from typing import Any, Dict, Hashable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from review_store import _numpy
+
+_NON_WORD = re.compile(r"[\W_]+")
+_SEARCH_LEVELS = (0.7, 0.5)
+
+
+def normalize_title(title: str) -> str:
+    """Case-fold, drop accents and punctuation, collapse whitespace.
+
+    >>> normalize_title("  Amélie:  The  Movie! ")
+    'amelie the movie'
+    """
+    text = title.casefold()
+    if not text.isascii():
+        text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Character trigrams of a normalized title, padded so word starts count."""
+    if not normalized:
+        return set()
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleMatch(NamedTuple):
+    key: Hashable
+    title: str
+    score: float  # trigram Jaccard similarity; 1.0 for exact (normalized) matches
+
+
+class TitleIndex:
+    """Normalized-title hash plus trigram index over keyed titles.
+
+    Args:
+        threshold (float): default minimum similarity for fuzzy matches, in (0, 1];
+            0.3 (as in PostgreSQL's pg_trgm) tolerates a typo or two in short titles
+    """
+
+    def __init__(self, threshold: float = 0.3):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        # titles get dense internal ids so posting lists can be compact uint32 arrays
+        self._keys: List[Optional[Hashable]] = []
+        self._titles: List[Optional[str]] = []
+        self._norms: List[Optional[str]] = []
+        self._sizes = array("I")               # distinct trigrams per title
+        self._ids: Dict[Hashable, int] = {}
+        self._exact: Dict[str, List[int]] = {}
+        self._grams: Dict[str, array] = {}
+        self._dead = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._ids
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._ids))
+
+    def add(self, key: Hashable, title: str):
+        """Index a title under key (replacing the key's previous title)."""
+        if key in self._ids:
+            self.remove(key)
+        norm = normalize_title(title)
+        doc = len(self._keys)
+        self._keys.append(key)
+        self._titles.append(title)
+        self._norms.append(norm)
+        self._ids[key] = doc
+        self._exact.setdefault(norm, []).append(doc)
+        title_grams = trigrams(norm)
+        self._sizes.append(len(title_grams))
+        grams = self._grams
+        for gram in title_grams:
+            postings = grams.get(gram)
+            if postings is None:
+                postings = grams[gram] = array("I")
+            postings.append(doc)
+
+    def remove(self, key: Hashable):
+        """Drop a key; raises KeyError if it is not indexed."""
+        doc = self._ids.pop(key)
+        norm = self._norms[doc]
+        docs = self._exact[norm]
+        docs.remove(doc)
+        if not docs:
+            del self._exact[norm]
+        # posting lists keep the dead id until the next compaction
+        self._keys[doc] = self._titles[doc] = self._norms[doc] = None
+        self._dead += 1
+        if self._dead > 1024 and self._dead > len(self._ids):
+            self.compact()
+
+    def compact(self):
+        """Rebuild the posting lists without removed titles."""
+        live = [(key, self._titles[doc]) for key, doc in self._ids.items()]
+        self.__init__(self.threshold)
+        for key, title in live:
+            self.add(key, title)
+
+    def title(self, key: Hashable) -> str:
+        return self._titles[self._ids[key]]
+
+    def lookup(self, title: str) -> List[Hashable]:
+        """Keys whose normalized title equals the normalized input, in insertion order."""
+        return [self._keys[doc] for doc in self._exact.get(normalize_title(title), ())]
+
+    def search(self, query: str, limit: int = 10, threshold: Optional[float] = None) -> List[TitleMatch]:
+        """Best matches for a possibly misspelled title, most similar first.
+
+        Exact (normalized) matches score 1.0. Other titles are included when
+        their trigram similarity reaches threshold (self.threshold if None).
+        """
+        t = self.threshold if threshold is None else threshold
+        wanted = trigrams(normalize_title(query))
+        if not wanted or limit < 1:
+            return []
+        if _numpy() is not None:
+            scored = self._scan_vectorized(wanted, t)
+        else:
+            # A stricter threshold scans far fewer posting lists. Every title at or
+            # above it is found, so once that gives `limit` titles they are the top ones.
+            for level in [level for level in _SEARCH_LEVELS if level > t] + [t]:
+                scored = self._scan(wanted, level)
+                if len(scored) >= limit:
+                    break
+        keys, titles = self._keys, self._titles
+        best = heapq.nsmallest(limit, scored, key=lambda pair: (-pair[0], titles[pair[1]], pair[1]))
+        return [TitleMatch(keys[doc], titles[doc], round(score, 4)) for score, doc in best]
+
+    def _scan(self, wanted: Set[str], t: float) -> List[Tuple[float, int]]:
+        """(score, doc) for every live title with similarity >= t (pure Python)."""
+        size = len(wanted)
+        need = max(1, math.ceil(t * size))
+        postings = sorted((self._grams.get(gram, ()) for gram in wanted), key=len)
+        prefix = postings[:size - need + 1]
+        sizes, norms = self._sizes, self._norms
+        low, high = t * size, size / t
+        scored = []
+        for doc in set().union(*prefix):
+            # the similarity is at most min(size, n) / max(size, n)
+            if not low <= sizes[doc] <= high or norms[doc] is None:
+                continue
+            grams = trigrams(norms[doc])
+            common = len(wanted & grams)
+            score = common / (size + len(grams) - common)
+            if score >= t:
+                scored.append((score, doc))
+        return scored
+
+    def _scan_vectorized(self, wanted: Set[str], t: float) -> List[Tuple[float, int]]:
+        """_scan with numpy: one bincount over the query's posting lists counts
+        every title's overlap, then only titles sharing enough are scored."""
+        np = _numpy()
+        grams = self._grams
+        lists = [np.frombuffer(grams[gram], dtype=np.uint32) for gram in wanted if gram in grams]
+        if not lists:
+            return []
+        shared = np.bincount(np.concatenate(lists), minlength=len(self._keys))
+        size = len(wanted)
+        candidates = np.flatnonzero(shared >= max(1, math.ceil(t * size)))
+        shared = shared[candidates]
+        scores = shared / (size + np.frombuffer(self._sizes, dtype=np.uint32)[candidates] - shared)
+        norms = self._norms
+        return [(float(scores[i]), int(candidates[i])) for i in np.flatnonzero(scores >= t).tolist()
+                if norms[candidates[i]] is not None]
+
+    def resolve(self, title: str, threshold: Optional[float] = None) -> Optional[Hashable]:
+        """The key for a typed title: an exact match, else the closest fuzzy one, else None."""
+        exact = self.lookup(title)
+        if exact:
+            return exact[0]
+        matches = self.search(title, limit=1, threshold=threshold)
+        return matches[0].key if matches else None
+
+    # ------------------------------------------------------------------
+    # catalog listener hooks (see Catalog.subscribe)
+
+    def on_add_item(self, item: Any):
+        self.add(item.item_id, item.title)
+
+    def on_remove_item(self, item: Any):
+        if item.item_id in self._ids:
+            self.remove(item.item_id)
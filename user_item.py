@@ -1,12 +1,32 @@
-user_system/user_item.py
+import io
+
+from rendering import Template, render_reviews
+from review_search import ReviewIndex, tokenize
+from user_registry import UserRegistry, UsernameTaken
+
+
+class _SavedReviewsTemplate(Template): # the original view_saved layout
+  def header(self, title, average, total):
+    return "Saved Reviews for user:\n" + "-" * 30 + "\n"
+
+  def review(self, number, position, fields, review):
+    return f"Title: {review['title']}\nReview: {review['review']}\nRating: {review['rating']}\n" + "-" * 30 + "\n"
+
+_SAVED_LAYOUT = _SavedReviewsTemplate()
+
+
 class User: # represents users in our review system
 
-  # stores all usernames 
-  all_usernames = []
+  # stores all usernames (case-insensitive, O(1) lookups); set up below the class,
+  # use User.registry = UserRegistry(path, factory=User) to keep it on disk.
+  # It replaces the old all_usernames list: iterate User.registry for the names,
+  # and use "name in User.registry" for the taken check
+  registry = None
 
   def __init__(self, username): # creates a new user with a given username
     self._username = username 
     self._saved_reviews = [] 
+    self._review_index = ReviewIndex() # full-text index kept in step with _saved_reviews
   
   @classmethod
   def create_user(cls): # creates a new username
@@ -18,42 +38,76 @@ class User: # represents users in our review system
       # ensures that the username is not empty, must have atleast 1 character
       if not clean_username:
         print("Username cannot be empty, please try again.\n") 
-      elif clean_username in cls.all_usernames:
-      #ensures that the username is not already in use
-        print("{clean_username} is already taken, please choose another.\n")
       else:
         # once the username is verified as a valid username, the user is created
-        new_user = cls(clean_username)
-        cls.all_usernames.append(clean_username)
-        print(f"Username: {clean_username} \nYour account has successfully been created.\n")
-        return new_user
+        new_user = cls.register(clean_username)
+        if new_user is None:
+        #ensures that the username is not already in use
+          print(f"{clean_username} is already taken, please choose another.\n")
+        else:
+          print(f"Username: {clean_username} \nYour account has successfully been created.\n")
+          return new_user
+
+  @classmethod
+  def register(cls, username): # claims a username and creates the user, or returns None if it is taken
+    # other problems (e.g. an empty name) still raise ValueError
+    try:
+      return cls.registry.register(username)
+    except UsernameTaken:
+      return None
+
+  @classmethod
+  def get(cls, username): # fetches a registered user by name (any case) without a scan, or None
+    return cls.registry.get(username)
 
   @property
   def username(self): # returns the user's username (read-only)
     return self._username
+
+  @property
+  def saved_reviews(self): # copies of the saved review entries, oldest first
+    return [dict(review) for review in self._saved_reviews]
   
   def save_review(self, media_title, review_descrip, rating): #saves a review to the user's list
     review_entry = {"title": media_title.strip(), "review": review_descrip.strip(), "rating": rating}
+    self._review_index.add(len(self._saved_reviews), review_entry["title"], review_entry["review"], rating)
     self._saved_reviews.append(review_entry)
   
-  def view_saved(self): #shows all the reviews the user has saved
+  def view_saved(self, start=0, limit=None, template=None, out=None): #shows all the reviews the user has saved
+    # streams the page through rendering.render_reviews; with out=None the text is returned as before,
+    # otherwise it is written to out (a file, sys.stdout, ...) and the start of the next page is returned
     if not self._saved_reviews:
       return "User had not saved any reviews yet."
     # for nice and organized layout of info
-    result = f"Saved Reviews for user:\n"
-    result += "-" * 30 + "\n"
-    for review in self._saved_reviews:
-      result += f"Title: {review['title']}\n"
-      result += f"Review: {review['review']}\n"
-      result += f"Rating: {review['rating']}\n"
-      result += "-" * 30 + "\n"
-    return result
+    target = io.StringIO() if out is None else out
+    next_start = render_reviews(target, self._username, self._saved_reviews, template or _SAVED_LAYOUT,
+                                start=start, limit=limit)
+    return target.getvalue() if out is None else next_start
   
-  def search_reviews(self, keyword): # allows user to search through saved reviews using a keyword
-    key_search = [] 
-    for review in self._saved_reviews:
-      if keyword.lower() in review['review'].lower() or keyword.lower() in review['title'].lower():
-        key_search.append(review)
+  def search_reviews(self, keyword, min_rating=None, max_rating=None, page=1, per_page=None): # allows user to search through saved reviews using a keyword
+    # served by the full-text index: a single word matches the start of any word in the title or review
+    # ("incep" finds "Inception", but "ception" does not), several words match as a phrase, and results
+    # come back best match first (BM25). A keyword with no words in it (e.g. "" or "!?") is still
+    # matched as a plain substring in saved order, so an empty keyword lists every review.
+    # min_rating/max_rating are inclusive bounds; per_page=None returns every match on one page
+    if per_page is None:
+      page, per_page = 1, max(1, len(self._saved_reviews))
+    terms = tokenize(keyword)
+    if not terms:
+      needle = keyword.lower()
+      key_search = [review for review in self._saved_reviews
+                    if (needle in review['review'].lower() or needle in review['title'].lower())
+                    and (min_rating is None or review['rating'] >= min_rating)
+                    and (max_rating is None or review['rating'] <= max_rating)]
+      key_search = key_search[(page - 1) * per_page:page * per_page]
+    else:
+      if len(terms) == 1:
+        query = terms[0] + "*"
+      else:
+        query = '"' + " ".join(terms) + '"'
+      found = self._review_index.search(query, min_rating=min_rating, max_rating=max_rating,
+                                        page=page, per_page=per_page)
+      key_search = [self._saved_reviews[hit.doc_id] for hit in found.hits]
     if not key_search:
       return f"No reviews found containing '{keyword}'.\n"
     return key_search 
@@ -65,6 +119,5 @@ class User: # represents users in our review system
   def __repr__(self): # for debugging
     return f"User(username = {self._username}, saved_reviews = {self._saved_reviews})\n"
 
-  git add user_system/user_system.py
-git commit -m "Add UserItem class with validation, encapsulation, and Project 1 integration"
-git push origin feature/useritem-class
+
+User.registry = UserRegistry(factory=User)
@@ -0,0 +1,261 @@
+"""
+Username registry with constant-time signup and lookup.
+
+UserRegistry replaces the class-level User.all_usernames list, where every
+signup scanned every existing name. Names are kept in a dict keyed by the
+case-folded username, so "Ali" and "ali" are the same account, and both
+registering and looking up a name are O(1). User objects are created the
+first time a name is looked up and then cached. A million registered
+names therefore cost a million short strings, not a million Users.
+
+With a path, every accepted name (and every removal) is also appended to
+a JSON Lines file and read back on startup. A torn or damaged tail (from
+a crash mid-write) is dropped.
+bulk_import() adds many names with a single write.
+
+An optional BloomFilter can be kept alongside. It is a small bit array
+(about 1.2 MB per million names at a 1% false-positive rate) that answers
+"definitely not taken" without touching the dict. Its bytes can be shipped
+to front-end processes that do not hold the full registry.
+
+Example:
+    >>> registry = UserRegistry()      # user_item.User.registry builds Users
+    >>> registry.register("Ali")
+    'Ali'
+    >>> "ALI" in registry, registry.is_available("bob")
+    (True, True)
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+
+class UsernameTaken(ValueError):
+    """Raised by UserRegistry.register when the name is already registered."""
+
+
+def normalize_username(username: str) -> str:
+    """Strip surrounding whitespace and case-fold, so look-alike names collide."""
+    return username.strip().casefold()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Args:
+        capacity (int): expected number of entries
+        error_rate (float): target false-positive rate at capacity
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate in (0, 1)")
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_bits = max(8, bits)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, value: str) -> Iterator[int]:
+        # double hashing: h1 + i * h2 gives k independent-enough positions
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, value: str):
+        bits = self._bits
+        for pos in self._positions(value):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+    def to_bytes(self) -> bytes:
+        header = self.num_bits.to_bytes(8, "little") + self.num_hashes.to_bytes(2, "little")
+        return header + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        bloom = cls.__new__(cls)
+        bloom.num_bits = int.from_bytes(data[:8], "little")
+        bloom.num_hashes = int.from_bytes(data[8:10], "little")
+        bloom._bits = bytearray(data[10:])
+        if len(bloom._bits) != (bloom.num_bits + 7) // 8:
+            raise ValueError("Bloom filter data is truncated")
+        return bloom
+
+
+class UserRegistry:
+    """Case-insensitive username -> User registry.
+
+    Args:
+        path (str, optional): JSON Lines file that persists the names
+        factory (callable): builds a User from a username; see user_item.User
+        bloom (bool): keep a BloomFilter pre-check alongside the dict
+        expected_users (int): sizing hint for the Bloom filter
+    """
+
+    def __init__(self, path: Optional[str] = None, factory: Optional[Callable[[str], Any]] = None,
+                 bloom: bool = False, expected_users: int = 1_000_000):
+        self.path = path
+        self.factory = factory
+        self.bloom = BloomFilter(expected_users) if bloom else None
+        self._names: Dict[str, str] = {}     # folded name -> name as registered
+        self._users: Dict[str, Any] = {}     # folded name -> User, once looked up
+        self._lock = threading.Lock()
+        self._file = None
+        if path is not None:
+            self._load()
+            self._file = open(path, "a", encoding="utf-8")
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, username: str) -> bool:
+        key = normalize_username(username)
+        if self.bloom is not None and key not in self.bloom:
+            return False
+        return key in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        """Registered names, in registration order."""
+        return iter(list(self._names.values()))
+
+    def is_available(self, username: str) -> bool:
+        return bool(normalize_username(username)) and username not in self
+
+    def register(self, username: str):
+        """Claim a username and return its User.
+
+        Raises:
+            UsernameTaken: if the name is already taken
+            ValueError: if the name is empty
+        """
+        name = username.strip()
+        key = normalize_username(name)
+        if not key:
+            raise ValueError("username cannot be empty")
+        with self._lock:
+            if key in self._names:
+                raise UsernameTaken(f"{name} is already taken")
+            self._append([name])
+            self._add(key, name)
+        return self.get(name)
+
+    def bulk_import(self, usernames: Iterable[str]) -> Tuple[int, int]:
+        """Register many names with one write; returns (added, skipped).
+
+        Empty names and names already taken (including duplicates within the
+        input) are skipped.
+        """
+        added, skipped = [], 0
+        with self._lock:
+            seen = set()
+            for username in usernames:
+                name = username.strip()
+                key = normalize_username(name)
+                if not key or key in self._names or key in seen:
+                    skipped += 1
+                    continue
+                seen.add(key)
+                added.append((key, name))
+            self._append([name for _, name in added])
+            for key, name in added:
+                self._add(key, name)
+        return len(added), skipped
+
+    def get(self, username: str):
+        """Return the User for a name (any case), or None if it is not registered."""
+        key = normalize_username(username)
+        user = self._users.get(key)
+        if user is not None:
+            return user
+        name = self._names.get(key)
+        if name is None:
+            return None
+        if self.factory is None:
+            return name
+        with self._lock:
+            return self._users.setdefault(key, self.factory(name))
+
+    def remove(self, username: str):
+        """Release a name; raises KeyError if it is not registered."""
+        key = normalize_username(username)
+        with self._lock:
+            name = self._names.pop(key)
+            self._users.pop(key, None)
+            self._write([json.dumps({"removed": name})])
+        # a Bloom filter cannot forget; removed names just become false positives
+
+    def compact(self):
+        """Rewrite the backing file with only the current names."""
+        if self.path is None:
+            return
+        with self._lock:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(name) + "\n" for name in self._names.values())
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # internals
+
+    def _add(self, key: str, name: str):
+        self._names[key] = name
+        if self.bloom is not None:
+            self.bloom.add(key)
+
+    def _append(self, names):
+        self._write([json.dumps(name) for name in names])
+
+    def _write(self, lines):
+        if self._file is None or not lines:
+            return
+        self._file.write("".join(line + "\n" for line in lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        good = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("torn line")
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if isinstance(entry, str):
+                    self._add(normalize_username(entry), entry)
+                elif isinstance(entry, dict) and isinstance(entry.get("removed"), str):
+                    self._names.pop(normalize_username(entry["removed"]), None)
+                else:
+                    break   # valid JSON but not a line we wrote: damaged like a torn line
+                good += len(line)
+        if good != os.path.getsize(self.path):
+            # drop a torn or damaged tail so later appends start on a clean line
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
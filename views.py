@@ -0,0 +1,420 @@
+"""
+Lazy, paginated views over ordered collections.
+
+OrderIndex keeps values in insertion order, with O(log n) removals and
+positional reads. SortedIndex keeps (key, id) pairs sorted in blocks, with
+O(log n) inserts and removals. ItemsView is a read-only Sequence over
+either one. Slicing, indexing and keyset pagination touch only the
+requested page rather than materializing and sorting the whole collection.
+
+Containers (base_classes.AbstractReviewContainer) and the Catalog hand
+these views out from get_items()/view().
+
+Example:
+    >>> order = OrderIndex()
+    >>> for title in ["Dune", "Alien", "Up"]:
+    ...     _ = order.append(title)
+    >>> view = ItemsView.over_order(order)
+    >>> view[1:]
+    ['Alien', 'Up']
+    >>> first = view.page(size=2)
+    >>> first.items, view.page(first.next_cursor, size=2).items
+    (['Dune', 'Alien'], ['Up'])
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class _Top:
+    """Compares greater than anything; used as an upper bisect bound."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_TOP = _Top()
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Any    # pass to page() for the next page; None on the last page
+
+
+class OrderIndex:
+    """Values in insertion order with O(log n) removal and keyset pagination.
+
+    Each value gets a monotonically increasing sequence number. Removal
+    leaves the number in the order list as a tombstone and clears its slot
+    in a Fenwick tree of live flags, so positional reads find the n-th live
+    number in O(log n) without rebuilding the list. The list is compacted
+    only once tombstones make up half of it, an amortized O(1) extra per
+    removal.
+    """
+
+    def __init__(self):
+        self._values: Dict[int, Any] = {}
+        self._order: List[int] = []
+        self._live = _Counts()
+        self._next_seq = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[Any]:
+        # dicts preserve insertion order, which is sequence order
+        return iter(self._values.values())
+
+    def __contains__(self, seq):
+        return seq in self._values
+
+    def append(self, value: Any) -> int:
+        """Add a value at the end and return its sequence number."""
+        seq = self._next_seq
+        self._next_seq += 1
+        self._values[seq] = value
+        self._order.append(seq)
+        self._live.append(1)
+        return seq
+
+    def remove(self, seq: int) -> Any:
+        """Remove and return the value with this sequence number."""
+        value = self._values.pop(seq)
+        if len(self._values) * 2 < len(self._order):
+            self._compact()
+        else:
+            self._live.add(bisect_left(self._order, seq), -1)
+        return value
+
+    def get(self, seq: int) -> Any:
+        return self._values[seq]
+
+    def items(self):
+        """(sequence number, value) pairs in insertion order."""
+        return self._values.items()
+
+    def seq_at(self, index: int) -> int:
+        """Sequence number of the value at a position (negative counts from the end)."""
+        n = len(self._values)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("index out of range")
+        return self._order[self._live.find(index)[0]]
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        """Values at positions [start, stop) in insertion order."""
+        stop = min(stop, len(self._values))
+        if start >= stop:
+            return []
+        order, values = self._order, self._values
+        pos = self._live.find(start)[0]
+        found: List[Any] = []
+        want = stop - start
+        while len(found) < want:
+            seq = order[pos]
+            if seq in values:
+                found.append(values[seq])
+            pos += 1
+        return found
+
+    def after(self, cursor: Optional[int], size: int) -> Tuple[List[Any], Optional[int]]:
+        """Up to size values following sequence number cursor (None = from the start)."""
+        order = self._order
+        pos = 0 if cursor is None else bisect_right(order, cursor)
+        values = self._values
+        found: List[Any] = []
+        last = None
+        while pos < len(order) and len(found) < size:
+            seq = order[pos]
+            if seq in values:
+                found.append(values[seq])
+                last = seq
+            pos += 1
+        # skip removed numbers so a full last page does not hand out a dead cursor
+        while pos < len(order) and order[pos] not in values:
+            pos += 1
+        return found, (last if pos < len(order) else None)
+
+    def _compact(self):
+        values = self._values
+        self._order = [seq for seq in self._order if seq in values]
+        self._live = _Counts([1] * len(self._order))
+
+
+class _Counts:
+    """Fenwick (binary indexed) tree over a list of non-negative counts.
+
+    Point updates, prefix sums and "which slot holds the n-th unit" all
+    take O(log n).
+    """
+
+    def __init__(self, counts: Iterable[int] = ()):
+        tree = [0]
+        tree.extend(counts)
+        n = len(tree) - 1
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def __len__(self):
+        return len(self._tree) - 1
+
+    def append(self, count: int):
+        tree = self._tree
+        i = len(tree)
+        # node i sums slots (i - lowbit(i), i]; add up the nodes that tile the part before i
+        low = i - (i & -i)
+        j = i - 1
+        while j > low:
+            count += tree[j]
+            j -= j & -j
+        tree.append(count)
+
+    def add(self, slot: int, delta: int):
+        tree = self._tree
+        i = slot + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, slot: int) -> int:
+        """Sum of the counts of slots [0, slot)."""
+        tree = self._tree
+        total = 0
+        while slot:
+            total += tree[slot]
+            slot -= slot & -slot
+        return total
+
+    def find(self, rank: int) -> Tuple[int, int]:
+        """(slot, offset) of unit number rank (from 0); rank must be below the total."""
+        tree = self._tree
+        slot = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            nxt = slot + step
+            if nxt < len(tree) and tree[nxt] <= rank:
+                slot = nxt
+                rank -= tree[nxt]
+            step >>= 1
+        return slot, rank
+
+
+_LOAD = 512   # SortedIndex blocks hold between _LOAD // 2 and 2 * _LOAD entries
+
+
+class SortedIndex:
+    """(key, ident) pairs kept sorted; each ident is filed under one key.
+
+    The pairs live in a list of sorted blocks (as in sortedcontainers), with
+    the last pair of each block kept for bisecting and a Fenwick tree of
+    block sizes for positions. An add or remove is a bisect over the blocks
+    plus a shift of at most 2 * _LOAD entries within one block, so updates
+    stay O(log n) however large the index grows. Reading position i is
+    O(log n), and a slice costs O(log n) plus its length.
+    """
+
+    def __init__(self):
+        self._blocks: List[List[Tuple[Any, Hashable]]] = []
+        self._maxes: List[Tuple[Any, Hashable]] = []
+        self._sizes = _Counts()
+        self._len = 0
+        self._keys: Dict[Hashable, Any] = {}
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, ident):
+        return ident in self._keys
+
+    def add(self, ident: Hashable, key: Any):
+        """File ident under key, moving it if it was already filed."""
+        if ident in self._keys:
+            self.remove(ident)
+        entry = (key, ident)
+        self._keys[ident] = key
+        self._len += 1
+        blocks, maxes = self._blocks, self._maxes
+        if not blocks:
+            blocks.append([entry])
+            maxes.append(entry)
+            self._sizes = _Counts([1])
+            return
+        b = min(bisect_left(maxes, entry), len(blocks) - 1)
+        block = blocks[b]
+        insort(block, entry)
+        maxes[b] = block[-1]
+        if len(block) > 2 * _LOAD:
+            blocks[b:b + 1] = [block[:_LOAD], block[_LOAD:]]
+            maxes[b:b + 1] = [block[_LOAD - 1], block[-1]]
+            self._sizes = _Counts(map(len, blocks))
+        else:
+            self._sizes.add(b, 1)
+
+    def remove(self, ident: Hashable):
+        key = self._keys.pop(ident)
+        entry = (key, ident)
+        blocks, maxes = self._blocks, self._maxes
+        b = bisect_left(maxes, entry)
+        block = blocks[b]
+        del block[bisect_left(block, entry)]
+        self._len -= 1
+        if len(block) >= _LOAD // 2 or len(blocks) == 1:
+            if block:
+                maxes[b] = block[-1]
+                self._sizes.add(b, -1)
+            else:
+                del blocks[b], maxes[b]
+                self._sizes = _Counts()
+            return
+        # merge a small block into a neighbour, splitting again if that overfills it
+        if b:
+            b -= 1
+        merged = blocks[b] + blocks[b + 1]
+        parts = [merged] if len(merged) <= 2 * _LOAD else [merged[:len(merged) // 2], merged[len(merged) // 2:]]
+        blocks[b:b + 2] = parts
+        maxes[b:b + 2] = [part[-1] for part in parts]
+        self._sizes = _Counts(map(len, blocks))
+
+    def discard(self, ident: Hashable):
+        if ident in self._keys:
+            self.remove(ident)
+
+    def key_of(self, ident: Hashable) -> Any:
+        return self._keys[ident]
+
+    def bisect_left(self, entry: Tuple) -> int:
+        """Position of the first pair >= entry."""
+        b = bisect_left(self._maxes, entry)
+        if b == len(self._blocks):
+            return self._len
+        return self._sizes.prefix(b) + bisect_left(self._blocks[b], entry)
+
+    def bisect_right(self, entry: Tuple) -> int:
+        """Position of the first pair > entry."""
+        b = bisect_right(self._maxes, entry)
+        if b == len(self._blocks):
+            return self._len
+        return self._sizes.prefix(b) + bisect_right(self._blocks[b], entry)
+
+    def bounds(self, low: Any = None, high: Any = None) -> Tuple[int, int]:
+        """Positions [start, stop) of the entries with low <= key <= high."""
+        start = 0 if low is None else self.bisect_left((low,))
+        stop = self._len if high is None else self.bisect_right((high, _TOP))
+        return start, max(start, stop)
+
+    def entries(self, start: int, stop: int) -> List[Tuple[Any, Hashable]]:
+        """The (key, ident) pairs at positions [start, stop)."""
+        start, stop = max(start, 0), min(stop, self._len)
+        if start >= stop:
+            return []
+        b, offset = self._sizes.find(start)
+        found: List[Tuple[Any, Hashable]] = []
+        wanted = stop - start
+        blocks = self._blocks
+        while len(found) < wanted:
+            found.extend(blocks[b][offset:offset + wanted - len(found)])
+            b, offset = b + 1, 0
+        return found
+
+    def idents(self, start: int, stop: int) -> List[Hashable]:
+        return [ident for _, ident in self.entries(start, stop)]
+
+    def after(self, cursor: Optional[Tuple[Any, Hashable]], size: int) -> Tuple[List[Hashable], Any]:
+        """Up to size idents after the (key, ident) cursor (None = from the start)."""
+        start = 0 if cursor is None else self.bisect_right(tuple(cursor))
+        chunk = self.entries(start, start + size)
+        more = start + size < self._len
+        return [ident for _, ident in chunk], (chunk[-1] if chunk and more else None)
+
+
+class ItemsView(Sequence):
+    """Read-only, lazily evaluated sequence with page() for keyset pagination.
+
+    Build one with over_order() or over_sorted(); the view reads the live
+    index, so it reflects later changes to the collection.
+    """
+
+    def __init__(self, size: Callable[[], int], slice_: Callable[[int, int], List[Any]],
+                 after: Callable[[Any, int], Tuple[List[Any], Any]]):
+        self._size = size
+        self._slice = slice_
+        self._after = after
+
+    @classmethod
+    def over_order(cls, order: OrderIndex) -> "ItemsView":
+        return cls(order.__len__, order.slice, order.after)
+
+    @classmethod
+    def over_sorted(cls, index: SortedIndex, resolve: Callable[[Hashable], Any],
+                    reverse: bool = False) -> "ItemsView":
+        """View the items of a SortedIndex, resolving each ident with resolve()."""
+        if reverse:
+            def slice_(start, stop):
+                n = len(index)
+                idents = index.idents(n - stop, n - start)
+                return [resolve(i) for i in reversed(idents)]
+
+            def after(cursor, size):
+                # walk backwards from the cursor position
+                n = len(index)
+                end = n if cursor is None else index.bisect_left(tuple(cursor))
+                start = max(0, end - size)
+                chunk = index.entries(start, end)[::-1]
+                return [resolve(i) for _, i in chunk], (chunk[-1] if chunk and start > 0 else None)
+            return cls(index.__len__, slice_, after)
+
+        def slice_(start, stop):
+            return [resolve(i) for i in index.idents(start, stop)]
+
+        def after(cursor, size):
+            idents, next_cursor = index.after(cursor, size)
+            return [resolve(i) for i in idents], next_cursor
+        return cls(index.__len__, slice_, after)
+
+    def __len__(self):
+        return self._size()
+
+    def __getitem__(self, index):
+        n = self._size()
+        if isinstance(index, slice):
+            start, stop, step = index.indices(n)
+            if step == 1:
+                return self._slice(start, stop) if start < stop else []
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("view index out of range")
+        return self._slice(index, index + 1)[0]
+
+    def __iter__(self):
+        cursor = None
+        while True:
+            items, cursor = self._after(cursor, 1024)
+            yield from items
+            if cursor is None:
+                return
+
+    def page(self, cursor: Any = None, size: int = 50) -> Page:
+        """Return the page of up to size items that follows cursor."""
+        if size < 1:
+            raise ValueError("size must be positive")
+        return Page(*self._after(cursor, size))
+
+    def __eq__(self, other):
+        if isinstance(other, (ItemsView, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        preview = self[:5]
+        more = ", ..." if len(self) > 5 else ""
+        return f"ItemsView([{', '.join(map(repr, preview))}{more}])"